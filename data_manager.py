@@ -3,7 +3,8 @@ import shutil
 import numpy as np
 import sys
 from datetime import datetime
-from data_manager_functions import dump_json, load_json, update_local_population_nets
+from data_manager_functions import dump_json, load_json, update_local_population_nets, encode_pathing_cache, \
+    Cached_species_movement_scores, PATHING_CACHE_ARRAYS
 from simulation_utils import write_parameters_file, write_metadata_file, write_average_population_data
 from simulation_utils import write_perturbation_history_data, global_species_time_series_properties
 from simulation_utils import write_population_history_data, write_system_state
@@ -61,41 +62,52 @@ def write_initial_files(parameters, metadata, sim_path, parameters_filename):
     except Exception as e:
         print(f"Error writing initial files: {e}")
 
-def save_adj_variables(patch_list, spatial_set_number):
+def save_adj_variables(patch_list, spatial_set_number, cache_key):
     """
-    Saves patch-related variables to the appropriate directory.
+    Saves patch-related variables to a binary (memory-mappable) cache in the appropriate directory, keyed by the hash
+    of the network and parameters they were built from.
     """
-    base_dir = f'spatial_data_files/test_{spatial_set_number}/adj_variables/'
+    base_dir = f'spatial_data_files/test_{spatial_set_number}/adj_variables/pathing_cache/{cache_key}/'
 
-    for patch in patch_list:
-        try:
-            sms_file = os.path.join(base_dir, f'species_movement_scores/sms_{patch.number}.json')
-            ssl_file = os.path.join(base_dir, f'stepping_stone_list/ssl_{patch.number}.json')
-            al_file = os.path.join(base_dir, f'adjacency_list/al_{patch.number}.json')
-
-            dump_json(data=patch.species_movement_scores, filename=sms_file)
-            dump_json(data=patch.stepping_stone_list, filename=ssl_file)
-            dump_json(data=patch.adjacency_lists, filename=al_file)
-        except Exception as e:
-            print(f"Error saving adjacency variables for patch {patch.number}: {e}")
+    try:
+        species_names = list(patch_list[0].species_movement_scores.keys())
+        cache = encode_pathing_cache(patch_list=patch_list, species_names=species_names)
+        os.makedirs(base_dir, exist_ok=True)
+        for array_name in PATHING_CACHE_ARRAYS:
+            np.save(os.path.join(base_dir, f'{array_name}.npy'), cache[array_name])
+        # the index is written last, so that an interrupted save is not mistaken for a complete cache
+        dump_json(data={"species_names": species_names, "num_patches": len(patch_list), "cache_key": cache_key},
+                  filename=os.path.join(base_dir, 'index.json'))
+    except Exception as e:
+        print(f"Error saving adjacency variables: {e}")
 
-def load_adj_variables(patch_list, spatial_set_number):
+def load_adj_variables(patch_list, spatial_set_number, cache_key):
     """
-    Loads patch-related variables from the appropriate directory.
+    Loads patch-related variables from the binary cache with the given key. The arrays are memory-mapped and each
+    patch's .species_movement_scores entries are only decoded when accessed. Raises FileNotFoundError on a cache miss.
     """
-    base_dir = f'spatial_data_files/test_{spatial_set_number}/adj_variables/'
+    base_dir = f'spatial_data_files/test_{spatial_set_number}/adj_variables/pathing_cache/{cache_key}/'
+
+    index = load_json(input_file=os.path.join(base_dir, 'index.json'))
+    if index["cache_key"] != cache_key or index["num_patches"] != len(patch_list):
+        raise ValueError("Cached adjacency variables do not match the current network.")
+    cache = {}
+    for array_name in PATHING_CACHE_ARRAYS:
+        cache[array_name] = np.load(os.path.join(base_dir, f'{array_name}.npy'), mmap_mode='r')
 
+    adjacency_list_offsets = np.asarray(cache["adjacency_list_offsets"])
+    stepping_stone_offsets = np.asarray(cache["stepping_stone_offsets"])
     for patch in patch_list:
-        try:
-            sms_file = os.path.join(base_dir, f'species_movement_scores/sms_{patch.number}.json')
-            ssl_file = os.path.join(base_dir, f'stepping_stone_list/ssl_{patch.number}.json')
-            al_file = os.path.join(base_dir, f'adjacency_list/al_{patch.number}.json')
-
-            patch.species_movement_scores = load_json(input_file=sms_file)
-            patch.stepping_stone_list = load_json(input_file=ssl_file)
-            patch.adjacency_lists = load_json(input_file=al_file)
-        except Exception as e:
-            print(f"Error loading adjacency variables for patch {patch.number}: {e}")
+        patch.species_movement_scores = {}
+        patch.adjacency_lists = {}
+        for species_index, species_name in enumerate(index["species_names"]):
+            patch.species_movement_scores[species_name] = Cached_species_movement_scores(
+                cache=cache, species_index=species_index, source_index=patch.number)
+            flat_index = species_index * len(patch_list) + patch.number
+            patch.adjacency_lists[species_name] = cache["adjacency_list_values"][
+                adjacency_list_offsets[flat_index]: adjacency_list_offsets[flat_index + 1]].tolist()
+        patch.stepping_stone_list = cache["stepping_stone_values"][
+            stepping_stone_offsets[patch.number]: stepping_stone_offsets[patch.number + 1]].tolist()
 
 def save_reserve_list(reserve_list, spatial_set_number):
     """
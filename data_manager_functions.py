@@ -13,6 +13,8 @@ import json
 import pickle
 import sys
 from copy import deepcopy
+from collections.abc import Mapping
+from history_store import History_view
 
 
 # ----------------------------- AUXILIARY FUNCTIONS FOR FILE SAVING AND OBJECT HANDLING ----------------------------- #
@@ -68,6 +70,166 @@ def set_default(obj):
     # convert numpy arrays to nest lists
     if isinstance(obj, np.ndarray):
         return obj.tolist()
+    # decode any lazily-loaded cached species_movement_scores, and build the ODE recordings held in the recording table
+    # as the dictionaries they would otherwise be
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    # write the histories held in an array-backed store as lists, as they would otherwise be
+    if isinstance(obj, History_view):
+        return obj.values().tolist()
+
+
+# --------------------------------- BINARY CACHE OF THE SPECIES PATHING VARIABLES --------------------------------- #
+#
+# The patch.species_movement_scores dictionaries are stored as flat arrays so that they can be memory-mapped:
+# - dense (species, source, target) arrays of the "best" route length, cost and path code, plus the target patch
+#   size and traversal (NaN if not recorded);
+# - a pool of the remaining (length-key, cost, path code) routes, indexed by route_offsets in the same order as the
+#   dictionary keys;
+# - paths are not stored explicitly. As every route found by the pathing is "the best route to patch v, then step
+#   from v", the path code is simply v (or -1 for an empty path), and the path is recovered by following the "best"
+#   path codes back to the source. Any path that does not have this form is stored in the explicit path pool and
+#   given the code -(index + 2).
+
+PATHING_CACHE_ARRAYS = ["best_length", "best_cost", "best_path", "target_patch_size", "target_patch_traversal",
+                        "route_offsets", "route_length", "route_cost", "route_path", "explicit_path_offsets",
+                        "explicit_path_vertices", "adjacency_list_offsets", "adjacency_list_values",
+                        "stepping_stone_offsets", "stepping_stone_values"]
+
+
+def encode_pathing_cache(patch_list, species_names):
+    num_species = len(species_names)
+    num_patches = len(patch_list)
+    cache = {
+        "best_length": np.full([num_species, num_patches, num_patches], -1.0),  # -1 marks an unreached patch
+        "best_cost": np.full([num_species, num_patches, num_patches], float('inf')),
+        "best_path": np.full([num_species, num_patches, num_patches], -1, dtype=np.int32),
+        "target_patch_size": np.full([num_species, num_patches, num_patches], np.nan),
+        "target_patch_traversal": np.full([num_species, num_patches, num_patches], np.nan),
+    }
+    route_counts = np.zeros([num_species, num_patches, num_patches], dtype=np.int64)
+    route_length = []
+    route_cost = []
+    route_path = []
+    explicit_path_offsets = [0]
+    explicit_path_vertices = []
+    adjacency_list_counts = np.zeros([num_species, num_patches], dtype=np.int64)
+    adjacency_list_values = []
+
+    for species_index, species_name in enumerate(species_names):
+        for patch in patch_list:
+            patch_costs = patch.species_movement_scores[species_name]
+            best_paths = [patch_costs[x]["routes"]["best"][-1] for x in range(num_patches)]
+
+            def path_code(path):
+                if len(path) == 0:
+                    return -1
+                if path[:-1] == best_paths[path[-1]]:
+                    return path[-1]
+                explicit_path_vertices.extend(path)
+                explicit_path_offsets.append(len(explicit_path_vertices))
+                return -len(explicit_path_offsets)  # i.e. -(index + 2)
+
+            for target in range(num_patches):
+                target_costs = patch_costs[target]
+                best = target_costs["routes"]["best"]
+                if len(best) == 3:
+                    cache["best_length"][species_index, patch.number, target] = best[0]
+                    cache["best_cost"][species_index, patch.number, target] = best[1]
+                    cache["best_path"][species_index, patch.number, target] = path_code(best[2])
+                for key, route in target_costs["routes"].items():
+                    if key != "best":
+                        route_length.append(-1 if key == float('inf') else key)
+                        route_cost.append(route[0])
+                        route_path.append(path_code(route[1]))
+                        route_counts[species_index, patch.number, target] += 1
+                if "target_patch_size" in target_costs:
+                    cache["target_patch_size"][species_index, patch.number, target] = target_costs["target_patch_size"]
+                    cache["target_patch_traversal"][species_index, patch.number, target] = \
+                        target_costs["target_patch_traversal"]
+            adjacency_list_values.extend(patch.adjacency_lists[species_name])
+            adjacency_list_counts[species_index, patch.number] = len(patch.adjacency_lists[species_name])
+
+    stepping_stone_values = []
+    stepping_stone_counts = np.zeros([num_patches], dtype=np.int64)
+    for patch in patch_list:
+        stepping_stone_values.extend(patch.stepping_stone_list)
+        stepping_stone_counts[patch.number] = len(patch.stepping_stone_list)
+
+    cache["route_offsets"] = np.concatenate([[0], np.cumsum(route_counts)])
+    cache["route_length"] = np.asarray(route_length, dtype=np.int32)
+    cache["route_cost"] = np.asarray(route_cost, dtype=float)
+    cache["route_path"] = np.asarray(route_path, dtype=np.int32)
+    cache["explicit_path_offsets"] = np.asarray(explicit_path_offsets, dtype=np.int64)
+    cache["explicit_path_vertices"] = np.asarray(explicit_path_vertices, dtype=np.int32)
+    cache["adjacency_list_offsets"] = np.concatenate([[0], np.cumsum(adjacency_list_counts)])
+    cache["adjacency_list_values"] = np.asarray(adjacency_list_values, dtype=np.int32)
+    cache["stepping_stone_offsets"] = np.concatenate([[0], np.cumsum(stepping_stone_counts)])
+    cache["stepping_stone_values"] = np.asarray(stepping_stone_values, dtype=np.int32)
+    return cache
+
+
+def decode_cached_path(cache, species_index, source_index, code):
+    # follow the chain of "best" path codes back to the source
+    suffix = []
+    while code >= 0:
+        suffix.append(int(code))
+        code = cache["best_path"][species_index, source_index, code]
+    if code == -1:
+        prefix = []
+    else:
+        explicit_index = -code - 2
+        prefix = cache["explicit_path_vertices"][cache["explicit_path_offsets"][explicit_index]:
+                                                 cache["explicit_path_offsets"][explicit_index + 1]].tolist()
+    return prefix + suffix[::-1]
+
+
+def decode_cached_target_costs(cache, species_index, source_index, target):
+    # rebuild the species_movement_scores[species][target] dictionary for this source patch
+    num_patches = np.shape(cache["best_length"])[1]
+    best_length = cache["best_length"][species_index, source_index, target]
+    if best_length < 0:
+        routes = {"best": (float('inf'), float('inf'), 0.0, [])}
+    else:
+        routes = {"best": (int(best_length), float(cache["best_cost"][species_index, source_index, target]),
+                           decode_cached_path(cache=cache, species_index=species_index, source_index=source_index,
+                                              code=cache["best_path"][species_index, source_index, target]))}
+    flat_index = (species_index * num_patches + source_index) * num_patches + target
+    for route_index in range(cache["route_offsets"][flat_index], cache["route_offsets"][flat_index + 1]):
+        length = int(cache["route_length"][route_index])
+        path = decode_cached_path(cache=cache, species_index=species_index, source_index=source_index,
+                                  code=cache["route_path"][route_index])
+        routes[float('inf') if length == -1 else length] = (float(cache["route_cost"][route_index]), path)
+    target_costs = {"routes": routes}
+    if not np.isnan(cache["target_patch_size"][species_index, source_index, target]):
+        target_costs["target_patch_size"] = float(cache["target_patch_size"][species_index, source_index, target])
+        target_costs["target_patch_traversal"] = float(
+            cache["target_patch_traversal"][species_index, source_index, target])
+    return target_costs
+
+
+class Cached_species_movement_scores(Mapping):
+    # Read-only stand-in for patch.species_movement_scores[species] when loaded from the binary cache. Each target
+    # dictionary is only decoded (and then kept) when it is first accessed.
+    def __init__(self, cache, species_index, source_index):
+        self.cache = cache
+        self.species_index = species_index
+        self.source_index = source_index
+        self.decoded = {}
+
+    def __getitem__(self, target):
+        if target not in self.decoded:
+            if not 0 <= target < len(self):
+                raise KeyError(target)
+            self.decoded[target] = decode_cached_target_costs(cache=self.cache, species_index=self.species_index,
+                                                              source_index=self.source_index, target=target)
+        return self.decoded[target]
+
+    def __iter__(self):
+        return iter(range(len(self)))
+
+    def __len__(self):
+        return np.shape(self.cache["best_length"])[2]
 
 
 def format_dictionary_to_JSON_string(input_string, is_final_item, is_indenting):
@@ -206,6 +368,13 @@ def write_population_history_data(patch_list, sim_path, step):
                                                          pop_leave_array, internal_change_array]))
                 # noinspection PyTypeChecker
                 np.savetxt(f, combined_array, newline='\n', fmt='%.20f')
+            # the min, mean and max over the transient of any histories only summarised there (NaN in the above)
+            if local_pop.history_store is not None and len(local_pop.history_store.summary) > 0:
+                file_name = f"{sim_path}/{step}/data/local_pop_csv/patch_{patch.number}_{local_pop.name}_transient.csv"
+                with safe_open_w(file_name) as f:
+                    for channel_name, summary in local_pop.history_store.transient_summary(
+                            patch_num=patch.number, species_name=local_pop.name).items():
+                        f.write(f"{channel_name}, {summary[0]:.20f}, {summary[1]:.20f}, {summary[2]:.20f}\n")
 
 
 def write_system_state(system_state, sim_path, step):
@@ -980,7 +1149,7 @@ def plot_interactions(patch_list, adjacency_path_list, sim_path, step):
     for patch in patch_list:
         for local_pop in patch.local_populations.values():
             interacting_populations = local_pop.interacting_populations
-            leaving_array = local_pop.leaving_array
+            leaving_flows = local_pop.leaving_flows
 
             # prey sources
             prey_path_list = []
@@ -1012,11 +1181,11 @@ def plot_interactions(patch_list, adjacency_path_list, sim_path, step):
 
             # dispersal
             dispersal_path_list = []
-            for destination in range(len(patch_list)):
-                if leaving_array[destination] != 0.0:
-                    # this shows the ACTUAL final destinations, so no checks required
-                    dispersal_path_list.append((patch.number, destination,
-                                                leaving_array[destination][0], [0.3, 0.3, 0.3]))
+            if leaving_flows is not None:
+                for destination, amount in sorted(zip(leaving_flows[0].tolist(), leaving_flows[1].tolist())):
+                    if amount != 0.0:
+                        # this shows the ACTUAL final destinations, so no checks required
+                        dispersal_path_list.append((patch.number, destination, amount, [0.3, 0.3, 0.3]))
 
             path_lists = {
                 "prey": {
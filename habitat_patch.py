@@ -32,6 +32,7 @@ class Patch:
         self.this_habitat_species_feeding = {}
         self.this_habitat_species_traversal = {}
         self.stepping_stone_list = []
+        self.bounded_path_costs = {}  # species: (num_patches, ASSUMED_MAX_PATH_LENGTH + 1) array of costs per path length
         self.biodiversity = 0.0
         self.is_reserve = 0  # set to 1 if is a reserve
         self.reserve_order = []  # empty list if not a reserve, otherwise [cluster_num, patch_num_within_cluster]
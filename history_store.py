@@ -0,0 +1,176 @@
+import numpy as np
+
+
+# Optional array-backed store of the population histories of every local population, enabled by
+# main_para["IS_HISTORY_STORE"].
+#
+# The five histories that Local_population.record_population_history() adds to every step are held in one array of
+# shape (steps, patches, species, channels), pre-allocated for the whole simulation, rather than in five growing lists
+# of floats per local population. Each local population holds a History_view of its part of the store in place of each
+# list, supporting the list operations used elsewhere (len, indexing, slicing, iteration and np.asarray), so that
+# nothing else needs to change - while end-of-run analysis can instead slice the store's array directly.
+#
+# The first decimated_steps steps (i.e. most of the transient) may instead be recorded according to a per-channel
+# decimation_policy:
+# - "full": every step, as usual;
+# - an integer k: only every k-th step (steps 0, k, 2k, ...);
+# - "summary": only the running minimum, mean and maximum of each local population over these steps;
+# - "none": not at all.
+# The main array then only holds the steps after these, and steps that were not recorded read as NaN. The summaries are
+# saved alongside each local population's history .csv by write_population_history_data().
+
+HISTORY_CHANNELS = ["population", "internal_change", "population_leave", "population_enter", "potential_dispersal"]
+
+
+class History_store:
+
+    def __init__(self, num_steps, num_patches, species_list, dtype="float64", decimated_steps=0,
+                 decimation_policy=None):
+        self.species_column = {species.name: column for column, species in enumerate(species_list)}
+        shape = (num_patches, len(species_list))
+        # number of steps recorded so far by each local population
+        self.length = np.zeros(shape, dtype=int)
+
+        # the steps subject to the decimation policy, which are held separately for each channel
+        self.decimated_steps = decimated_steps
+        self.decimation_stride = {}
+        self.decimated = {}
+        self.summary = {}
+        for channel, name in enumerate(HISTORY_CHANNELS):
+            if decimation_policy is None or name not in decimation_policy or decimation_policy[name] == "full":
+                stride = 1
+            else:
+                stride = decimation_policy[name]
+            if stride == "summary":
+                self.summary[channel] = {"min": np.full(shape, np.inf), "sum": np.zeros(shape),
+                                         "max": np.full(shape, -np.inf)}
+            elif stride == "none":
+                pass
+            elif isinstance(stride, int) and not isinstance(stride, bool) and stride > 0:
+                self.decimation_stride[channel] = stride
+                self.decimated[channel] = np.zeros((-(-decimated_steps // stride),) + shape, dtype=dtype)
+            else:
+                raise Exception(f"History decimation policy {stride} for {name} not recognised.")
+
+        # all of the later steps, at full resolution
+        self.array = np.zeros((max(0, num_steps - decimated_steps),) + shape + (len(HISTORY_CHANNELS),), dtype=dtype)
+
+    def views(self, patch_num, species_name):
+        # the histories of a single local population, in HISTORY_CHANNELS order
+        return [History_view(store=self, patch_num=patch_num, column=self.species_column[species_name],
+                             channel=channel) for channel in range(len(HISTORY_CHANNELS))]
+
+    def reserve(self, num_steps):
+        # the store should already be large enough for the whole simulation, but is grown (by doubling) if not
+        num_rows = num_steps - self.decimated_steps
+        if num_rows > self.array.shape[0]:
+            extra_rows = max(num_rows, 2 * self.array.shape[0]) - self.array.shape[0]
+            self.array = np.concatenate([self.array, np.zeros((extra_rows,) + self.array.shape[1:],
+                                                              dtype=self.array.dtype)])
+
+    def record(self, patch_num, species_name, values):
+        # add the next step of a single local population's histories
+        column = self.species_column[species_name]
+        self.record_all(values=np.array([values], dtype=float), patch_index=np.array([patch_num]),
+                        column_index=np.array([column]))
+
+    def record_all(self, values, patch_index=None, column_index=None):
+        # add the next step of the histories of the given local populations (default: all of them) at once, from an
+        # array of shape (local populations, channels) - or (patches, species, channels) for all of them
+        if patch_index is None:
+            patch_index, column_index = np.indices(self.length.shape)
+        step = self.length[patch_index, column_index]
+        is_decimated = step < self.decimated_steps
+        if np.all(~is_decimated):
+            self.reserve(num_steps=int(np.max(step)) + 1)
+            self.array[step - self.decimated_steps, patch_index, column_index, :] = values
+        else:
+            values = np.asarray(values)
+            later = ~is_decimated
+            if np.any(later):
+                self.reserve(num_steps=int(np.max(step[later])) + 1)
+                self.array[step[later] - self.decimated_steps, patch_index[later], column_index[later], :] = \
+                    values[later]
+            step, patches, columns, values = \
+                step[is_decimated], patch_index[is_decimated], column_index[is_decimated], values[is_decimated]
+            for channel, stride in self.decimation_stride.items():
+                is_kept = step % stride == 0
+                self.decimated[channel][step[is_kept] // stride, patches[is_kept], columns[is_kept]] = \
+                    values[is_kept, channel]
+            for channel, summary in self.summary.items():
+                summary["min"][patches, columns] = np.minimum(summary["min"][patches, columns], values[:, channel])
+                summary["sum"][patches, columns] += values[:, channel]
+                summary["max"][patches, columns] = np.maximum(summary["max"][patches, columns], values[:, channel])
+        self.length[patch_index, column_index] += 1
+
+    def decimated_summary(self, channel_name):
+        # (min, mean, max) arrays of shape (patches, species) over the decimated steps of a "summary" channel
+        summary = self.summary[HISTORY_CHANNELS.index(channel_name)]
+        count = np.minimum(self.length, self.decimated_steps)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(count > 0, summary["sum"] / count, np.nan)
+        return summary["min"], mean, summary["max"]
+
+    def transient_summary(self, patch_num, species_name):
+        # {channel name: (min, mean, max)} over the decimated steps of each "summary" channel of one local population
+        column = self.species_column[species_name]
+        result = {}
+        for channel in sorted(self.summary):
+            name = HISTORY_CHANNELS[channel]
+            result[name] = tuple(float(x[patch_num, column]) for x in self.decimated_summary(channel_name=name))
+        return result
+
+    def series(self, patch_num, column, channel, steps):
+        # the values of one history at an array of steps (NaN for those not recorded)
+        result = np.full(len(steps), np.nan)
+        is_later = steps >= self.decimated_steps
+        result[is_later] = self.array[steps[is_later] - self.decimated_steps, patch_num, column, channel]
+        if channel in self.decimation_stride:
+            stride = self.decimation_stride[channel]
+            is_kept = ~is_later & (steps % stride == 0)
+            result[is_kept] = self.decimated[channel][steps[is_kept] // stride, patch_num, column]
+        return result
+
+
+class History_view:
+
+    # read-only list-like view of one history (channel) of one local population in a History_store
+    def __init__(self, store, patch_num, column, channel):
+        self.store = store
+        self.patch_num = patch_num
+        self.column = column
+        self.channel = channel
+
+    def values(self):
+        # the whole history (NaN for any steps that were not recorded)
+        if self.store.decimated_steps == 0:
+            return self.store.array[:len(self), self.patch_num, self.column, self.channel]
+        return self.store.series(patch_num=self.patch_num, column=self.column, channel=self.channel,
+                                 steps=np.arange(len(self)))
+
+    def __len__(self):
+        return int(self.store.length[self.patch_num, self.column])
+
+    def __getitem__(self, index):
+        length = len(self)
+        if isinstance(index, slice):
+            if self.store.decimated_steps == 0:
+                return self.values()[index]
+            return self.store.series(patch_num=self.patch_num, column=self.column, channel=self.channel,
+                                     steps=np.arange(length)[index])
+        if not -length <= index < length:
+            raise IndexError("history index out of range")
+        step = index % length
+        if step >= self.store.decimated_steps:
+            return float(self.store.array[step - self.store.decimated_steps, self.patch_num, self.column,
+                                          self.channel])
+        return float(self.store.series(patch_num=self.patch_num, column=self.column, channel=self.channel,
+                                       steps=np.array([step]))[0])
+
+    def __iter__(self):
+        return iter(self.values().tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return np.array(self.values())
+        return np.array(self.values(), dtype=dtype)
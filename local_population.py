@@ -1,24 +1,42 @@
+import math
+import multiprocessing
 import numpy as np
 from population_dynamics import temporal_function
+from ode_recording_store import Ode_recording_view
 
 
 # ------------------------ FUNCTIONAL RESPONSES ------------------------ #
 
 def functional_response(predation_func, predation_para, predator_population, prey_population, attack_rate, time):
+    # scalar version of functional_response_array() for a single local predator population
+    func_res = functional_response_array(
+        predation_func=predation_func,
+        predation_para=predation_para,
+        predator_population=np.array([predator_population], dtype=float),
+        prey_population=np.array([prey_population], dtype=float),
+        attack_rate=attack_rate,
+        time=time,
+    )
+    return float(func_res[0])
+
+
+def functional_response_array(predation_func, predation_para, predator_population, prey_population, attack_rate, time):
+    # Functional responses of many local predator populations of the same species (so with the same predation function
+    # and parameters) at once, given arrays of their populations and of their total hunted prey. The attack rate may be
+    # a single value or an array. The individual response functions below are evaluated elementwise.
     predation_function = {
         "lotka_volterra": functional_response_lotka_volterra,
         "holling_II": functional_response_holling_II,
         "beddington_deangelis": functional_response_beddington_deangelis,
         "ratio_dependent": functional_response_ratio_dependent,
     }
-    # include the min function to prevent an individual predator species feeding on more than the entire prey population
-    func_res = min(prey_population,
-                   predator_population * predation_function[predation_func](attack_rate=attack_rate,
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        func_res = predator_population * predation_function[predation_func](attack_rate=attack_rate,
                                                                             predation_para=predation_para,
                                                                             predator_population=predator_population,
                                                                             prey_population=prey_population)
-                   )
-    return func_res
+    # include the min function to prevent an individual predator species feeding on more than the entire prey population
+    return np.where(func_res < prey_population, func_res, prey_population)
 
 
 def functional_response_lotka_volterra(attack_rate, predation_para, predator_population, prey_population):
@@ -44,16 +62,255 @@ def functional_response_ratio_dependent(attack_rate, predation_para, predator_po
     return func_res
 
 
+# ------------------------ RECENT TIME AVERAGES ------------------------ #
+
+RECENT_HISTORIES = ["population_history", "internal_change_history", "population_leave_history",
+                    "population_enter_history", "potential_dispersal_history"]
+
+
+def build_recent_time_averages_of_populations(local_pop_list, current_step, back_steps):
+    # Local_population.build_recent_time_averages() for many local populations at once. The steps of each history
+    # that are needed (the last back_steps, and the further back_steps + 8 that the periodicity check may look back
+    # over) are gathered into (local populations x steps) matrices, and every statistic is then found by array
+    # operations on these.
+    first_step = current_step - 2 * back_steps - 7
+    batch = [x for x in local_pop_list if first_step >= 0 and current_step < len(x.population_history)]
+    if len(batch) > 0:
+        histories = {name: np.array([np.asarray(getattr(x, name)[first_step: current_step + 1], dtype=float)
+                                     for x in batch]) for name in RECENT_HISTORIES}
+        set_recent_time_averages(local_pop_list=batch, histories=histories, current_step=current_step,
+                                 back_steps=back_steps, first_step=first_step, length=None)
+    # otherwise the history is too short, and so (as before) any negative steps wrap around as list indices
+    for local_pop in local_pop_list:
+        if not (first_step >= 0 and current_step < len(local_pop.population_history)):
+            histories = {name: np.asarray(getattr(local_pop, name), dtype=float)[np.newaxis, :]
+                         for name in RECENT_HISTORIES}
+            set_recent_time_averages(local_pop_list=[local_pop], histories=histories, current_step=current_step,
+                                     back_steps=back_steps, first_step=0, length=len(local_pop.population_history))
+
+
+def set_recent_time_averages(local_pop_list, histories, current_step, back_steps, first_step, length):
+    # histories holds a matrix of each of the local populations' histories from first_step, or the whole histories if
+    # their (equal) length is given
+
+    def columns(steps):
+        # the columns of the history matrices that hold these steps
+        steps = np.asarray(steps)
+        if length is not None:
+            steps = np.where(steps < 0, steps + length, steps)
+        steps = steps - first_step
+        if np.any(steps < 0) or np.any(steps >= histories["population_history"].shape[1]):
+            raise IndexError("history index out of range")
+        return steps
+
+    def row_sums(matrix):
+        # each row is summed separately, so as to add in the same (pairwise) order as np.sum() of a single history
+        return np.array([np.sum(matrix_row) for matrix_row in matrix])
+
+    population = histories["population_history"]
+    num_local_pops = len(local_pop_list)
+    history_length = np.array([len(x.population_history) for x in local_pop_list])
+    minimum_population_size = np.array([x.species.minimum_population_size for x in local_pop_list], dtype=float)
+    recent = np.arange(population.shape[1])[current_step - back_steps - first_step: current_step - first_step]
+
+    # Mean and standard deviation of recent population history
+    average_population = row_sums(population[:, recent]) / back_steps
+    st_dev_population = np.array([np.std(matrix_row) for matrix_row in population[:, recent]])
+
+    # Recent variations in the local population - periodicity, maximum absolute variation, occupancy change. Each
+    # is over the steps current_step - n, for n in 0, ..., back_steps - 1:
+    steps_back = np.arange(back_steps)
+    current_population = population[:, columns(current_step)]
+
+    # greatest absolute deviation from the mean (ignoring any NaN, as the built-in max() did)
+    deviation = np.abs(population[:, columns(current_step - steps_back)] - average_population[:, np.newaxis])
+    max_abs_var = deviation[:, 0]
+    if back_steps > 1:
+        max_abs_var = np.where(np.isnan(max_abs_var), max_abs_var,
+                               np.fmax(max_abs_var, np.fmax.reduce(deviation[:, 1:], axis=1)))
+
+    # did the occupancy change between consecutive steps?
+    new_pop = population[:, columns(current_step - steps_back[1:])]
+    old_pop = population[:, columns(current_step - steps_back[1:] + 1)]
+    min_pop = minimum_population_size[:, np.newaxis]
+    num_occupancy_changes = np.sum(((new_pop < min_pop) & (min_pop <= old_pop)) |
+                                   ((new_pop >= min_pop) & (min_pop > old_pop)), axis=1)
+
+    # periodicity check: n is a possible period (only checked if the history is sufficiently long for the 3N check)
+    # if X_{n-M} ~ X_{n}, but we only record it if we can confirm:
+    # X_{n-3M} and X_{n-2M} ~ X_{n}
+    # X_{n-3M-1} and X_{n-2M-1} ~ X_{n-1}
+    # X_{n-3M-2} and X_{n-2M-2} ~ X_{n-2}
+    # X_{n-3M-3} and X_{n-2M-3} ~ X_{n-3}
+    # and so on for 10 steps, where "~" is to within the strong, medium and weak epsilons in turn. The period recorded
+    # for each epsilon is the smallest that is confirmed (or zero if none).
+    period_epsilon = {}
+    for strength, minimum_epsilon, scaling in [("strong", 0.000000000001, 0.0001), ("med", 0.00000001, 0.001),
+                                               ("weak", 0.0001, 0.01)]:
+        scaled_epsilon = st_dev_population * scaling
+        period_epsilon[strength] = np.where(scaled_epsilon > minimum_epsilon, scaled_epsilon, minimum_epsilon)
+    period = {strength: np.zeros(num_local_pops, dtype=int) for strength in period_epsilon}
+    possible_periods = steps_back[1:]
+    is_candidate = (history_length[:, np.newaxis] >= 3 * possible_periods + 10) & (np.abs(
+        population[:, columns(current_step - possible_periods)] - current_population[:, np.newaxis])
+        < period_epsilon["weak"][:, np.newaxis])
+    reverse_steps = np.arange(10)
+    block_size = 64
+    for block_start in range(0, len(possible_periods), block_size):
+        # only the local populations for which some period has not yet been found need to be checked further
+        is_unresolved = (period["strong"] == 0) | (period["med"] == 0) | (period["weak"] == 0)
+        row, index = np.nonzero(is_candidate[:, block_start: block_start + block_size] & is_unresolved[:, np.newaxis])
+        if len(row) == 0:
+            continue
+        n = possible_periods[block_start + index]
+        earlier_steps = current_step - (np.array([1, 2])[:, np.newaxis] * n[np.newaxis, :])[:, :, np.newaxis] \
+            - reverse_steps
+        divergence = np.abs(population[row[np.newaxis, :, np.newaxis], columns(earlier_steps)]
+                            - population[row[np.newaxis, :, np.newaxis], columns(current_step - reverse_steps)])
+        max_divergence = np.fmax(0.0, np.fmax.reduce(divergence.reshape(2, len(row), 10).transpose(1, 0, 2).reshape(
+            len(row), 20), axis=1))
+        for strength, epsilon in period_epsilon.items():
+            is_confirmed = max_divergence < epsilon[row]
+            # the candidates are in order of increasing n for each local population, so take the first confirmed
+            confirmed_row, first = np.unique(row[is_confirmed], return_index=True)
+            confirmed_n = n[is_confirmed][first]
+            is_new = period[strength][confirmed_row] == 0
+            period[strength][confirmed_row[is_new]] = confirmed_n[is_new]
+
+    # Average population change due to the internal ODE/Difference Equation (including possibly distant foraging by
+    # this species and distant predation upon this species) AND direct impact (i.e. everything except dispersal), and
+    # average population emigrated, immigrated and net immigration during dispersal
+    internal_change = histories["internal_change_history"][:, recent]
+    population_leave = histories["population_leave_history"][:, recent]
+    population_enter = histories["population_enter_history"][:, recent]
+    average_internal_change = row_sums(internal_change) / back_steps
+    average_population_leave = row_sums(population_leave) / back_steps
+    average_population_enter = row_sums(population_enter) / back_steps
+    average_net_enter = row_sums(population_enter - population_leave) / back_steps
+    # Average net internal (see description in update_local_nets())
+    total_internal_change = row_sums(np.abs(internal_change))
+    total_change = total_internal_change + row_sums(np.abs(population_enter - population_leave))
+
+    # Average sink detection and source detection:
+    # Sink = proportion of of net positive population growth from migration vs. other net processes
+    # Source = proportion of population that dispersed when actually given the chance
+    # These are summed in turn from the current step backwards.
+    this_steps = columns(current_step - steps_back)
+    net_enter = histories["population_enter_history"][:, this_steps] - \
+        histories["population_leave_history"][:, this_steps]
+    internal_change = histories["internal_change_history"][:, this_steps]
+    potential_dispersal = histories["potential_dispersal_history"][:, this_steps]
+    positive_net_enter = np.where(net_enter > 0.0, net_enter, 0.0)
+    positive_net_leave = np.where(-net_enter > 0.0, -net_enter, 0.0)
+    positive_change = positive_net_enter + np.where(internal_change > 0.0, internal_change, 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sink_change = np.where(positive_change > 0.0, positive_net_enter / positive_change, 0.0)
+        source_change = np.where(potential_dispersal == 0.0, 0.0, positive_net_leave / potential_dispersal)
+    # (cumulative sums add in sequence, as the running totals did)
+    zero_column = np.zeros((num_local_pops, 1))
+    sum_sink_change = np.cumsum(np.hstack([zero_column, sink_change]), axis=1)[:, -1]
+    sum_source_change = np.cumsum(np.hstack([zero_column, source_change]), axis=1)[:, -1]
+    is_any_zero_potential = np.any(potential_dispersal == 0.0, axis=1)
+
+    for row, local_pop in enumerate(local_pop_list):
+        local_pop.average_population = average_population[row]
+        local_pop.st_dev_population = st_dev_population[row]
+        local_pop.population_period_strong = int(period["strong"][row])
+        local_pop.population_period_med = int(period["med"][row])
+        local_pop.population_period_weak = int(period["weak"][row])
+        local_pop.max_abs_population = max_abs_var[row]
+        if back_steps > 1:
+            local_pop.recent_occupancy_change_frequency = int(num_occupancy_changes[row]) / (back_steps - 1.0)
+        else:
+            local_pop.recent_occupancy_change_frequency = 0.0
+        local_pop.average_internal_change = average_internal_change[row]
+        local_pop.average_population_leave = average_population_leave[row]
+        local_pop.average_population_enter = average_population_enter[row]
+        local_pop.average_net_enter = average_net_enter[row]
+        if total_change[row] == 0.0:
+            local_pop.average_net_internal = 0.0
+        else:
+            local_pop.average_net_internal = total_internal_change[row] / total_change[row]
+        if is_any_zero_potential[row]:
+            local_pop.source = 0.0
+        local_pop.average_sink = (1.0 / back_steps) * float(sum_sink_change[row])
+        local_pop.average_source = (1.0 / back_steps) * float(sum_source_change[row])
+
+
+# ------------------------ HURST EXPONENTS ------------------------ #
+
+def build_hurst_exponents_of_populations(local_pop_list, num_workers=1):
+    # Sets the population_history_hurst_exponent of each local population to (H, c, [window sizes, mean R/S values]),
+    # or to None if its history is unsuitable (shorter than 100 steps, containing NaN, or constant). The local
+    # populations are grouped by the length of their histories, each group is computed as one array, and the rows may
+    # be divided between num_workers (forked) worker processes.
+    length_groups = {}
+    for local_pop in local_pop_list:
+        length_groups.setdefault(len(local_pop.population_history), []).append(local_pop)
+    for group in length_groups.values():
+        series_array = np.array([np.asarray(x.population_history, dtype=float) for x in group])
+        if num_workers > 1 and len(group) > 1 and "fork" in multiprocessing.get_all_start_methods():
+            chunks = np.array_split(series_array, min(num_workers, len(group)))
+            with multiprocessing.get_context("fork").Pool(processes=len(chunks)) as pool:
+                results = [y for chunk_result in pool.map(hurst_exponents, chunks) for y in chunk_result]
+        else:
+            results = hurst_exponents(series_array=series_array)
+        for local_pop, result in zip(group, results):
+            local_pop.population_history_hurst_exponent = result
+
+
+def hurst_exponents(series_array, min_window=10):
+    # Rescaled-range (R/S) estimate of the Hurst exponent of each row of a (series x steps) array, treating the rows
+    # as random walks (the "simplified" estimate): each is cut into consecutive non-overlapping windows of a range of
+    # sizes, and in each window R is the range of the values and S the sample standard deviation of the increments.
+    # The mean R/S of the windows of each size (skipping those with zero R or S) is then fitted to
+    # log10(R/S) = H * log10(size) + log10(c).
+    num_series, length = series_array.shape
+    if length < 100:
+        return [None] * num_series
+    window_sizes = [int(10 ** x) for x in np.arange(math.log10(min_window), math.log10(length - 1), 0.25)]
+    window_sizes.append(length)
+    mean_rs = np.zeros((num_series, len(window_sizes)))
+    is_suitable = ~np.any(np.isnan(series_array), axis=1)
+    with np.errstate(all="ignore"):
+        for size_index, window_size in enumerate(window_sizes):
+            windows = series_array[:, :(length // window_size) * window_size].reshape(num_series, -1, window_size)
+            value_range = np.max(windows, axis=2) - np.min(windows, axis=2)
+            st_dev = np.std(np.diff(windows, axis=2), axis=2, ddof=1)
+            is_defined = (value_range != 0.0) & (st_dev != 0.0)
+            num_defined = np.sum(is_defined, axis=1)
+            # a series with no windows of defined R/S (e.g. a constant series) has no Hurst exponent
+            is_suitable = is_suitable & (num_defined > 0)
+            mean_rs[:, size_index] = np.sum(np.where(is_defined, value_range / st_dev, 0.0), axis=1) / num_defined
+        # least-squares fit of every row at once
+        log_size = np.log10(window_sizes)
+        log_rs = np.log10(mean_rs)
+        is_suitable = is_suitable & np.all(np.isfinite(log_rs), axis=1)
+        centred_log_size = log_size - np.mean(log_size)
+        exponent = np.sum(centred_log_size * (log_rs - np.mean(log_rs, axis=1)[:, np.newaxis]), axis=1) / np.sum(
+            centred_log_size ** 2)
+        constant = 10 ** (np.mean(log_rs, axis=1) - exponent * np.mean(log_size))
+    return [(float(exponent[row]), float(constant[row]), [list(window_sizes), mean_rs[row].tolist()])
+            if is_suitable[row] else None for row in range(num_series)]
+
+
 # ------------------------ CLASS: LOCAL POPULATION ------------------------ #
 
 class Local_population:
 
-    def __init__(self, species, patch, parameters, current_patch_list=None):
+    def __init__(self, species, patch, parameters, current_patch_list=None, history_store=None,
+                 ode_recording_store=None):
         self.species = species
         self.patch_num = patch.number
         self.parameters = parameters
         self.name = species.name
-        self.ode_recording = {}
+        self.ode_recording_store = ode_recording_store
+        if ode_recording_store is None:
+            self.ode_recording = {}
+        else:
+            # the recordings are instead held in the shared table
+            self.ode_recording = Ode_recording_view(store=ode_recording_store, patch_num=self.patch_num,
+                                                    species_name=self.name)
         self.occupancy = 0
         self.population = 0.0
         self.set_initial_population(patch, current_patch_list=current_patch_list)
@@ -71,7 +328,9 @@ class Local_population:
             "g3": {},
         }
         self.leaving_array = None
+        self.leaving_flows = None  # (destination patch numbers, amounts) of the latest dispersal
         self.interacting_populations = []
+        self.foraging_scores = {}  # (foraging score, path length) to each patch, see build_interacting_populations_list()
         self.population_history = []
         self.population_leave = 0.0
         self.population_enter = 0.0
@@ -85,6 +344,12 @@ class Local_population:
         self.population_leave_history = []
         self.potential_dispersal = 0.0  # record temporarily during the dispersal() sub-step
         self.potential_dispersal_history = []  # then update this list at the same time as the other histories
+        self.history_store = history_store
+        if history_store is not None:
+            # the histories are instead held in the shared array-backed store
+            self.population_history, self.internal_change_history, self.population_leave_history, \
+                self.population_enter_history, self.potential_dispersal_history = history_store.views(
+                    patch_num=self.patch_num, species_name=self.name)
         self.record_population_history()  # need this so that the initial population is recorded
         self.population_history_hurst_exponent = 0.0
         self.average_population = 0.0
@@ -180,11 +445,16 @@ class Local_population:
         self.carrying_capacity = self.species.growth_para["CARRYING_CAPACITY"] * patch.size
 
     def record_population_history(self):
-        self.population_history.append(self.population)
-        self.internal_change_history.append(self.internal_change)
-        self.population_leave_history.append(self.population_leave)
-        self.population_enter_history.append(self.population_enter)
-        self.potential_dispersal_history.append(self.potential_dispersal)
+        if self.history_store is not None:
+            self.history_store.record(patch_num=self.patch_num, species_name=self.name,
+                                      values=[self.population, self.internal_change, self.population_leave,
+                                              self.population_enter, self.potential_dispersal])
+        else:
+            self.population_history.append(self.population)
+            self.internal_change_history.append(self.internal_change)
+            self.population_leave_history.append(self.population_leave)
+            self.population_enter_history.append(self.population_enter)
+            self.potential_dispersal_history.append(self.potential_dispersal)
 
     def growth_malthusian(self, r_value, patch_competitors, alpha):
         r_ = r_value * self.r_mod
@@ -249,6 +519,7 @@ class Local_population:
             raise Exception("Unknown.")
 
     def foraging(self, this_patch_species_feeding):
+        # Note that population_dynamics.foraging_caller() uses the equivalent whole-system foraging_kernel() instead
         # -------------------------- PREDATION -------------------------- #
         # Predation by this population
         if self.species.current_prey_dict is not None and len(self.species.current_prey_dict) > 0:
@@ -295,8 +566,7 @@ class Local_population:
         self.direct_impact_value = direct_impact
         self.current_temp_change += direct_impact
 
-    def growth(self, parameters, time, patch_competitors, alpha):
-        # ------------------- REPRODUCTION / MORTALITY ------------------- #
+    def current_growth_r_value(self, time):
         # Retrieve current R-value
         r_value = self.species.current_r_value
 
@@ -306,6 +576,12 @@ class Local_population:
             self.set_current_vector_offset(time=time, vector_statement="GROWTH")
             year_time = np.mod(time + self.current_growth_vector_offset, self.species.growth_annual_duration)
             r_value = temporal_function(self.species.growth_para["R"], year_time)
+        return r_value
+
+    def growth(self, parameters, time, patch_competitors, alpha):
+        # ------------------- REPRODUCTION / MORTALITY ------------------- #
+        # Note that population_dynamics.growth_caller() uses the equivalent whole-system growth_kernel() instead
+        r_value = self.current_growth_r_value(time=time)
 
         # Final growth function (accounting for reduced r due to predation, and including mortality which is impacted
         # by carrying capacity if relevant).
@@ -336,6 +612,9 @@ class Local_population:
 
     def ode_recordings(self, time, step):
         # permanently record all aspects for error-checking
+        if self.ode_recording_store is not None:
+            self.ode_recording_store.record(local_pop=self, time=time, step=step)
+            return
         self.ode_recording[step] = {
             "time": time,
             "new_population": self.population,
@@ -529,110 +808,8 @@ class Local_population:
         # Can be called at any step to calculate the recent averages of population changes that are being stored in
         # full arrays of the history (but it would be needlessly inefficient to calculate them every time-step, so we
         # only call this in anticipation of upcoming plots - i.e. mainly at the end of the simulation)
-        #
-        # Mean and standard deviation of recent population history
-        self.average_population = np.sum(self.population_history[current_step - back_steps: current_step]) / back_steps
-        self.st_dev_population = np.std(self.population_history[current_step - back_steps: current_step])
-
-        # Recent variations in the local population - periodicity, maximum absolute variation, occupancy change:
-        period_strong = 0
-        period_med = 0
-        period_weak = 0
-        period_epsilon_strong = max(0.000000000001, self.st_dev_population * 0.0001)
-        period_epsilon_med = max(0.00000001, self.st_dev_population * 0.001)
-        period_epsilon_weak = max(0.0001, self.st_dev_population * 0.01)
-        max_abs_var = np.abs(self.population_history[current_step] - self.average_population)
-        num_occupancy_changes = 0
-        min_pop = self.species.minimum_population_size
-        for n in range(1, back_steps):
-            # did the occupancy change?
-            new_pop = self.population_history[current_step - n]
-            old_pop = self.population_history[current_step - n + 1]
-            if (new_pop < min_pop <= old_pop) or (new_pop >= min_pop > old_pop):
-                num_occupancy_changes += 1
-            # update greatest absolute deviation from the mean
-            max_abs_var = max(max_abs_var, np.abs(self.population_history[current_step - n] - self.average_population))
-            # periodicity check
-            # n is possible period
-            if (period_strong == 0 or period_weak == 0 or period_med == 0) and len(
-                    self.population_history) >= 3 * n + 10:
-                # only check if vector sufficiently long for 3N check
-                if abs(self.population_history[current_step - n] -
-                       self.population_history[current_step]) < period_epsilon_weak:
-                    # if we think we have a period M (that is X_{n-M} ~ X_{n}), only record it if we can confirm:
-                    # X_{n-3M} and X_{n-2M} ~ X_{n}
-                    # X_{n-3M-1} and X_{n-2M-1} ~ X_{n-1}
-                    # X_{n-3M-2} and X_{n-2M-2} ~ X_{n-2}
-                    # X_{n-3M-3} and X_{n-2M-3} ~ X_{n-3}
-                    max_divergence = 0.0
-                    for reverse_period in range(3):  # -M, -2M, -3M
-                        for reverse_step in range(10):  # -0, -1, -2, -3, ..., -9
-                            max_divergence = max(max_divergence, abs(
-                                self.population_history[current_step - reverse_period * n - reverse_step] -
-                                self.population_history[current_step - reverse_step]))
-                    if period_weak == 0 and max_divergence < period_epsilon_weak:
-                        period_weak = n
-                    if period_med == 0 and max_divergence < period_epsilon_med:
-                        period_med = n
-                    if period_strong == 0 and max_divergence < period_epsilon_strong:
-                        period_strong = n
-        self.population_period_strong = period_strong
-        self.population_period_med = period_med
-        self.population_period_weak = period_weak
-        self.max_abs_population = max_abs_var
-        if back_steps > 1:
-            self.recent_occupancy_change_frequency = num_occupancy_changes / (back_steps - 1.0)
-        else:
-            self.recent_occupancy_change_frequency = 0.0
-
-        # Average population change due to the internal ODE/Difference Equation (including possibly distant foraging by
-        # this species and distant predation upon this species) AND direct impact (i.e. everything except dispersal):
-        self.average_internal_change = np.sum(
-            self.internal_change_history[current_step - back_steps: current_step]) / back_steps
-        # Average population emigrated during dispersal
-        self.average_population_leave = np.sum(
-            self.population_leave_history[current_step - back_steps: current_step]) / back_steps
-        # Average population immigrated during dispersal
-        self.average_population_enter = np.sum(
-            self.population_enter_history[current_step - back_steps: current_step]) / back_steps
-        # Average net immigration during dispersal
-        self.average_net_enter = np.sum(
-            np.array(self.population_enter_history[current_step - back_steps: current_step]) -
-            np.array(self.population_leave_history[current_step - back_steps: current_step])) / back_steps
-        # Average net internal (see description below)
-        total_change = np.sum(
-            np.abs(self.internal_change_history[current_step - back_steps: current_step])) + np.sum(
-            np.abs(np.array(self.population_enter_history[current_step - back_steps: current_step]) -
-                   np.array(self.population_leave_history[current_step - back_steps: current_step])))
-        if total_change == 0.0:
-            self.average_net_internal = 0.0
-        else:
-            self.average_net_internal = np.sum(np.abs(self.internal_change_history[
-                                                      current_step - back_steps: current_step])) / total_change
-        # Average sink detection and source detection:
-        # Sink = proportion of of net positive population growth from migration vs. other net processes
-        # Source = proportion of population that dispersed when actually given the chance
-        sum_sink_change = 0.0
-        sum_source_change = 0.0
-
-        for n in range(back_steps):
-            this_step = current_step - n
-
-            positive_change = max(0.0, self.population_enter_history[this_step] - self.population_leave_history[
-                this_step]) + max(0.0, self.internal_change_history[this_step])
-
-            if positive_change > 0.0:
-                sum_sink_change += max(0.0, self.population_enter_history[this_step] - self.population_leave_history[
-                    this_step]) / positive_change
-
-            if self.potential_dispersal_history[this_step] == 0.0:
-                self.source = 0.0
-            else:
-                sum_source_change += max(0.0, self.population_leave_history[this_step] - self.population_enter_history[
-                    this_step]) / self.potential_dispersal_history[this_step]
-
-        self.average_sink = (1.0 / back_steps) * sum_sink_change
-        self.average_source = (1.0 / back_steps) * sum_source_change
+        build_recent_time_averages_of_populations(local_pop_list=[self], current_step=current_step,
+                                                  back_steps=back_steps)
 
     def update_local_nets(self):
         # occupancy of patch
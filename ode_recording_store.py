@@ -0,0 +1,153 @@
+from collections.abc import Mapping
+import numpy as np
+
+
+# Store of the ODE recordings (main_para["IS_ODE_RECORDINGS"]) of the local populations: the details of each iteration
+# of the ODE that Local_population.ode_recordings() records for error-checking.
+#
+# Rather than a nested dictionary per local population per step, each recording is one row of a pre-allocated numeric
+# table with the fixed ODE_RECORDING_COLUMNS (with NaN for any g-values that were not reached), keyed by the step,
+# patch number and species column of the row. The per-interaction values of the kills and killed dictionaries are held
+# separately in a ragged buffer, in which the entries of each row are contiguous and located by its kill_span (start,
+# count). Each entry holds the g-stage, whether it is a "killed" (rather than "kills") value, the value and, for the
+# (value, effort) tuples of kills["g0"], ["g1"] and ["g2"], the effort (otherwise NaN).
+#
+# Recording may be restricted to chosen patch numbers, species names and (first, last) windows of steps (inclusive),
+# each None for all. Each local population holds an Ode_recording_view in place of its ode_recording dictionary, which
+# reconstructs the dictionary of a step (e.g. for the JSON output) from only that row, found through the index of the
+# rows of each (patch number, species column) that is kept as they are recorded.
+
+ODE_RECORDING_COLUMNS = ["time", "new_population", "r_value", "r_mod", "r_final", "l_value", "k_value", "competitors",
+                         "local_growth", "direct_impact", "prey_gain", "predation_loss", "g0", "g1", "g2", "g3"]
+G_STAGES = ["g0", "g1", "g2", "g3"]
+
+
+class Ode_recording_store:
+
+    def __init__(self, num_steps, num_patches, species_list, patch_nums=None, species_names=None, step_windows=None,
+                 dtype="float64"):
+        self.species_column = {species.name: column for column, species in enumerate(species_list)}
+        self.patch_nums = None if patch_nums is None else set(patch_nums)
+        self.species_names = None if species_names is None else set(species_names)
+        self.step_windows = None if step_windows is None else [tuple(x) for x in step_windows]
+        for window in self.step_windows or []:
+            if len(window) != 2 or window[0] > window[1]:
+                raise Exception(f"ODE recording step window {window} should be (first step, last step).")
+
+        # pre-allocate for every selected local population at every selected step
+        num_local_pops = (num_patches if patch_nums is None else len(self.patch_nums)) * \
+            (len(species_list) if species_names is None else len(self.species_names))
+        num_recorded_steps = sum(self.is_step_recorded(step) for step in range(num_steps))
+        capacity = max(1, num_local_pops * num_recorded_steps)
+        self.num_rows = 0
+        self.table = np.zeros((capacity, len(ODE_RECORDING_COLUMNS)), dtype=dtype)
+        self.step = np.zeros(capacity, dtype=int)
+        self.patch_num = np.zeros(capacity, dtype=int)
+        self.column = np.zeros(capacity, dtype=int)
+        self.kill_span = np.zeros((capacity, 2), dtype=int)
+        self.row_index = {}  # {(patch number, species column): {step: row}}
+
+        # ragged buffer of the kills and killed values
+        self.num_kills = 0
+        self.kill_stage = np.zeros(capacity, dtype=np.int8)
+        self.kill_is_killed = np.zeros(capacity, dtype=bool)
+        self.kill_value = np.zeros(capacity, dtype=dtype)
+        self.kill_effort = np.zeros(capacity, dtype=dtype)
+
+    def is_step_recorded(self, step):
+        return self.step_windows is None or any(first <= step <= last for first, last in self.step_windows)
+
+    def is_recorded(self, patch_num, species_name, step):
+        return (self.patch_nums is None or patch_num in self.patch_nums) and (
+                self.species_names is None or species_name in self.species_names) and self.is_step_recorded(step)
+
+    def record(self, local_pop, time, step):
+        # add a row for the current ODE details of a local population, if it is selected
+        if not self.is_recorded(patch_num=local_pop.patch_num, species_name=local_pop.name, step=step):
+            return
+        if self.num_rows == self.table.shape[0]:
+            # the table should already be large enough, but is grown (by doubling) if not
+            self.table, self.step, self.patch_num, self.column, self.kill_span = [
+                np.concatenate([x, np.zeros_like(x)]) for x in [self.table, self.step, self.patch_num, self.column,
+                                                                 self.kill_span]]
+        row = self.num_rows
+        self.table[row, :] = [time, local_pop.population, local_pop.r_value, local_pop.r_mod, local_pop.r_final,
+                              local_pop.l_final, local_pop.k_final, local_pop.competitors_final, local_pop.local_growth,
+                              local_pop.direct_impact_value, local_pop.prey_gain, local_pop.predation_loss] + [
+            local_pop.g_values.get(x, np.nan) for x in G_STAGES]
+        self.step[row] = step
+        self.patch_num[row] = local_pop.patch_num
+        self.column[row] = self.species_column[local_pop.name]
+
+        entries = []
+        for is_killed, kill_dict in [(False, local_pop.kills), (True, local_pop.killed)]:
+            for stage, stage_name in enumerate(G_STAGES):
+                for value in kill_dict.get(stage_name, {}).values():
+                    if isinstance(value, tuple):
+                        entries.append((stage, is_killed, value[0], value[1]))
+                    else:
+                        entries.append((stage, is_killed, value, np.nan))
+        start = self.num_kills
+        if start + len(entries) > len(self.kill_value):
+            extra = max(start + len(entries), 2 * len(self.kill_value)) - len(self.kill_value)
+            self.kill_stage, self.kill_is_killed, self.kill_value, self.kill_effort = [
+                np.concatenate([x, np.zeros(extra, dtype=x.dtype)]) for x in [
+                    self.kill_stage, self.kill_is_killed, self.kill_value, self.kill_effort]]
+        if len(entries) > 0:
+            stage, is_killed, value, effort = zip(*entries)
+            self.kill_stage[start: start + len(entries)] = stage
+            self.kill_is_killed[start: start + len(entries)] = is_killed
+            self.kill_value[start: start + len(entries)] = value
+            self.kill_effort[start: start + len(entries)] = effort
+        self.kill_span[row, :] = [start, len(entries)]
+        self.num_kills += len(entries)
+        self.num_rows += 1
+        self.row_index.setdefault((local_pop.patch_num, self.species_column[local_pop.name]), {})[step] = row
+
+    def rows(self, patch_num, species_name):
+        # {step: row} of the table for a local population, in the order in which they were recorded
+        return self.row_index.get((patch_num, self.species_column[species_name]), {})
+
+    def recording(self, row):
+        # the ODE recording of a single row in the original form of a dictionary
+        values = dict(zip(ODE_RECORDING_COLUMNS, self.table[row].tolist()))
+        recording = {x: values[x] for x in ODE_RECORDING_COLUMNS[:12]}
+        recording["g_values"] = {x: values[x] for x in G_STAGES if not np.isnan(values[x])}
+        recording["kills"] = {x: [] for x in G_STAGES}
+        recording["killed"] = {x: [] for x in G_STAGES}
+        start, count = self.kill_span[row].tolist()
+        for entry in range(start, start + count):
+            stage_name = G_STAGES[self.kill_stage[entry]]
+            value = float(self.kill_value[entry])
+            if self.kill_is_killed[entry]:
+                recording["killed"][stage_name].append(value)
+            elif np.isnan(self.kill_effort[entry]):
+                recording["kills"][stage_name].append(value)
+            else:
+                recording["kills"][stage_name].append((value, float(self.kill_effort[entry])))
+        return recording
+
+    def recordings(self, patch_num, species_name):
+        # the ODE recordings of a local population in the original form of a dictionary of dictionaries keyed by step
+        return {step: self.recording(row=row) for step, row in self.rows(patch_num=patch_num,
+                                                                        species_name=species_name).items()}
+
+
+class Ode_recording_view(Mapping):
+
+    # read-only view of the ODE recordings of one local population in an Ode_recording_store, in which the dictionary
+    # of a step is only built from its row when it is accessed
+    def __init__(self, store, patch_num, species_name):
+        self.store = store
+        self.patch_num = patch_num
+        self.species_name = species_name
+
+    def __getitem__(self, step):
+        return self.store.recording(row=self.store.rows(patch_num=self.patch_num,
+                                                        species_name=self.species_name)[step])
+
+    def __iter__(self):
+        return iter(self.store.rows(patch_num=self.patch_num, species_name=self.species_name))
+
+    def __len__(self):
+        return len(self.store.rows(patch_num=self.patch_num, species_name=self.species_name))
@@ -79,15 +79,35 @@ master_para = {
             "ECO_PRIORITIES": {0: {'foraging', 'direct_impact', 'growth', 'dispersal'}, 1: {}, 2: {}, 3: {}},
             # What is the order or concurrence in which foraging (predation), growth (reproduction and mortality),
             # direct impact, and dispersal should be resolved?
+            "IS_POPULATION_ARRAY_ENGINE": False,  # hold local population states in (patch, species) arrays for the
+            # update_populations() step rather than iterating over every Local_population object
+            "IS_HISTORY_STORE": False,  # hold the population histories of all local populations in one pre-allocated
+            # (steps, patches, species, channels) array rather than in five growing lists per local population
+            "HISTORY_STORE_DTYPE": "float64",  # or "float32" to halve the memory of the store (at reduced precision)
+            "HISTORY_TRANSIENT_POLICY": {  # how each history is recorded during the transient (requires the store):
+                # "full", an integer k (every k-th step), "summary" (running min/mean/max only, saved in the
+                # local_pop_csv/*_transient.csv files) or "none". Steps that are not recorded read as NaN, e.g. in
+                # the time-series plots and the Hurst exponent. The final NUM_RECORD_STEPS + 10 transient steps are
+                # always kept, as the periodicity checks look back that far.
+                "population": "full",
+                "internal_change": "full",
+                "population_leave": "full",
+                "population_enter": "full",
+                "potential_dispersal": "full",
+            },
 
-            "MAX_CENTRALITY_MEASURE": 10,  # Max amount of NxN matrix multiplication when determining patch.centrality
+            "MAX_CENTRALITY_MEASURE": 10,  # Max path length (steps) counted when determining patch.centrality
             "ASSUMED_MAX_PATH_LENGTH": 3,  # used for shortcuts in rebuilding paths AND multiplying adjacency matrix!
             # THIS VALUE NEEDS TO BE AT LEAST EQUAL TO THE MAXIMUM MAX_DISPERSAL_PATH_LENGTH ACROSS ALL SPECIES!!!
-            # and IF YOU CHANGE THIS then "IS_LOAD_ADJ_VARIABLES" BELOW MUST BE "FALSE" AS WE NEED TO REBUILD THEM!!!
             #
-            # Note that saving the adjacency variables does seem to be extremely slow in DEBUG mode.
+            # The saved adjacency variables are keyed by a hash of the adjacency matrix, patch sizes, habitat types,
+            # traversal scores and ASSUMED_MAX_PATH_LENGTH, so they are only loaded if all of these are unchanged (and
+            # are otherwise rebuilt and saved under the new key). It is therefore safe to leave both of these on.
             "IS_SAVE_ADJ_VARIABLES": False,  # Save patch.stepping_stone_list,.species_movement_scores,.adjacency_lists?
             "IS_LOAD_ADJ_VARIABLES": False,  # Load patch.stepping_stone_list,.species_movement_scores,.adjacency_lists?
+            "IS_ALL_PAIRS_PATHING": True,  # build paths for all patches in one batched call per species (else per-patch)
+            "INTERACTION_SCORING_WORKERS": 1,  # worker processes for the foraging scores when (re)building the lists of
+            # interacting populations (1 = no pool; pools are forked, so are unavailable on platforms without fork)
 
             # ------------- Generation data - needs to be set before spatial habitat generation ------------- #
             "SPECIES_TYPES": {
@@ -141,8 +161,9 @@ master_para = {
             # if the following is None then probabilities are treated as uniform when combined with auto-correlation
             "INITIAL_HABITAT_BASE_PROBABILITIES": None,
 
-            # do we load the hurst module and attempt to calculate Hurst exponents?
+            # do we attempt to calculate (rescaled-range) Hurst exponents of the local population histories?
             "IS_CALCULATE_HURST": False,
+            "HURST_WORKERS": 1,  # worker processes for the Hurst exponents (1 = no pool; pools are forked)
 
             # When conducting distance metric, network and complexity analyses that include linear regressions, do we
             # record the vectors of values, to reconstruct the raw data scatter plots against the fitted models later?
@@ -177,7 +198,12 @@ master_para = {
             # note that this requires IS_SAVE_PATCH_DATA to be true first.
             "IS_ODE_RECORDINGS": False,  # do we save the history of each iteration of the ODE details as an attribute
             # of each local population object (it would then be printed as part of IS_SAVE_PATCH_LOCAL_POP_DATA)?
-            # This is memory-intensive and mainly intended for debugging.
+            # This is mainly intended for debugging. The details are held in a pre-allocated table of one row per local
+            # population per step, which may be restricted to the following (None for all):
+            "ODE_RECORDING_PATCHES": None,  # list of the patch numbers to record
+            "ODE_RECORDING_SPECIES": None,  # list of the species names to record
+            "ODE_RECORDING_STEP_WINDOWS": None,  # list of (first step, last step) windows (inclusive) to record
+            "ODE_RECORDING_DTYPE": "float64",  # numpy dtype of the table (e.g. "float32" to halve its memory)
             "IS_SAVE_DISTANCE_METRICS": False,  # produce JSON of species and community distribution analysis.
             "IS_PICKLE_SAVE": False,  # save the Python objects.
             "IS_SAVE_CURRENT_MOVE_SCORES": False,  # writes the final movement scores to the simulation-specific folder.
@@ -29,6 +29,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -63,6 +64,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -74,6 +76,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -84,6 +87,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -94,6 +98,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -104,6 +109,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -115,6 +121,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -125,6 +132,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -166,6 +174,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -179,6 +188,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -190,6 +200,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -207,6 +218,7 @@ default_species = {
                 "amplitude": None,
                 "phase_shift": None,
                 "vertical_shift": None,
+                "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                 "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
             },
@@ -308,6 +320,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -341,6 +354,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -352,6 +366,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -362,6 +377,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -372,6 +388,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -382,6 +399,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                 },
                 "PREDATION_EFFICIENCY": {
@@ -391,6 +409,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -401,6 +420,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -427,6 +447,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -438,6 +459,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -449,6 +471,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -460,6 +483,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -536,6 +560,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -569,6 +594,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -580,6 +606,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -590,6 +617,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -600,6 +628,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -610,6 +639,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -621,6 +651,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -631,6 +662,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -657,6 +689,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -668,6 +701,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -679,6 +713,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -690,6 +725,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -767,6 +803,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -800,6 +837,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -811,6 +849,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -821,6 +860,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -831,6 +871,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -841,6 +882,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -852,6 +894,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -862,6 +905,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -888,6 +932,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -899,6 +944,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -910,6 +956,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -921,6 +968,7 @@ ARTEMIS_01_MASTER = {
                     "amplitude": None,
                     "phase_shift": None,
                     "vertical_shift": None,
+                    "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                     "vector_exp": None,  # [value_0, value_1, ..., value_period]
                     "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                 },
@@ -1004,6 +1052,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": [2.0 for x0 in range(270)] + [0.0 for x1 in range(90)],
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1037,6 +1086,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1048,6 +1098,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1058,6 +1109,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1068,6 +1120,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1078,6 +1131,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1088,6 +1142,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1098,6 +1153,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1125,6 +1181,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1136,6 +1193,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1147,6 +1205,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1158,6 +1217,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1240,6 +1300,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": [0.0 for y in range(45)] + [4.0 for y0 in range(1)] + [0.0 for y1 in range(314)],
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1272,6 +1333,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1283,6 +1345,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1293,6 +1356,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1303,6 +1367,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1313,6 +1378,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1323,6 +1389,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1333,6 +1400,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1360,6 +1428,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1371,6 +1440,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1382,6 +1452,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
@@ -1393,6 +1464,7 @@ WATER_VOLE_MINK_MASTER = {
                         "amplitude": None,
                         "phase_shift": None,
                         "vertical_shift": None,
+                        "quantisation": None,  # sine only: snap values to multiples of this (None for exact)
                         "vector_exp": None,  # [value_0, value_1, ..., value_period]
                         "vector_imp": None,  # { 0 : value_0, ... , lower_time_limit_N : value_N }
                     },
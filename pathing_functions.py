@@ -0,0 +1,478 @@
+import heapq
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+
+# Shortest-path engines used by system_state.build_species_paths_and_adjacency() to determine the species-specific
+# travel costs between patches. The graph for each species is held as CSR-style arrays (indptr, indices, weights) so
+# that each source only needs to look at the actual neighbours of each settled patch.
+
+def build_species_graph(patch_adjacency_matrix, patch_sizes, patch_traversal):
+    # Build the sparse weighted out-neighbour structure for a single species.
+    # An edge from patch v to patch t exists if they are adjacent (ignoring the diagonal self-adjacency) and the
+    # species can enter patch t (i.e. strictly positive habitat traversal score there). The cost of the edge is the
+    # cost of crossing patch v:  patch-size / ( habitat-species-traversal * adjacency-border ).
+    num_patches = np.shape(patch_adjacency_matrix)[0]
+    rows, cols = np.nonzero(patch_adjacency_matrix)  # row-major, so neighbours are in ascending patch order
+    is_edge = (rows != cols) & (patch_traversal[cols] > 0.0)
+    rows = rows[is_edge]
+    cols = cols[is_edge]
+    with np.errstate(divide='ignore'):
+        # a zero traversal score in the departure patch (only possible for the source) gives an infinite cost
+        weights = patch_sizes[rows] / (patch_traversal[rows] * patch_adjacency_matrix[rows, cols])
+    indptr = np.zeros(num_patches + 1, dtype=int)
+    np.cumsum(np.bincount(rows, minlength=num_patches), out=indptr[1:])
+    return {
+        "num_patches": num_patches,
+        "indptr": indptr,
+        "indices": cols,
+        "weights": weights,
+    }
+
+
+def single_source_dijkstra(graph, source):
+    # Heap-based Dijkstra over the sparse species graph.
+    # Ties in tentative cost are resolved in favour of the lowest patch number, and relaxations only replace an
+    # existing route if they are strictly cheaper, so the settlement order and the chosen predecessors are exactly
+    # those of the original dense O(N^2) implementation.
+    num_patches = graph["num_patches"]
+    indptr = graph["indptr"]
+    indices = graph["indices"]
+    weights = graph["weights"]
+
+    cost = np.full(num_patches, np.inf)
+    hops = np.full(num_patches, -1, dtype=int)
+    predecessor = np.full(num_patches, -1, dtype=int)
+    is_settled = np.zeros(num_patches, dtype=bool)
+    settled_order = []
+
+    cost[source] = 0.0
+    hops[source] = 0
+    heap = [(0.0, source)]
+    while len(heap) > 0:
+        this_cost, vertex = heapq.heappop(heap)
+        if is_settled[vertex] or this_cost > cost[vertex]:
+            # stale heap entry
+            continue
+        is_settled[vertex] = True
+        settled_order.append(vertex)
+        for edge in range(indptr[vertex], indptr[vertex + 1]):
+            target = indices[edge]
+            new_cost = this_cost + weights[edge]
+            if new_cost < cost[target]:
+                cost[target] = new_cost
+                hops[target] = hops[vertex] + 1
+                predecessor[target] = vertex
+                if not is_settled[target]:
+                    heapq.heappush(heap, (new_cost, int(target)))
+    return np.asarray(settled_order, dtype=int), cost, hops, predecessor
+
+
+def build_patch_costs(graph, source, settled_order, cost, hops, predecessor, patch_sizes, patch_traversal):
+    # Convert the arrays from the Dijkstra engine into the nested dictionary stored in patch.species_movement_scores:
+    #
+    #   {target: {"routes": {"best": (length, cost, path), length: (cost, path), ...},
+    #             "target_patch_size": ..., "target_patch_traversal": ...}}
+    #
+    # The per-length entries are those found when relaxing from each settled patch in turn, including the
+    # (float('inf'), []) placeholder that is recorded the first time a non-neighbour is considered. Settled patches
+    # are replayed in the same order as they were settled so that keys and values match the dense implementation.
+    num_patches = graph["num_patches"]
+    indptr = graph["indptr"]
+    indices = graph["indices"]
+    weights = graph["weights"]
+
+    routes = [{"routes": {"best": (float('inf'), float('inf'), 0.0, [])}} for _ in range(num_patches)]
+    routes[source]["routes"]["best"] = (0, 0.0, [])  # 0 steps, 0.0 cost, no intermediate steps
+    routes[source]["routes"][0] = (0.0, [])
+
+    best_paths = {}
+    pending_unreachable_entry = set(range(num_patches))
+    for vertex in settled_order:
+        vertex = int(vertex)
+        if vertex == source:
+            best_path = []
+        else:
+            previous = int(predecessor[vertex])
+            best_path = best_paths[previous] + [previous]
+            routes[vertex]["routes"]["best"] = (int(hops[vertex]), float(cost[vertex]), best_path)
+        best_paths[vertex] = best_path
+
+        neighbours = indices[indptr[vertex]: indptr[vertex + 1]]
+        # every patch that is not a valid neighbour receives the (inf, []) entry the first time it is considered
+        if len(pending_unreachable_entry) > 0:
+            still_pending = set(neighbours.tolist())
+            still_pending.add(vertex)
+            for target in pending_unreachable_entry - still_pending:
+                routes[target]["routes"][float('inf')] = (float('inf'), [])
+            pending_unreachable_entry &= still_pending
+
+        # best route for each path length, as found via the best route to this settled patch
+        new_path_length = int(hops[vertex]) + 1
+        for edge in range(indptr[vertex], indptr[vertex + 1]):
+            target = int(indices[edge])
+            new_path_cost = float(cost[vertex] + weights[edge])
+            target_routes = routes[target]["routes"]
+            if new_path_length not in target_routes or new_path_cost < target_routes[new_path_length][0]:
+                target_routes[new_path_length] = (new_path_cost, best_path + [vertex])
+
+    # store the target patch size and traversal score for this species (only absent for an isolated source)
+    for target in range(num_patches):
+        if target != source or len(settled_order) > 1:
+            routes[target]["target_patch_size"] = float(patch_sizes[target])
+            routes[target]["target_patch_traversal"] = float(patch_traversal[target])
+    return {target: routes[target] for target in range(num_patches)}
+
+
+def bounded_hop_costs(graph, max_hops):
+    # Hop-limited (Bellman-Ford style) dynamic program over the sparse species graph.
+    # Returns the dense (num_patches, num_patches, max_hops + 1) tensor whose [source, target, k] element is the cost of
+    # the cheapest route from source to target taking exactly k steps (inf if there is none). Unlike the per-length
+    # entries recorded during the Dijkstra relaxations, these are exact and do not depend on the visitation order.
+    num_patches = graph["num_patches"]
+    indptr = graph["indptr"]
+    indices = graph["indices"]
+    weights = graph["weights"]
+    edge_sources = np.repeat(np.arange(num_patches), np.diff(indptr))
+
+    # group the edges by their target patch so that each step is a single segmented minimum
+    edge_order = np.argsort(indices, kind="stable")
+    edge_sources = edge_sources[edge_order]
+    edge_weights = weights[edge_order]
+    edge_targets, segment_starts = np.unique(indices[edge_order], return_index=True)
+
+    cost_tensor = np.full([num_patches, num_patches, max_hops + 1], float('inf'))
+    cost_tensor[np.arange(num_patches), np.arange(num_patches), 0] = 0.0
+    if len(edge_targets) > 0:
+        for hop in range(1, max_hops + 1):
+            # cost of every (source, edge) combination, then the minimum over the edges arriving at each target
+            candidate_costs = cost_tensor[:, edge_sources, hop - 1] + edge_weights[np.newaxis, :]
+            cost_tensor[:, edge_targets, hop] = np.minimum.reduceat(candidate_costs, segment_starts, axis=1)
+    return cost_tensor
+
+
+def build_species_csr(graph):
+    # scipy CSR matrix of the species graph for the compiled shortest-path routines. Infinite-cost edges (leaving a
+    # zero-traversal patch) can never be part of a finite route so are dropped.
+    num_patches = graph["num_patches"]
+    edge_sources = np.repeat(np.arange(num_patches), np.diff(graph["indptr"]))
+    is_finite = np.isfinite(graph["weights"])
+    return csr_matrix((graph["weights"][is_finite], (edge_sources[is_finite], graph["indices"][is_finite])),
+                      shape=(num_patches, num_patches))
+
+
+def settled_order_from_costs(cost):
+    # the order in which the Dijkstra search settles the reachable patches: increasing cost, ties by patch number
+    return np.argsort(cost, kind="stable")[: np.count_nonzero(np.isfinite(cost))]
+
+
+def all_pairs_costs(graph):
+    # Solve the cheapest travel cost between every pair of patches for a single species in one batched call, by running
+    # the compiled heap Dijkstra from every source over the CSR matrix of the species graph. Each cost is the sum of
+    # the predecessor's cost and the edge weight, exactly as in single_source_dijkstra(), so the costs are identical.
+    return dijkstra(csgraph=build_species_csr(graph=graph), directed=True)
+
+
+def shortest_path_trees(graph, cost_matrix, source_list, block_size=64):
+    # Given the all-pairs costs, recover for each source the same (settled_order, cost, hops, predecessor) arrays that
+    # single_source_dijkstra() would produce, so that build_patch_costs() gives identical dictionaries:
+    # - patches are settled in order of increasing cost, with ties broken by the lowest patch number;
+    # - the predecessor of each patch is the earliest-settled neighbour through which its cheapest cost is achieved;
+    # - costs are then re-accumulated along the predecessor tree in the same order of floating-point additions.
+    # This assumes strictly positive patch sizes (i.e. no zero-cost edges), and that the costs are exactly those of the
+    # Dijkstra relaxations (see all_pairs_costs()), as the tight edges are identified by exact equality: any tolerance
+    # would let an earlier-settled but (by the last bit) dearer route win a near-tie.
+    num_patches = graph["num_patches"]
+    num_sources = len(source_list)
+    source_list = np.asarray(source_list, dtype=int)
+    edge_sources = np.repeat(np.arange(num_patches), np.diff(graph["indptr"]))
+    num_edges = len(edge_sources)
+
+    # group the edges by their target patch
+    edge_order = np.argsort(graph["indices"], kind="stable")
+    edge_sources = edge_sources[edge_order]
+    edge_targets = graph["indices"][edge_order]
+    edge_weights = graph["weights"][edge_order]
+    segment_targets, segment_starts = np.unique(edge_targets, return_index=True)
+
+    source_costs = cost_matrix[source_list, :]
+    settlement = np.argsort(source_costs, axis=1, kind="stable")
+    settlement_rank = np.empty_like(settlement)
+    settlement_rank[np.arange(num_sources)[:, np.newaxis], settlement] = np.arange(num_patches)
+
+    # choose the predecessor edge for every (source, target) pair, working in blocks of sources to limit memory
+    predecessor_edge = np.full([num_sources, num_patches], -1, dtype=int)
+    no_edge_key = num_patches * num_edges
+    for block_start in range(0, num_sources, block_size):
+        block = slice(block_start, min(block_start + block_size, num_sources))
+        candidate_costs = source_costs[block][:, edge_sources] + edge_weights[np.newaxis, :]
+        target_costs = source_costs[block][:, edge_targets]
+        is_tight = candidate_costs == target_costs
+        is_tight &= np.isfinite(target_costs)
+        is_tight &= edge_targets[np.newaxis, :] != source_list[block, np.newaxis]
+        edge_key = np.where(is_tight, settlement_rank[block][:, edge_sources] * num_edges + np.arange(num_edges),
+                            no_edge_key)
+        if len(segment_targets) > 0:
+            best_key = np.minimum.reduceat(edge_key, segment_starts, axis=1)
+            predecessor_edge[block, segment_targets] = np.where(best_key < no_edge_key, best_key % num_edges, -1)
+
+    predecessor = np.full([num_sources, num_patches], -1, dtype=int)
+    is_in_tree = predecessor_edge >= 0
+    predecessor[is_in_tree] = edge_sources[predecessor_edge[is_in_tree]]
+    hops = np.full([num_sources, num_patches], -1, dtype=int)
+    cost = np.full([num_sources, num_patches], float('inf'))
+    hops[np.arange(num_sources), source_list] = 0
+    cost[np.arange(num_sources), source_list] = 0.0
+
+    # accumulate along the trees one step at a time (each pass completes every patch whose predecessor is complete)
+    is_pending = predecessor_edge >= 0
+    while is_pending.any():
+        pending_rows, pending_cols = np.nonzero(is_pending)
+        parents = predecessor[pending_rows, pending_cols]
+        is_ready = hops[pending_rows, parents] >= 0
+        if not is_ready.any():
+            break
+        ready_rows = pending_rows[is_ready]
+        ready_cols = pending_cols[is_ready]
+        ready_parents = parents[is_ready]
+        hops[ready_rows, ready_cols] = hops[ready_rows, ready_parents] + 1
+        cost[ready_rows, ready_cols] = cost[ready_rows, ready_parents] + \
+            edge_weights[predecessor_edge[ready_rows, ready_cols]]
+        is_pending[ready_rows, ready_cols] = False
+
+    # settlement order from the re-accumulated costs
+    settlement = np.argsort(cost, axis=1, kind="stable")
+    settled_orders = [settlement[x, : np.count_nonzero(np.isfinite(cost[x, :]))] for x in range(num_sources)]
+    return settled_orders, cost, hops, predecessor
+
+
+def build_target_costs(graph, source, settled_order, cost, hops, predecessor, patch_sizes, patch_traversal,
+                       target_list):
+    # Partial version of build_patch_costs() that only builds the dictionaries of the patches in target_list, for use
+    # when repairing the routes of a source after a perturbation. The relaxations into these targets are replayed in
+    # settlement order, so each returned dictionary is identical to the corresponding one from build_patch_costs().
+    num_patches = graph["num_patches"]
+    indptr = graph["indptr"]
+    indices = graph["indices"]
+    weights = graph["weights"]
+    settled_order = np.asarray(settled_order, dtype=int)
+    settlement_rank = np.full(num_patches, -1, dtype=int)
+    settlement_rank[settled_order] = np.arange(len(settled_order))
+    is_target = np.zeros(num_patches, dtype=bool)
+    is_target[target_list] = True
+
+    best_paths = {source: []}
+
+    def best_path(vertex):
+        # walk up the predecessor tree to the nearest patch whose path is already known
+        chain = []
+        ancestor = vertex
+        while ancestor not in best_paths:
+            chain.append(ancestor)
+            ancestor = int(predecessor[ancestor])
+        for tree_vertex in reversed(chain):
+            previous = int(predecessor[tree_vertex])
+            best_paths[tree_vertex] = best_paths[previous] + [previous]
+        return best_paths[vertex]
+
+    routes = {}
+    for target in target_list:
+        target = int(target)
+        routes[target] = {"routes": {"best": (float('inf'), float('inf'), 0.0, [])}}
+        if target == source:
+            routes[target]["routes"]["best"] = (0, 0.0, [])
+            routes[target]["routes"][0] = (0.0, [])
+        elif settlement_rank[target] >= 0:
+            routes[target]["routes"]["best"] = (int(hops[target]), float(cost[target]), best_path(target))
+
+    # the settled patch (by rank) at which each target first receives the (inf, []) entry
+    unreachable_events = []
+    pending_unreachable_entry = set(routes.keys())
+    for rank, vertex in enumerate(settled_order):
+        if len(pending_unreachable_entry) == 0:
+            break
+        still_pending = set(indices[indptr[vertex]: indptr[vertex + 1]].tolist())
+        still_pending.add(int(vertex))
+        for target in pending_unreachable_entry - still_pending:
+            unreachable_events.append((rank, target))
+        pending_unreachable_entry &= still_pending
+
+    # relaxations from settled patches into the targets, in settlement order
+    edge_sources = np.repeat(np.arange(num_patches), np.diff(indptr))
+    target_edges = np.nonzero(is_target[indices] & (settlement_rank[edge_sources] >= 0))[0]
+    target_edges = target_edges[np.argsort(settlement_rank[edge_sources[target_edges]], kind="stable")]
+
+    event_index = 0
+    for edge in target_edges:
+        vertex = int(edge_sources[edge])
+        while event_index < len(unreachable_events) and unreachable_events[event_index][0] <= settlement_rank[vertex]:
+            routes[unreachable_events[event_index][1]]["routes"][float('inf')] = (float('inf'), [])
+            event_index += 1
+        target = int(indices[edge])
+        new_path_length = int(hops[vertex]) + 1
+        new_path_cost = float(cost[vertex] + weights[edge])
+        target_routes = routes[target]["routes"]
+        if new_path_length not in target_routes or new_path_cost < target_routes[new_path_length][0]:
+            target_routes[new_path_length] = (new_path_cost, best_path(vertex) + [vertex])
+    for rank, target in unreachable_events[event_index:]:
+        routes[target]["routes"][float('inf')] = (float('inf'), [])
+
+    for target in routes:
+        if target != source or len(settled_order) > 1:
+            routes[target]["target_patch_size"] = float(patch_sizes[target])
+            routes[target]["target_patch_traversal"] = float(patch_traversal[target])
+    return routes
+
+
+# ------------------------------ INCREMENTAL REPAIR OF PATHS FOLLOWING A PERTURBATION ------------------------------ #
+
+def edge_weight_matrix(graph):
+    # dense matrix of the edge costs of the species graph, with NaN where there is no edge
+    num_patches = graph["num_patches"]
+    edge_sources = np.repeat(np.arange(num_patches), np.diff(graph["indptr"]))
+    weight_matrix = np.full([num_patches, num_patches], np.nan)
+    weight_matrix[edge_sources, graph["indices"]] = graph["weights"]
+    return weight_matrix
+
+
+def changed_edges(old_graph, new_graph):
+    # Compare the species graph before and after a perturbation. Changes are split into the decremental (an edge
+    # removed or made more expensive) and incremental (an edge added or made cheaper) cases.
+    old_weights = edge_weight_matrix(graph=old_graph)
+    new_weights = edge_weight_matrix(graph=new_graph)
+    has_old = ~np.isnan(old_weights)
+    has_new = ~np.isnan(new_weights)
+    is_changed = (has_old != has_new) | (has_old & has_new & (old_weights != new_weights))
+    tails, heads = np.nonzero(is_changed)
+    old_weights = old_weights[tails, heads]
+    new_weights = new_weights[tails, heads]
+    has_old = has_old[tails, heads]
+    has_new = has_new[tails, heads]
+    return {
+        "tails": tails,
+        "heads": heads,
+        "new_weights": new_weights,
+        "is_decremental": has_old & (~has_new | (new_weights > old_weights)),
+        "is_incremental": has_new & (~has_old | (new_weights < old_weights)),
+    }
+
+
+def repair_path_trees(old_trees, new_graph, edge_changes, forced_sources):
+    # Repair the all-sources shortest-path trees after the graph has changed, recomputing only those sources whose
+    # tree can actually be affected:
+    # - decremental changes only matter to the sources whose current tree uses the edge (otherwise the old tree is
+    #   still present and no route has become cheaper);
+    # - incremental changes only matter to the sources for which the edge gives a route to its head that is cheaper
+    #   or equally cheap (as a tie can change the chosen predecessor) than the current one.
+    # Returns the new cost/hops/predecessor arrays and the list of recomputed sources.
+    num_patches = new_graph["num_patches"]
+    old_cost = old_trees["cost"]
+    tails = edge_changes["tails"]
+    heads = edge_changes["heads"]
+
+    is_affected = np.zeros(num_patches, dtype=bool)
+    is_affected[list(forced_sources)] = True
+    is_decremental = edge_changes["is_decremental"]
+    if is_decremental.any():
+        is_affected |= (old_trees["predecessor"][:, heads[is_decremental]] == tails[is_decremental]).any(axis=1)
+    is_incremental = edge_changes["is_incremental"]
+    if is_incremental.any():
+        tail_cost = old_cost[:, tails[is_incremental]]
+        with np.errstate(invalid='ignore'):
+            is_improved = np.isfinite(tail_cost) & (
+                tail_cost + edge_changes["new_weights"][is_incremental] <= old_cost[:, heads[is_incremental]])
+        is_affected |= is_improved.any(axis=1)
+    recomputed_sources = np.nonzero(is_affected)[0]
+
+    new_trees = {
+        "cost": old_cost.copy(),
+        "hops": old_trees["hops"].copy(),
+        "predecessor": old_trees["predecessor"].copy(),
+    }
+    if len(recomputed_sources) > 0:
+        new_trees["cost"][recomputed_sources, :] = dijkstra(csgraph=build_species_csr(graph=new_graph), directed=True,
+                                                            indices=recomputed_sources)
+        unused_settled_orders, cost, hops, predecessor = shortest_path_trees(
+            graph=new_graph, cost_matrix=new_trees["cost"], source_list=recomputed_sources)
+        new_trees["cost"][recomputed_sources, :] = cost
+        new_trees["hops"][recomputed_sources, :] = hops
+        new_trees["predecessor"][recomputed_sources, :] = predecessor
+    return new_trees, recomputed_sources
+
+
+def first_non_neighbours(graph, settled_order):
+    # For each target, the first settled patch that is neither the target nor has a valid edge into it, i.e. the
+    # patch from which build_patch_costs() records the (inf, []) route for that target (-1 if there is none).
+    num_patches = graph["num_patches"]
+    first_patch = np.full(num_patches, -1, dtype=int)
+    pending_unreachable_entry = set(range(num_patches))
+    for vertex in settled_order:
+        if len(pending_unreachable_entry) == 0:
+            break
+        still_pending = set(graph["indices"][graph["indptr"][vertex]: graph["indptr"][vertex + 1]].tolist())
+        still_pending.add(int(vertex))
+        first_patch[list(pending_unreachable_entry - still_pending)] = vertex
+        pending_unreachable_entry &= still_pending
+    return first_patch
+
+
+def changed_route_targets(old_trees, new_trees, edge_changes, recomputed_sources):
+    # Boolean (source, target) array of the route dictionaries that are different after the perturbation. The
+    # dictionary of a target depends on its own best route, the relaxations from each settled patch with an edge into
+    # it (in settlement order), the patch from which it gets the (inf, []) entry, and its size and traversal.
+    old_graph = old_trees["graph"]
+    new_graph = new_trees["graph"]
+    num_patches = new_graph["num_patches"]
+    is_changed_target = np.zeros([num_patches, num_patches], dtype=bool)
+
+    if len(recomputed_sources) > 0:
+        # patches whose best route changed, including every descendant (in the new tree) of such a patch
+        old_rows = [old_trees[x][recomputed_sources, :] for x in ["cost", "hops", "predecessor"]]
+        new_rows = [new_trees[x][recomputed_sources, :] for x in ["cost", "hops", "predecessor"]]
+        is_changed_tree = (old_rows[0] != new_rows[0]) | (old_rows[1] != new_rows[1]) | (old_rows[2] != new_rows[2])
+        has_parent = new_rows[2] >= 0
+        while True:
+            is_parent_changed = np.take_along_axis(is_changed_tree, np.maximum(new_rows[2], 0), axis=1) & has_parent
+            if not (is_parent_changed & ~is_changed_tree).any():
+                break
+            is_changed_tree |= is_parent_changed
+        is_changed_target[recomputed_sources, :] |= is_changed_tree
+
+        # targets of the relaxations from those patches, in either the old or the new graph
+        for graph in [old_graph, new_graph]:
+            edge_sources = np.repeat(np.arange(num_patches), np.diff(graph["indptr"]))
+            adjacency = csr_matrix((np.ones(len(edge_sources)), (edge_sources, graph["indices"])),
+                                   shape=(num_patches, num_patches))
+            is_changed_target[recomputed_sources, :] |= (is_changed_tree.astype(float) @ adjacency) > 0.0
+
+        # targets whose (inf, []) entry now comes from a different patch, or from one that has changed
+        for source_index, source in enumerate(recomputed_sources):
+            old_first = first_non_neighbours(graph=old_graph,
+                                             settled_order=settled_order_from_costs(old_trees["cost"][source, :]))
+            new_first = first_non_neighbours(graph=new_graph,
+                                             settled_order=settled_order_from_costs(new_trees["cost"][source, :]))
+            is_first_changed = old_first != new_first
+            is_first_changed |= (new_first >= 0) & is_changed_tree[source_index, np.maximum(new_first, 0)]
+            is_changed_target[source, :] |= is_first_changed
+            is_changed_target[source, source] = True
+
+    # targets of a changed edge, for every source that reaches the start of that edge
+    for tail, head in zip(edge_changes["tails"], edge_changes["heads"]):
+        is_changed_target[:, head] |= np.isfinite(old_trees["cost"][:, tail]) | np.isfinite(new_trees["cost"][:, tail])
+
+    # targets whose size or traversal score has changed
+    is_field_changed = (old_trees["patch_sizes"] != new_trees["patch_sizes"]) | \
+                       (old_trees["patch_traversal"] != new_trees["patch_traversal"])
+    is_changed_target[:, is_field_changed] = True
+    return is_changed_target
+
+
+def stepping_stone_patches(graph, source, cost, hops, max_path_length):
+    # The set of patches in any stored route of at most (max_path_length + 1) steps from this source, together with
+    # the (reachable) targets of those routes - the same set as is gathered from the route dictionaries in
+    # system_state.store_species_paths_and_adjacency(), but found directly from the shortest-path tree.
+    edge_sources = np.repeat(np.arange(graph["num_patches"]), np.diff(graph["indptr"]))
+    is_short_route = (hops[edge_sources] >= 0) & (hops[edge_sources] <= max_path_length) & \
+                     (graph["indices"] != source) & np.isfinite(cost[graph["indices"]])
+    return set(edge_sources[is_short_route].tolist()) | set(graph["indices"][is_short_route].tolist())
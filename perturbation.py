@@ -159,6 +159,9 @@ def perturbation(system_state, parameters, pert_paras):
 
     elif pert_paras["perturbation_type"] == "population_perturbation":
 
+        if system_state.population_arrays is not None:
+            # perturbation dispersal may look at the latest step's growth, direct impact and predation components
+            system_state.population_arrays.write_components_to_objects()
         population_perturbation(system_state=system_state,
                                 parameters=parameters,
                                 perturbation_subtype=pert_paras["perturbation_subtype"],
@@ -442,42 +445,12 @@ def patch_perturbation(
 
     # re-determining the species movement scores for both foraging and dispersal:
     if rebuild_all_patches:
-        # (slow for large networks) rebuild for all patches rather than just the estimate of those closely impacted
+        # (slow for large networks) rebuild for all patches rather than just repairing those actually impacted
         system_state.build_all_patches_species_paths_and_adjacency(parameters=parameters)
     else:
-        # start with the patches literally changed
-        likely_affected_patches = altered_patch_numbers
-        # what patches had routes going through them?
-        for patch_to_check in system_state.patch_list:
-            for changed_patch_num in altered_patch_numbers:
-                if changed_patch_num in patch_to_check.stepping_stone_list:
-                    likely_affected_patches = list(set(likely_affected_patches + [patch_to_check.number]))
-        # now check those who are NOW (after the perturbation) the N-th degree neighbours (note that
-        # because the diagonal of the patch_adjacency_matrix are all 1, then an entry being non-zero indicates that
-        # we are identifying UP TO Nth Degree Neighbours (as we could also have an M < N degree neighbour, plus
-        # revisiting the same final node N-M times. So this does not tell us shortest paths but DOES identify the
-        # existence of any connections/reachability, as desired here.
-        #
-        # The point is that this catches anyone (anywhere) who MAY now have a route that uses this patch.
-        path_matrix = deepcopy(system_state.patch_adjacency_matrix)
-        for _ in range(parameters["main_para"]["ASSUMED_MAX_PATH_LENGTH"] - 1):
-            # matrix multiplication
-            path_matrix = np.matmul(path_matrix, path_matrix)
-            # this causes number of walks to grow exponentially so normalise - we only need to know when non-zero
-            for patch_x in range(len(system_state.patch_list)):
-                for patch_y in range(len(system_state.patch_list)):
-                    if path_matrix[patch_x, patch_y] != 0.0:
-                        path_matrix[patch_x, patch_y] = 1.0
-        # no point checking patch numbers we already consider affected
-        remaining_to_check = list(set([x for x in range(len(system_state.patch_list))]) - set(likely_affected_patches))
-        for patch_num_to_check in remaining_to_check:
-            for changed_patch_num in altered_patch_numbers:
-                if path_matrix[patch_num_to_check, changed_patch_num] > 0.0 \
-                        or path_matrix[changed_patch_num, patch_num_to_check] > 0.0:
-                    likely_affected_patches = list(set(likely_affected_patches + [patch_num_to_check]))
-        # pass list to rebuild function
-        system_state.build_all_patches_species_paths_and_adjacency(parameters=parameters,
-                                                                   specified_patch_list=likely_affected_patches)
+        # repair only the shortest-path trees and route dictionaries that the changed edges can actually affect
+        system_state.repair_species_paths_and_adjacency(parameters=parameters,
+                                                        altered_patch_numbers=altered_patch_numbers)
 
     is_nonlocal_foraging = parameters["pop_dyn_para"]["IS_NONLOCAL_FORAGING_PERMITTED"]
     is_local_foraging_ensured = parameters["pop_dyn_para"]["IS_LOCAL_FORAGING_ENSURED"]
@@ -487,6 +460,7 @@ def patch_perturbation(
         is_nonlocal_foraging=is_nonlocal_foraging,
         is_local_foraging_ensured=is_local_foraging_ensured,
         time=system_state.time,
+        num_workers=parameters["main_para"]["INTERACTION_SCORING_WORKERS"],
     )
     is_dispersal = parameters["pop_dyn_para"]["IS_DISPERSAL_PERMITTED"]
     build_actual_dispersal_targets(
@@ -495,6 +469,9 @@ def patch_perturbation(
         is_dispersal=is_dispersal,
         time=system_state.time,
     )
+    if system_state.population_arrays is not None:
+        # patch-dependent properties and interacting populations have changed
+        system_state.population_arrays.mark_stale()
 
 
 # ------------------------------------------- PATCH PERTURBATION SUBTYPES ------------------------------------------- #
@@ -521,13 +498,14 @@ def change_patch_to_habitat(system_state,
             # count if it actually makes a difference
             if system_state.patch_list[patch_number].habitat_type_num != new_habitat_type_num:
                 system_state.patch_list[patch_number].increment_meaningful_perturbation_count()
-                system_state.patch_list[patch_number].habitat_type_num = new_habitat_type_num
-                system_state.patch_list[patch_number].habitat_type = habitat_types[new_habitat_type_num]
-                system_state.update_patch_habitat_based_properties(system_state.patch_list[patch_number])
+                system_state.change_patch_habitat(patch=system_state.patch_list[patch_number],
+                                                  habitat_type_num=new_habitat_type_num,
+                                                  habitat_type=habitat_types[new_habitat_type_num])
                 # record history
                 system_state.patch_list[patch_number].habitat_history[system_state.step] = new_habitat_type_num
-    # record changes at a system_state level in the history
+    # record changes at a system_state level in the history (the LCC's depend on the habitat types of the triangles)
     system_state.update_habitat_distributions_history()
+    system_state.update_degree_history()
 
 
 # Change patch floating point parameter value in range [0, 1] (quality or size)
@@ -608,7 +586,7 @@ def remove_patch(system_state,
     # (c) the patch numbers will remain constant in the patch_list. THIS IS ESSENTIAL!
     for patch_number in patches_to_remove:
         # check not already "removed"
-        if patch_number not in system_state.current_patch_list:
+        if patch_number not in system_state.current_patch_set:
             # count the change and proceed
             system_state.patch_list[patch_number].increment_meaningful_perturbation_count()
             # set all local populations of this patch to zero
@@ -617,40 +595,44 @@ def remove_patch(system_state,
             for species_name in system_state.patch_list[patch_number].species_movement_scores:
                 system_state.patch_list[patch_number].species_movement_scores[species_name] = {
                     x: {"best": (float('inf'), float('inf'), 0.0)} for x in range(len(system_state.patch_list))}
+            for species_name in system_state.patch_list[patch_number].bounded_path_costs:
+                system_state.patch_list[patch_number].bounded_path_costs[species_name] = np.full(
+                    np.shape(system_state.patch_list[patch_number].bounded_path_costs[species_name]), float('inf'))
 
             # set degree to zero and record new values
             system_state.patch_list[patch_number].degree = 0
             system_state.patch_list[patch_number].degree_history[system_state.step] = 0
 
+            # the patch leaves every triangle that it was part of
+            system_state.mark_patch_neighbourhood_changed(patch_num=patch_number)
+
             # set self-adjacency to zero, record history of set of adjacent patches to zero
-            system_state.patch_adjacency_matrix[patch_number, patch_number] = 0
+            system_state.set_patch_adjacency(patch_num_1=patch_number, patch_num_2=patch_number, adjacency_value=0)
             system_state.patch_list[patch_number].set_of_adjacent_patches = set({})
             system_state.patch_list[patch_number].set_of_adjacent_patches_history[system_state.step] = []
 
             # now look at other patches - need to set the corresponding row and column in the adjacency matrix to zero
             # and remove the patch number from the list of currently accessible patches:
-            for patch in system_state.patch_list:
-                if patch.number != patch_number:
-                    # Now look at all connected patches (but not the same patch again)
-                    if system_state.patch_adjacency_matrix[patch_number, patch.number] != 0.0 or \
-                            system_state.patch_adjacency_matrix[patch.number, patch_number] != 0.0:
-                        # record changes to degree
-                        patch.degree = max(0, patch.degree - 1)
-                        patch.degree_history[system_state.step] = patch.degree
-
-                        # record changes to sets of adjacent patches
-                        patch.set_of_adjacent_patches.remove(patch_number)
-                        patch.set_of_adjacent_patches_history[system_state.step] = list(patch.set_of_adjacent_patches)
-
-                        # record adjacency change and zero the corresponding patch adjacency matrix entries
-                        patch.adjacency_history_list.append([system_state.step, patch_number, 0])
-                        system_state.patch_list[patch_number].adjacency_history_list.append(
-                            [system_state.step, patch.number, 0])
-                        system_state.patch_adjacency_matrix[patch_number, patch.number] = 0
-                        system_state.patch_adjacency_matrix[patch.number, patch_number] = 0
+            for neighbour_number in sorted(system_state.patch_neighbours(patch_num=patch_number) - {patch_number}):
+                # Now look at all connected patches (but not the same patch again)
+                patch = system_state.patch_list[neighbour_number]
+                # record changes to degree
+                patch.degree = max(0, patch.degree - 1)
+                patch.degree_history[system_state.step] = patch.degree
+
+                # record changes to sets of adjacent patches
+                patch.set_of_adjacent_patches.remove(patch_number)
+                patch.set_of_adjacent_patches_history[system_state.step] = list(patch.set_of_adjacent_patches)
+
+                # record adjacency change and zero the corresponding patch adjacency matrix entries
+                patch.adjacency_history_list.append([system_state.step, patch_number, 0])
+                system_state.patch_list[patch_number].adjacency_history_list.append(
+                    [system_state.step, patch.number, 0])
+                system_state.set_patch_adjacency(patch_num_1=patch_number, patch_num_2=patch.number,
+                                                 adjacency_value=0)
 
             # only do this after reducing the degree of connected patches
-            system_state.current_patch_list.remove(patch_number)
+            system_state.remove_current_patch(patch_num=patch_number)
             system_state.patch_list[patch_number].removal_history[system_state.step] = 'removed'
     # after removing a patch, update all patch centrality and record history of average properties for CURRENT patches
     system_state.update_centrality_history(parameters=parameters)
@@ -681,16 +663,14 @@ def change_patch_adjacency(system_state,
                              deepcopy(system_state.patch_adjacency_matrix[pair[1], pair[0]])]
             # update degree if necessary
             if adjacency_change[pair_num] == 0.0:
-                if system_state.patch_adjacency_matrix[pair[0], pair[1]] != 0.0 or \
-                        system_state.patch_adjacency_matrix[pair[1], pair[0]] != 0.0:
+                if system_state.is_patch_adjacent(patch_num_1=pair[0], patch_num_2=pair[1]):
                     # were adjacent (in at least one direction), now not
                     system_state.patch_list[pair[0]].degree = max(0, system_state.patch_list[pair[0]].degree - 1)
                     system_state.patch_list[pair[1]].degree = max(0, system_state.patch_list[pair[1]].degree - 1)
                     system_state.patch_list[pair[0]].set_of_adjacent_patches.remove(pair[1])
                     system_state.patch_list[pair[1]].set_of_adjacent_patches.remove(pair[0])
             elif adjacency_change[pair_num] == 1.0:
-                if system_state.patch_adjacency_matrix[pair[0], pair[1]] == 0.0 and \
-                        system_state.patch_adjacency_matrix[pair[1], pair[0]] == 0.0:
+                if not system_state.is_patch_adjacent(patch_num_1=pair[0], patch_num_2=pair[1]):
                     # were NOT adjacent (in any direction), now are (in both directions)
                     system_state.patch_list[pair[0]].degree = min(system_state.patch_list[pair[0]].degree + 1,
                                                                   len(system_state.patch_list))
@@ -701,8 +681,8 @@ def change_patch_adjacency(system_state,
             else:
                 raise Exception('Adjacency matrix should only contain (or change to) values of either 0 or 1.')
             # finally replace the corresponding entry in the adjacency matrix with the new adjacency value
-            system_state.patch_adjacency_matrix[pair[0], pair[1]] = adjacency_change[pair_num]
-            system_state.patch_adjacency_matrix[pair[1], pair[0]] = adjacency_change[pair_num]
+            system_state.set_patch_adjacency(patch_num_1=pair[0], patch_num_2=pair[1],
+                                             adjacency_value=adjacency_change[pair_num])
             # record change histories
             system_state.patch_list[pair[0]].adjacency_history_list.append(
                 [system_state.step, pair[1], adjacency_change[pair_num]])
@@ -723,7 +703,6 @@ def change_patch_adjacency(system_state,
                 system_state.patch_list[pair[1]].increment_meaningful_perturbation_count()
 
     # after an adjacency change, update all patch centrality and habitat spatial auto-correlation
-    system_state.calculate_all_patches_centrality(parameters=parameters)
     system_state.update_centrality_history(parameters=parameters)
     system_state.update_habitat_distributions_history()
     system_state.update_degree_history()
@@ -784,6 +763,7 @@ def perturbation_patch_selection(system_state,
     # Note that this does not apply in cases of removed patches - as they are now considered no longer adjacent to any!
     if len(system_state.perturbation_history) > 0 and proximity_to_previous > 0:
         eligible_patch_nums_copy = deepcopy(eligible_patch_nums)
+        current_patch_set = set(system_state.current_patch_list)
         # need to use a copy as removing from the same list while iterating over it does not behave properly!
         most_recently_perturbed_patch_nums = list(set([
             patch_num for cluster in system_state.perturbation_history[
@@ -801,22 +781,17 @@ def perturbation_patch_selection(system_state,
                 # Check if ONE stepping stone required and applies here:
                 if proximity_to_previous > 1:
                     # remove patches adjacent to those present in previous waves
-                    if system_state.patch_adjacency_matrix[prev_patch, patch_num] \
-                            > 0 or system_state.patch_adjacency_matrix[patch_num, prev_patch] > 0:
+                    if system_state.is_patch_adjacent(patch_num_1=prev_patch, patch_num_2=patch_num):
                         eligible_patch_nums.remove(patch_num)
                         break
                 # THEN (not "else") check if TWO stepping stones are required and applies here:
                 if proximity_to_previous > 2:
                     # remove other patches adjacent to those adjacent to those present in previous waves
-                    for intermediate_patch_num in system_state.current_patch_list:
-                        if intermediate_patch_num != patch_num:
-                            if (system_state.patch_adjacency_matrix[prev_patch, intermediate_patch_num] > 0 or
-                                system_state.patch_adjacency_matrix[intermediate_patch_num, prev_patch] > 0) and \
-                                    (system_state.patch_adjacency_matrix[patch_num, intermediate_patch_num] > 0 or
-                                     system_state.patch_adjacency_matrix[intermediate_patch_num, patch_num] > 0):
-                                eligible_patch_nums.remove(patch_num)
-                                keep_checking = False
-                                break
+                    shared_neighbours = system_state.patch_neighbours(patch_num=prev_patch) & \
+                        system_state.patch_neighbours(patch_num=patch_num) & current_patch_set
+                    if len(shared_neighbours - {patch_num}) > 0:
+                        eligible_patch_nums.remove(patch_num)
+                        keep_checking = False
         del eligible_patch_nums_copy  # clear this variable as no longer required
 
     # Weighting the probability distribution of the eligible choices:
@@ -948,8 +923,7 @@ def cluster_builder(system_state, cluster_spec, eligible_patch_nums, clusters_mu
                 current_patches = list(set([patch for cluster in cluster_list for patch in cluster]))
                 for patch_num in actual_patch_nums_copy:
                     for prev_patch in current_patches:
-                        if system_state.patch_adjacency_matrix[prev_patch, patch_num] \
-                                > 0 or system_state.patch_adjacency_matrix[patch_num, prev_patch] > 0:
+                        if system_state.is_patch_adjacent(patch_num_1=prev_patch, patch_num_2=patch_num):
                             actual_patch_nums.remove(patch_num)
                             break
                 del actual_patch_nums_copy  # clear this variable as no longer required
@@ -1062,35 +1036,27 @@ def cluster_next_element(system_state, current_cluster: list, actual_patch_nums:
 
     elif cluster_arch_type == "star":
         # try to choose a neighbour of the initial node
-        for patch_num in actual_patch_nums:
-            if system_state.patch_adjacency_matrix[current_cluster[0], patch_num] > 0 \
-                    or system_state.patch_adjacency_matrix[patch_num, current_cluster[0]] > 0:
-                type_patch_nums.append(patch_num)
+        initial_neighbours = system_state.patch_neighbours(patch_num=current_cluster[0])
+        type_patch_nums = [x for x in actual_patch_nums if x in initial_neighbours]
 
     elif cluster_arch_type == "chain":
         # try to choose a neighbour of the final node
-        for patch_num in actual_patch_nums:
-            if system_state.patch_adjacency_matrix[current_cluster[-1], patch_num] > 0 \
-                    or system_state.patch_adjacency_matrix[patch_num, current_cluster[-1]] > 0:
-                type_patch_nums.append(patch_num)
+        final_neighbours = system_state.patch_neighbours(patch_num=current_cluster[-1])
+        type_patch_nums = [x for x in actual_patch_nums if x in final_neighbours]
 
     elif cluster_arch_type == "disconnected":
         # try to choose a neighbour of None of the current nodes
+        # (each patch is listed once for every current node that it is not adjacent to)
         for patch_num in actual_patch_nums:
-            for already_chosen_num in current_cluster:
-                if system_state.patch_adjacency_matrix[already_chosen_num, patch_num] == 0 \
-                        and system_state.patch_adjacency_matrix[patch_num, already_chosen_num] == 0:
-                    type_patch_nums.append(patch_num)
+            num_adjacent = len(system_state.patch_neighbours(patch_num=patch_num).intersection(current_cluster))
+            type_patch_nums.extend([patch_num] * (len(current_cluster) - num_adjacent))
 
     elif cluster_arch_type == "box":
         # try to choose a neighbour of multiple current nodes
         adjacency_counter = []
         for patch_num in actual_patch_nums:
-            num_adjacent = 0
-            for already_chosen_num in current_cluster:
-                if system_state.patch_adjacency_matrix[already_chosen_num, patch_num] > 0 \
-                        or system_state.patch_adjacency_matrix[patch_num, already_chosen_num] > 0:
-                    num_adjacent += 1
+            num_adjacent = sum([1 for x in current_cluster if system_state.is_patch_adjacent(patch_num_1=x,
+                                                                                            patch_num_2=patch_num)])
             adjacency_counter.append([patch_num, num_adjacent])
         # what was the greatest adjacency?
         max_adjacency = max([x[1] for x in adjacency_counter])
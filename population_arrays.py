@@ -0,0 +1,336 @@
+import numpy as np
+from population_dynamics import reset_temp_values, change_checker, growth_kernel, foraging_kernel, \
+    set_foraging_records, dispersal_kernel, set_leaving_flows
+
+
+# Optional struct-of-arrays engine for population_dynamics.update_populations(), enabled by
+# main_para["IS_POPULATION_ARRAY_ENGINE"].
+#
+# All per-step state of the local populations is held in numpy arrays of shape (patches, species), with the columns
+# in species list order (which is also the order of every patch.local_populations dictionary), so that growth, direct
+# impact and the end-of-sub-step minimum population checks are each a handful of whole-array operations rather than a
+# method call per local population. Every operation is carried out in the same order as the object model, so that
+# results (including the consumption of random draws) are identical.
+#
+# Foraging and dispersal use the same whole-system foraging_kernel() and dispersal_kernel() as the object model.
+#
+# The Local_population objects are only updated with the values that are recorded in their histories each step, while
+# the remaining per-step components (local growth, direct impact, predation, growth parameters) are written to them on
+# demand - for ODE recordings and before any perturbation.
+#
+# The patch-dependent properties (r_mod, carrying capacity, resource usage and habitat feeding) and the direct impact
+# interactions are cached, so mark_stale() must be called whenever the patches or the interacting population lists are
+# rebuilt.
+
+class Population_arrays:
+
+    def __init__(self, patch_list, species_list, parameters):
+        self.patch_list = patch_list
+        self.species_list = species_list
+        self.parameters = parameters
+        self.shape = (len(patch_list), len(species_list))
+
+        # flat (patch-major) list of the local populations, which is the order in which the object model visits them
+        self.local_pop_list = []
+        for patch in patch_list:
+            if [x for x in patch.local_populations] != [x.name for x in species_list]:
+                raise Exception(f"Local populations of patch {patch.number} are not held in species list order.")
+            self.local_pop_list += list(patch.local_populations.values())
+        self.flat_index = {id(x): index for index, x in enumerate(self.local_pop_list)}
+
+        # if the local populations all share an array-backed history store, then every history can be recorded at once
+        self.history_store = self.local_pop_list[0].history_store if len(self.local_pop_list) > 0 else None
+        if any(x.history_store is not self.history_store for x in self.local_pop_list):
+            self.history_store = None
+
+        # state carried between steps
+        self.population = self.gather("population")
+        self.potential_dispersal = self.gather("potential_dispersal")
+        self.local_growth = self.gather("local_growth")
+        self.direct_impact_value = self.gather("direct_impact_value")
+        self.prey_gain = self.gather("prey_gain")
+        self.predation_loss = self.gather("predation_loss")
+        self.r_value = self.gather("r_value")
+        self.r_final = self.gather("r_final")
+        self.l_final = self.gather("l_final")
+        self.k_final = self.gather("k_final")
+        self.competitors_final = self.gather("competitors_final")
+
+        # state used within a step
+        self.holding_population = np.zeros(self.shape)
+        self.current_temp_change = np.zeros(self.shape)
+        self.population_enter = np.zeros(self.shape)
+        self.population_leave = np.zeros(self.shape)
+        self.internal_change = np.zeros(self.shape)
+
+        # cached patch-dependent properties and direct impact interactions
+        self.is_stale = True
+        self.r_mod = None
+        self.carrying_capacity = None
+        self.resource_usage_conversion = None
+        self.habitat_feeding = None
+        self.lifespan = None
+        self.is_logistic = None
+        self.direct_impact_target = None
+        self.direct_impact_source = None
+        self.direct_impact_coefficient = None
+        self.refresh()
+
+    def gather(self, attribute):
+        return np.array([getattr(x, attribute) for x in self.local_pop_list], dtype=float).reshape(self.shape)
+
+    def scatter(self, attribute, values):
+        for local_pop, value in zip(self.local_pop_list, values.ravel().tolist()):
+            setattr(local_pop, attribute, value)
+
+    def mark_stale(self):
+        self.is_stale = True
+
+    def refresh(self):
+        self.r_mod = self.gather("r_mod")
+        self.carrying_capacity = self.gather("carrying_capacity")
+        self.resource_usage_conversion = self.gather("resource_usage_conversion")
+        self.habitat_feeding = np.array([[patch.this_habitat_species_feeding[x.name] for x in self.species_list]
+                                         for patch in self.patch_list], dtype=float).reshape(self.shape)
+        self.lifespan = np.array([x.lifespan for x in self.species_list], dtype=float)
+        self.is_logistic = np.array([x.growth_function == "logistic" for x in self.species_list])
+
+        # flatten the terms of Local_population.calculate_direct_impact() into (target, source, coefficient) arrays,
+        # kept in the order in which they are summed
+        is_direct_impact_nonlocal = self.parameters["pop_dyn_para"]["IS_DIRECT_IMPACT_NONLOCAL"]
+        target = []
+        source = []
+        coefficient = []
+        for index, local_pop in enumerate(self.local_pop_list):
+            for population in local_pop.interacting_populations:
+                if (is_direct_impact_nonlocal or local_pop.patch_num == population["object"].patch_num) and \
+                        population["object"].species.name in local_pop.species.direct_impact_on_me:
+                    target.append(index)
+                    source.append(self.flat_index[id(population["object"])])
+                    coefficient.append(local_pop.species.direct_impact_on_me[population["object"].species.name])
+        self.direct_impact_target = np.array(target, dtype=int)
+        self.direct_impact_source = np.array(source, dtype=int)
+        self.direct_impact_coefficient = np.array(coefficient, dtype=float)
+        self.is_stale = False
+
+    def write_components_to_objects(self):
+        # the per-step components that are not part of the population histories
+        self.scatter("local_growth", self.local_growth)
+        self.scatter("direct_impact_value", self.direct_impact_value)
+        self.scatter("prey_gain", self.prey_gain)
+        self.scatter("predation_loss", self.predation_loss)
+        self.scatter("r_value", self.r_value)
+        self.scatter("r_final", self.r_final)
+        self.scatter("l_final", self.l_final)
+        self.scatter("k_final", self.k_final)
+        self.scatter("competitors_final", self.competitors_final)
+
+    def growth(self, time, alpha, is_current):
+        holding = self.holding_population
+        is_occupied = holding > 0.0
+        is_growing = is_current[:, np.newaxis] & is_occupied
+
+        r_value = np.zeros(self.shape)
+        for column, species in enumerate(self.species_list):
+            if not np.any(is_growing[:, column]):
+                continue
+            if species.growth_function not in ["logistic", "malthusian"]:
+                raise Exception(f"Growth function {species.growth_function} not recognised.")
+            if species.growth_para["R"]["type"] in ["vector_exp", "vector_imp"] and species.is_growth_offset:
+                # the offset may be patch-specific, so is held by each local population
+                for row in np.flatnonzero(is_growing[:, column]):
+                    r_value[row, column] = self.local_pop_list[
+                        row * self.shape[1] + column].current_growth_r_value(time=time)
+            else:
+                r_value[:, column] = species.current_r_value
+
+        unused_sum_competing, local_growth_change, r_final, competitors = growth_kernel(
+            holding_population=holding,
+            is_growing=is_growing,
+            resource_usage_conversion=self.resource_usage_conversion,
+            r_value=r_value,
+            r_mod=self.r_mod,
+            lifespan=self.lifespan,
+            carrying_capacity=self.carrying_capacity,
+            is_logistic=self.is_logistic,
+            alpha=alpha,
+            model_time_type=self.parameters["main_para"]["MODEL_TIME_TYPE"],
+        )
+        self.local_growth[is_growing] = local_growth_change[is_growing]
+        self.current_temp_change[is_growing] += local_growth_change[is_growing]
+        self.r_value[is_growing] = r_value[is_growing]
+        self.r_final[is_growing] = r_final[is_growing]
+        self.l_final[is_growing] = np.broadcast_to(self.lifespan, self.shape)[is_growing]
+        self.k_final[is_growing] = self.carrying_capacity[is_growing]
+        self.competitors_final[is_growing] = competitors[is_growing]
+
+        # empty local populations in current patches have no growth (other patches keep their previous value)
+        self.local_growth[is_current[:, np.newaxis] & ~is_occupied] = 0.0
+
+    def direct_impact(self, time):
+        direct_impact = np.zeros(self.shape)
+        if self.parameters["pop_dyn_para"]["IS_DIRECT_IMPACT"]:
+            holding = self.holding_population.ravel()
+            interaction = np.zeros(holding.size)
+            np.add.at(interaction, self.direct_impact_target, self.direct_impact_coefficient *
+                      holding[self.direct_impact_target] * holding[self.direct_impact_source])
+            direct_impact += interaction.reshape(self.shape)
+
+        if self.parameters["pop_dyn_para"]["IS_PURE_DIRECT_IMPACT"]:
+            pure_direct_impact = np.zeros(self.shape)
+            binomial_columns = []
+            for column, species in enumerate(self.species_list):
+                if species.is_pure_direct_impact:
+                    if species.pure_direct_impact_para["TYPE"] == "binomial":
+                        binomial_columns.append(column)
+                    elif species.pure_direct_impact_para["TYPE"] == "vector":
+                        if species.is_direct_offset:
+                            # the offset may be patch-specific, so is held by each local population
+                            for row in range(self.shape[0]):
+                                local_pop = self.local_pop_list[row * self.shape[1] + column]
+                                if np.mod(time, species.seasonal_period) == 0:
+                                    local_pop.set_current_vector_offset(time=time, vector_statement="DIRECT")
+                                year_time = np.mod(time + local_pop.current_direct_vector_offset,
+                                                   species.direct_annual_duration)
+                                pure_direct_impact[row, column] = species.pure_direct_impact_para[
+                                    "DIRECT_VECTOR"][year_time]
+                        else:
+                            year_time = np.mod(time, species.direct_annual_duration)
+                            pure_direct_impact[:, column] = species.pure_direct_impact_para["DIRECT_VECTOR"][year_time]
+                    else:
+                        raise Exception("Error - (pure) direct impact type is not yet coded.")
+            if len(binomial_columns) > 0:
+                # a single call draws from the generator in the same patch-major order as one call per local population
+                probability = [self.species_list[x].pure_direct_impact_para["PROBABILITY"] for x in binomial_columns]
+                impact = [self.species_list[x].pure_direct_impact_para["IMPACT"] for x in binomial_columns]
+                draws = np.random.binomial(n=1, p=np.tile(probability, self.shape[0])).reshape(
+                    (self.shape[0], len(binomial_columns)))
+                pure_direct_impact[:, binomial_columns] = np.array(impact, dtype=float) * draws
+            direct_impact += pure_direct_impact
+
+        self.direct_impact_value = direct_impact
+        self.current_temp_change += direct_impact
+
+    def foraging(self, time, current_patch_list, is_ode_recordings):
+        if self.shape[0] > 0:
+            self.prey_gain, self.predation_loss, foraging_records = foraging_kernel(
+                species_list=self.species_list, holding_population=self.holding_population,
+                habitat_feeding=self.habitat_feeding, current_patch_list=current_patch_list, time=time)
+            self.current_temp_change += self.prey_gain - self.predation_loss
+            set_foraging_records(patch_list=self.patch_list, foraging_records=foraging_records,
+                                 is_ode_recordings=is_ode_recordings)
+
+    def dispersal(self, is_dispersal, current_patch_list):
+        if is_dispersal and self.shape[0] > 0:
+            # the adaptive dispersal mechanism also looks at this step's other components
+            if any(x.current_dispersal_mechanism == "adaptive" for x in self.species_list):
+                non_dispersal_change = self.local_growth + self.direct_impact_value + self.prey_gain - \
+                                       self.predation_loss
+            else:
+                non_dispersal_change = None
+            self.population_leave, self.population_enter, leaving_flows = dispersal_kernel(
+                species_list=self.species_list, parameters=self.parameters,
+                holding_population=self.holding_population, carrying_capacity=self.carrying_capacity,
+                non_dispersal_change=non_dispersal_change, current_patch_list=current_patch_list)
+            current_patches = list(current_patch_list)
+            self.potential_dispersal[current_patches] = self.holding_population[current_patches]
+            self.current_temp_change += self.population_enter - self.population_leave
+            set_leaving_flows(patch_list=self.patch_list, species_list=self.species_list, leaving_flows=leaving_flows)
+
+    def update_populations(self, species_list, time, step, current_patch_list, is_ode_recordings):
+        # equivalent to population_dynamics.update_populations() for the same patch_list and parameters
+        parameters = self.parameters
+        alpha = parameters["pop_dyn_para"]["COMPETITION_ALPHA_SCALING"]
+        is_nonlocal_foraging = parameters["pop_dyn_para"]["IS_NONLOCAL_FORAGING_PERMITTED"]
+        is_local_foraging_ensured = parameters["pop_dyn_para"]["IS_LOCAL_FORAGING_ENSURED"]
+        is_dispersal = parameters["pop_dyn_para"]["IS_DISPERSAL_PERMITTED"]
+        function_priority_dictionary = parameters["main_para"]["ECO_PRIORITIES"]
+
+        # populations may have been changed by perturbations since the last step
+        self.population = self.gather("population")
+        self.potential_dispersal = self.gather("potential_dispersal")
+        self.holding_population = self.population.copy()
+        self.current_temp_change = np.zeros(self.shape)
+        self.population_enter = np.zeros(self.shape)
+        self.population_leave = np.zeros(self.shape)
+        is_current = np.zeros(self.shape[0], dtype=bool)
+        is_current[list(current_patch_list)] = True
+
+        # the objects only need their temporary values resetting for the ODE recordings
+        if is_ode_recordings:
+            reset_temp_values(patch_list=self.patch_list, is_ode_recordings=is_ode_recordings)
+
+        # did any species parameters change?
+        if change_checker(species_list=species_list, patch_list=self.patch_list, time=time, step=step,
+                          is_dispersal=is_dispersal, is_nonlocal_foraging=is_nonlocal_foraging,
+                          is_local_foraging_ensured=is_local_foraging_ensured,
+                          num_workers=parameters["main_para"]["INTERACTION_SCORING_WORKERS"]):
+            self.mark_stale()
+        if self.is_stale:
+            self.refresh()
+
+        minimum_population_size = np.array([x.minimum_population_size for x in self.species_list], dtype=float)
+        for priority in range(4):
+            if len(function_priority_dictionary[priority]) > 0:
+                for function in function_priority_dictionary[priority]:
+                    if function == "growth":
+                        self.growth(time=time, alpha=alpha, is_current=is_current)
+                    elif function == "foraging":
+                        self.foraging(time=time, current_patch_list=current_patch_list,
+                                      is_ode_recordings=is_ode_recordings)
+                    elif function == "direct_impact":
+                        self.direct_impact(time=time)
+                    elif function == "dispersal":
+                        self.dispersal(is_dispersal=is_dispersal, current_patch_list=current_patch_list)
+                    else:
+                        raise Exception(f"Ecological function {function} not recognised.")
+
+                # enact the sub-step and then check that the net result has not made any population go negative
+                if parameters["main_para"]["MODEL_TIME_TYPE"] == "discrete":
+                    new_population = self.holding_population + self.current_temp_change
+                elif parameters["main_para"]["MODEL_TIME_TYPE"] == "continuous":
+                    new_population = self.holding_population + parameters[
+                        "main_para"]["EULER_STEP"] * self.current_temp_change
+                else:
+                    raise Exception("Model type not recognised in 'main_para[MODEL_TIME_TYPE]' -"
+                                    " discrete or continuous?")
+                new_population[(new_population != 0.0) & (new_population < minimum_population_size)] = 0.0
+                self.holding_population = new_population
+                self.current_temp_change = np.zeros(self.shape)
+
+        # the special case of species for which predation can only prevent death
+        for column, species in enumerate(self.species_list):
+            if species.is_predation_only_prevents_death:
+                local_growth = self.local_growth[:, column]
+                saved_growth = local_growth + self.prey_gain[:, column]
+                holding = np.where(
+                    local_growth < 0,
+                    np.where(saved_growth < 0.0, saved_growth, 0.0) + self.direct_impact_value[:, column] -
+                    self.predation_loss[:, column] + self.population_enter[:, column] -
+                    self.population_leave[:, column],
+                    local_growth + self.direct_impact_value[:, column] - self.predation_loss[:, column] +
+                    self.population_enter[:, column] - self.population_leave[:, column])
+                holding[holding < species.minimum_population_size] = 0.0
+                self.holding_population[:, column] = holding
+
+        self.internal_change = self.holding_population - self.population - self.population_enter + \
+            self.population_leave
+        self.population = self.holding_population.copy()
+
+        # update the objects with everything that is recorded in their histories
+        self.scatter("population", self.population)
+        self.scatter("holding_population", self.holding_population)
+        self.scatter("internal_change", self.internal_change)
+        self.scatter("population_enter", self.population_enter)
+        self.scatter("population_leave", self.population_leave)
+        self.scatter("potential_dispersal", self.potential_dispersal)
+        if is_ode_recordings:
+            self.write_components_to_objects()
+            for local_pop in self.local_pop_list:
+                local_pop.ode_recordings(time=time, step=step)
+        if self.history_store is not None:
+            self.history_store.record_all(np.stack([self.population, self.internal_change, self.population_leave,
+                                                    self.population_enter, self.potential_dispersal], axis=-1))
+        else:
+            for local_pop in self.local_pop_list:
+                local_pop.record_population_history()
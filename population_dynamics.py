@@ -1,28 +1,37 @@
 import copy
+import heapq
+import multiprocessing
 import random
 import numpy as np
+from scipy.sparse import csr_matrix
 
+# state of each worker process forked in build_interacting_populations_list(), only set in the workers themselves by
+# init_foraging_scores_worker()
+FORKED_STATE = {}
 
-def reset_temp_values(patch_list):
-    # reset all movement and feeding values
+
+def reset_temp_values(patch_list, is_ode_recordings=False):
+    # reset all movement and feeding values (the per-interaction feeding dictionaries are only needed for the ODE
+    # recordings - see set_foraging_records())
     for patch in patch_list:
         patch.sum_competing_for_resources = 0.0
         for local_pop in patch.local_populations.values():
             local_pop.current_temp_change = 0.0
             local_pop.holding_population = local_pop.population
-            local_pop.g_values = {}
-            local_pop.kills = {
-                "g0": {},
-                "g1": {},
-                "g2": {},
-                "g3": {},
-            }
-            local_pop.killed = {
-                "g0": {},
-                "g1": {},
-                "g2": {},
-                "g3": {},
-            }
+            if is_ode_recordings:
+                local_pop.g_values = {}
+                local_pop.kills = {
+                    "g0": {},
+                    "g1": {},
+                    "g2": {},
+                    "g3": {},
+                }
+                local_pop.killed = {
+                    "g0": {},
+                    "g1": {},
+                    "g2": {},
+                    "g3": {},
+                }
     reset_dispersal_values(patch_list=patch_list)
 
 
@@ -31,7 +40,6 @@ def reset_dispersal_values(patch_list):
     for patch in patch_list:
         for local_pop in patch.local_populations.values():
             local_pop.population_leave = 0.0
-            local_pop.leaving_array = np.zeros([len(patch_list), 1])
             local_pop.population_enter = 0.0
 
 
@@ -44,6 +52,10 @@ def temporal_function(parameter, time):
     elif parameter["type"] == "sine":
         value = parameter["amplitude"] * np.sin(time * (2.0 * np.pi / parameter["period"]) + parameter["phase_shift"]) \
                 + parameter["vertical_shift"]
+        if parameter.get("quantisation") is not None:
+            # snap to multiples of the quantisation so that the value (and so the network) only changes when it
+            # crosses one of these levels rather than every day
+            value = np.round(value / parameter["quantisation"]) * parameter["quantisation"]
     elif parameter["type"] == "vector_exp":
         index = np.mod(time, np.floor(parameter["period"]))
         value = parameter["vector_exp"][index]
@@ -135,6 +147,15 @@ def dispersal_scheme_adaptive(species_from, movement_score, parameters):
     return leaving_pop
 
 
+DISPERSAL_FUNCTION = {
+    "step_poly": dispersal_scheme_step_polynomial,
+    "diffusion": dispersal_scheme_uniform_diffusion,
+    "stochastic_quantity": dispersal_scheme_stochastic_quantity,
+    "stochastic_binomial": dispersal_scheme_stochastic_binomial,
+    "adaptive": dispersal_scheme_adaptive,
+}
+
+
 # ----------------------------------------------------------------- #
 
 def calculate_possible_movement(species_from, patch_to_num, parameters):
@@ -142,17 +163,10 @@ def calculate_possible_movement(species_from, patch_to_num, parameters):
     # the species-and-habitat-specific traversal score
     movement_score = species_from.actual_dispersal_targets[patch_to_num]
     # pass to the species-specific dispersal mechanism:
-    dispersal_function = {
-        "step_poly": dispersal_scheme_step_polynomial,
-        "diffusion": dispersal_scheme_uniform_diffusion,
-        "stochastic_quantity": dispersal_scheme_stochastic_quantity,
-        "stochastic_binomial": dispersal_scheme_stochastic_binomial,
-        "adaptive": dispersal_scheme_adaptive,
-    }
     if species_from.species.current_dispersal_mechanism == "no_dispersal":
         pass
     else:
-        leaving_pop = dispersal_function[species_from.species.current_dispersal_mechanism](species_from,
+        leaving_pop = DISPERSAL_FUNCTION[species_from.species.current_dispersal_mechanism](species_from,
                                                                                            movement_score, parameters)
         # 1 if destination is a higher patch number, -1 otherwise
         directional_difference = 2 * int(patch_to_num - species_from.patch_num > 0) - 1
@@ -185,9 +199,11 @@ def pre_dispersal_of_local_population(
         # if True, can call this function in a perturbation and force dispersal even if not normally permitted
 ):
     # Calculates movements FROM a given patch. But not actually enacted yet, as these all need to occur simultaneously.
+    # Note that the regular dispersal sub-step uses the equivalent whole-system dispersal_kernel() instead.
 
     # Record current population as the potential dispersers (for source calculation)
     local_pop.potential_dispersal = local_pop.holding_population
+    local_pop.leaving_array = np.zeros([len(patch_list), 1])
 
     # First, check all conditions, including: is there somewhere that CAN actually be travelled to?
     if local_pop.holding_population > 0.0 and len(local_pop.actual_dispersal_targets) > 0 \
@@ -264,8 +280,266 @@ def pre_dispersal_of_local_population(
             species_find.population_enter += species_find.species.dispersal_efficiency * float(
                 local_pop.leaving_array[patch_to_num])
 
+    # record the (destination patch numbers, amounts) for plotting, as set_leaving_flows() does for the regular sub-step
+    destinations = np.array(sorted(local_pop.actual_dispersal_targets), dtype=int)
+    local_pop.leaving_flows = (destinations, local_pop.leaving_array[destinations, 0])
+
+
+def scalar_power(base, exponent):
+    # base ** exponent for each element, equal to the scalar pow() of the object model. Numpy's vectorised power may
+    # differ from it in the last bit, except for exponents of 0 and 1 (which are exact), so scalar pow() is only
+    # evaluated for the other exponents, and then once for each distinct (base, exponent) pair.
+    base, exponent = np.broadcast_arrays(np.asarray(base, dtype=float), np.asarray(exponent, dtype=float))
+    result = np.power(base, exponent)
+    is_general = (exponent != 0.0) & (exponent != 1.0)
+    if is_general.any():
+        pairs, pair_index = np.unique(np.stack([base[is_general], exponent[is_general]], axis=-1), axis=0,
+                                      return_inverse=True)
+        pair_power = np.array([x ** y for x, y in pairs.tolist()], dtype=float)
+        result[is_general] = pair_power[pair_index.ravel()]
+    return result
+
+
+def dispersal_movement(species, parameters, source, target, score, holding, carrying_capacity, non_dispersal_change,
+                       draws):
+    # calculate_possible_movement() for an array of (source patch, target patch) entries of a single species, where
+    # holding, carrying_capacity and non_dispersal_change are those of the source local population of each entry, and
+    # draws holds the random values (one per entry) if the dispersal mechanism is stochastic
+    mu_overall = parameters["pop_dyn_para"]["MU_OVERALL"]
+    mechanism = species.current_dispersal_mechanism
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if mechanism == "no_dispersal":
+            leaving = np.zeros(len(score))
+        else:
+            if mechanism == "step_poly":
+                poly_para = species.current_coefficients_lists
+                density = holding / carrying_capacity
+                leaver_proportion = {}
+                for key in ["UNDER", "OVER"]:
+                    leaver_proportion[key] = np.zeros(len(density))
+                    for power, coefficient in enumerate(poly_para[key]):
+                        leaver_proportion[key] = leaver_proportion[key] + coefficient * scalar_power(density, power)
+                proportion = np.where(density <= poly_para["DENSITY_THRESHOLD"], leaver_proportion["UNDER"],
+                                      leaver_proportion["OVER"])
+                leaving = mu_overall * score * proportion * carrying_capacity
+            elif mechanism == "diffusion":
+                leaving = mu_overall * score * holding
+            elif mechanism in ["stochastic_quantity", "stochastic_binomial"]:
+                leaving = draws * mu_overall * score * holding
+            elif mechanism == "adaptive":
+                previous_pop = holding - non_dispersal_change
+                leaving = np.where((non_dispersal_change < 0.0) & (holding > 0.0) & (previous_pop != 0.0),
+                                   mu_overall * score * (-non_dispersal_change) / previous_pop * holding, 0.0)
+            else:
+                raise Exception(f"Dispersal mechanism {mechanism} not recognised.")
+            # 1 if destination is a higher patch number, -1 otherwise
+            directional_difference = 2 * (target - source > 0).astype(int) - 1
+            direction = species.current_dispersal_direction
+            leaving = np.where(directional_difference * direction > 0, (1.0 + abs(direction)) * leaving,
+                               (1.0 - abs(direction)) * leaving)
+    species_min_amount_to_move = max(0.0, species.minimum_population_size)
+    leaving = np.where(leaving < species_min_amount_to_move,
+                       species_min_amount_to_move if species.always_move_with_minimum else 0.0, leaving)
+    return np.where(holding < leaving, holding, leaving)
+
+
+def random_dispersal_reduction(leaving, holding, population_leave, minimum_population_size):
+    # incrementally reduce random amounts to random destinations (modifying the leaving array of a single local
+    # population in place), exactly as in pre_dispersal_of_local_population()
+    temp_pop_leave = population_leave
+    entries = list(range(len(leaving)))
+    while temp_pop_leave > holding:
+        entry = random.choice(entries)
+        current_amount = leaving[entry]
+        if current_amount >= minimum_population_size:
+            draw_reduction_to = np.random.uniform(0.0, current_amount)
+            if draw_reduction_to < minimum_population_size:
+                temp_pop_leave -= current_amount
+                leaving[entry] = 0.0
+            else:
+                temp_pop_leave -= (current_amount - draw_reduction_to)
+                leaving[entry] = draw_reduction_to
+
+
+def dispersal_kernel(species_list, parameters, holding_population, carrying_capacity, non_dispersal_change,
+                     current_patch_list):
+    # Dispersal from every local population of the current patches at once, using the sparse matrices compiled by
+    # build_dispersal_target_matrices(). Arrays are indexed (patch, species), and non_dispersal_change is only needed
+    # if some species has the adaptive dispersal mechanism (otherwise it may be None).
+    #
+    # This is pre_dispersal_of_local_population() for all local populations: the same polynomial, direction, minimum
+    # amount and rescaling rules and floating-point operations, with all random draws taken in the same order.
+    # Returns the population_leave and population_enter arrays, and for each species the final leaving flows as
+    # (source patches, row starts, target patches, amounts) in the same layout as a CSR matrix.
+    num_patches, num_species = holding_population.shape
+    current = np.array(current_patch_list, dtype=int)
+    population_leave = np.zeros((num_patches, num_species))
+    population_enter = np.zeros((num_patches, num_species))
+    if non_dispersal_change is None:
+        non_dispersal_change = np.zeros((num_patches, num_species))
+
+    # gather the (source, target) entries of the actively-dispersing local populations of each species, in
+    # current_patch_list order
+    movement = []
+    order_keys = []
+    for column, species in enumerate(species_list):
+        matrix = species.dispersal_target_matrix
+        if not species.is_dispersal or matrix is None:
+            rows = np.zeros(0, dtype=int)
+            length = np.zeros(0, dtype=int)
+            positions = np.zeros(0, dtype=int)
+        else:
+            row_length = matrix.indptr[current + 1] - matrix.indptr[current]
+            is_active = (holding_population[current, column] > 0.0) & (row_length > 0)
+            rows = current[is_active]
+            length = row_length[is_active]
+            positions = np.flatnonzero(is_active)
+        start = np.concatenate(([0], np.cumsum(length))).astype(int)
+        entry_row = np.repeat(np.arange(len(rows)), length)
+        if len(rows) > 0:
+            entry = np.repeat(matrix.indptr[rows] - start[:-1], length) + np.arange(start[-1])
+            target = matrix.indices[entry]
+            score = matrix.data[entry]
+        else:
+            target = np.zeros(0, dtype=int)
+            score = np.zeros(0)
+        holding = holding_population[rows, column]
+        data = {
+            "rows": rows,
+            "start": start,
+            "entry_row": entry_row,
+            "target": target,
+            "score": score,
+            "holding": holding,
+            "is_stochastic": species.current_dispersal_mechanism in ["stochastic_quantity", "stochastic_binomial"],
+            "leaving": np.zeros(len(target)),
+            "population_leave": np.zeros(len(rows)),
+            "is_random_reduction": np.zeros(len(rows), dtype=bool),
+            "is_rescaled": np.zeros(len(rows), dtype=bool),
+        }
+        if not data["is_stochastic"] and len(rows) > 0:
+            # everything but the extra individual and the random reductions can be calculated at once
+            data["leaving"] = dispersal_movement(
+                species=species, parameters=parameters, source=rows[entry_row], target=target, score=score,
+                holding=holding[entry_row], carrying_capacity=carrying_capacity[rows, column][entry_row],
+                non_dispersal_change=non_dispersal_change[rows, column][entry_row], draws=None)
+            np.add.at(data["population_leave"], entry_row, data["leaving"])
+            is_over = data["population_leave"] > holding
+            is_uniform = is_over & (holding > length * species.minimum_population_size)
+            data["is_random_reduction"] = is_over & ~is_uniform
+            data["is_rescaled"] = is_over
+            if np.any(is_uniform):
+                # reduce all amounts uniformly
+                is_uniform_entry = is_uniform[entry_row]
+                data["leaving"][is_uniform_entry] = data["leaving"][is_uniform_entry] * holding[entry_row][
+                    is_uniform_entry] / data["population_leave"][entry_row][is_uniform_entry]
+                data["population_leave"][is_uniform] = ordered_leaving_sums(data=data, is_row=is_uniform)[is_uniform]
+        movement.append(data)
+        order_keys.append(positions * num_species + column)
+
+    # then visit every local population in the order of the object model to take the random draws
+    species_keys = np.concatenate([np.full(len(x), column) for column, x in enumerate(order_keys)]).astype(int)
+    row_keys = np.concatenate([np.arange(len(x)) for x in order_keys]).astype(int)
+    visit_order = np.argsort(np.concatenate(order_keys), kind="stable")
+    pending = []
+    for column, row_index in zip(species_keys[visit_order].tolist(), row_keys[visit_order].tolist()):
+        data = movement[column]
+        species = species_list[column]
+        if data["is_stochastic"]:
+            flush_extra_dispersal_individuals(pending=pending, movement=movement, species_list=species_list,
+                                              parameters=parameters)
+            entry_start, entry_end = data["start"][row_index], data["start"][row_index + 1]
+            row = data["rows"][row_index]
+            holding = data["holding"][row_index]
+            if species.current_dispersal_mechanism == "stochastic_quantity":
+                draws = np.random.rand(entry_end - entry_start)
+            else:
+                draws = np.random.binomial(1, max(0.0, min(1.0, species.current_dispersal_mobility)),
+                                           size=entry_end - entry_start)
+            leaving = dispersal_movement(
+                species=species, parameters=parameters, source=row, target=data["target"][entry_start:entry_end],
+                score=data["score"][entry_start:entry_end], holding=holding,
+                carrying_capacity=carrying_capacity[row, column],
+                non_dispersal_change=non_dispersal_change[row, column], draws=draws)
+            data["leaving"][entry_start:entry_end] = leaving
+            data["population_leave"][row_index] = float(sum(leaving.tolist()))
+            if data["population_leave"][row_index] > holding:
+                data["is_rescaled"][row_index] = True
+                if holding > (entry_end - entry_start) * species.minimum_population_size:
+                    data["leaving"][entry_start:entry_end] = leaving * holding / data["population_leave"][row_index]
+                else:
+                    data["is_random_reduction"][row_index] = True
+        if data["is_random_reduction"][row_index]:
+            flush_extra_dispersal_individuals(pending=pending, movement=movement, species_list=species_list,
+                                              parameters=parameters)
+            entry_start, entry_end = data["start"][row_index], data["start"][row_index + 1]
+            random_dispersal_reduction(leaving=data["leaving"][entry_start:entry_end],
+                                       holding=data["holding"][row_index],
+                                       population_leave=data["population_leave"][row_index],
+                                       minimum_population_size=species.minimum_population_size)
+        if data["is_rescaled"][row_index]:
+            if data["is_stochastic"] or data["is_random_reduction"][row_index]:
+                is_row = np.zeros(len(data["rows"]), dtype=bool)
+                is_row[row_index] = True
+                data["population_leave"][row_index] = ordered_leaving_sums(data=data, is_row=is_row)[row_index]
+        else:
+            pending.append((column, row_index))
+    flush_extra_dispersal_individuals(pending=pending, movement=movement, species_list=species_list,
+                                      parameters=parameters)
+
+    # finally, update the destinations with the confirmed leavers, scaled by the dispersal efficiency
+    leaving_flows = []
+    for column, species in enumerate(species_list):
+        data = movement[column]
+        population_leave[data["rows"], column] = data["population_leave"]
+        enter = np.zeros(num_patches)
+        np.add.at(enter, data["target"], species.dispersal_efficiency * data["leaving"])
+        population_enter[:, column] = enter
+        leaving_flows.append((data["rows"], data["start"], data["target"], data["leaving"]))
+    return population_leave, population_enter, leaving_flows
+
+
+def ordered_leaving_sums(data, is_row):
+    # after rescaling, the total leaving is re-summed over the full-length leaving array (i.e. in target patch order)
+    is_entry = is_row[data["entry_row"]]
+    entry_order = np.lexsort((data["target"][is_entry], data["entry_row"][is_entry]))
+    sums = np.zeros(len(data["rows"]))
+    np.add.at(sums, data["entry_row"][is_entry][entry_order], data["leaving"][is_entry][entry_order])
+    return sums
+
+
+def flush_extra_dispersal_individuals(pending, movement, species_list, parameters):
+    # For the local populations (in order) that did not need rescaling, add optional stochastic modifiers to see if
+    # ONE more individual wanders out, with the binomial draws for all of them taken in a single call
+    if len(pending) > 0:
+        probability = [parameters["species_para"][species_list[column].name]["DISPERSAL_PARA"][
+                           "BINOMIAL_EXTRA_INDIVIDUAL"] for column, row_index in pending]
+        binomial_draws = np.random.binomial(1, probability).tolist()
+        for (column, row_index), binomial in zip(pending, binomial_draws):
+            data = movement[column]
+            species = species_list[column]
+            if data["holding"][row_index] - data["population_leave"][row_index] >= \
+                    species.minimum_population_size and binomial:
+                data["population_leave"][row_index] += species.minimum_population_size
+                # select one destination at random to receive the +1 member, scaled so that the dispersal penalty
+                # will not affect this individual
+                entry = random.choice(list(range(data["start"][row_index], data["start"][row_index + 1])))
+                data["leaving"][entry] += species.minimum_population_size / species.dispersal_efficiency
+        pending.clear()
+
+
+def set_leaving_flows(patch_list, species_list, leaving_flows):
+    # record the (destination patch numbers, amounts) of the latest dispersal on each local population, for plotting
+    for patch in patch_list:
+        for local_pop in patch.local_populations.values():
+            local_pop.leaving_flows = None
+    for species, (rows, start, target, leaving) in zip(species_list, leaving_flows):
+        for row_index, row in enumerate(rows.tolist()):
+            patch_list[row].local_populations[species.name].leaving_flows = (
+                target[start[row_index]:start[row_index + 1]], leaving[start[row_index]:start[row_index + 1]])
+
 
-def find_best_actual_scores(local_pop, target, query_attr, max_path_attr, mobility_scaling_attr,
+def find_best_actual_scores(local_pop, target, bounded_costs, query_attr, max_path_attr, mobility_scaling_attr,
                             heaviside_threshold_attr, is_heaviside_manual, heaviside_manual_value,
                             home_patch_traversal_score, is_scaled_target_size):
     # used by both build_actual_dispersal_targets() and build_interacting_populations_list() to determine the
@@ -285,11 +559,14 @@ def find_best_actual_scores(local_pop, target, query_attr, max_path_attr, mobili
                 path_length = target["routes"]["best"][0]
             else:
                 cost = float('inf')
-                # otherwise look for best reachable
-                for try_path_length in range(1, getattr(local_pop.species, max_path_attr) + 1):
-                    if try_path_length in target:
-                        cost = min(cost, target[try_path_length][0])
-                        path_length = try_path_length
+                # otherwise look for best reachable - bounded_costs holds the exact cheapest cost for each number of
+                # steps (up to ASSUMED_MAX_PATH_LENGTH) as built in system_state.build_all_species_bounded_path_costs()
+                allowed_costs = bounded_costs[1: int(getattr(local_pop.species, max_path_attr)) + 1]
+                if len(allowed_costs) > 0:
+                    best_index = int(np.argmin(allowed_costs))
+                    if allowed_costs[best_index] < float('inf'):
+                        cost = allowed_costs[best_index]
+                        path_length = best_index + 1
         else:
             # path unrestricted so just return the best overall cost
             cost = target["routes"]["best"][1]
@@ -317,9 +594,11 @@ def find_best_actual_scores(local_pop, target, query_attr, max_path_attr, mobili
     return score, path_length
 
 
-def build_actual_dispersal_targets(patch_list, species_list, is_dispersal, time):
+def build_actual_dispersal_targets(patch_list, species_list, is_dispersal, time, changed_species=None):
     # Determine a dictionary of which locations can ACTUALLY be reached and with what movement score, given
     # the current dispersal mobility score, minimum link strength, and path length restriction
+    #
+    # If changed_species is given, then only the targets of those species are rebuilt.
     if is_dispersal:
 
         # initialise if running for the first time
@@ -339,8 +618,13 @@ def build_actual_dispersal_targets(patch_list, species_list, is_dispersal, time)
                     species.dispersal_para['DISPERSAL_DIRECTION'], time)
                 species.current_coefficients_lists = temporal_function(
                     species.dispersal_para['COEFFICIENTS_LISTS'], time)
+        if changed_species is None:
+            changed_species = species_list
+        changed_names = set(x.name for x in changed_species)
         for patch in patch_list:
             for local_pop in patch.local_populations.values():
+                if local_pop.species.name not in changed_names:
+                    continue
                 # reset them
                 local_pop.actual_dispersal_targets = {}
                 temp_dict = {}
@@ -359,6 +643,7 @@ def build_actual_dispersal_targets(patch_list, species_list, is_dispersal, time)
                             target_score, unused_path_length = find_best_actual_scores(
                                 local_pop=local_pop,
                                 target=z,
+                                bounded_costs=patch.bounded_path_costs[local_pop.name][reachable_patch_num],
                                 query_attr="is_dispersal_path_restricted",
                                 max_path_attr="current_max_dispersal_path_length",
                                 mobility_scaling_attr="current_dispersal_mobility",
@@ -371,12 +656,233 @@ def build_actual_dispersal_targets(patch_list, species_list, is_dispersal, time)
                             if target_score >= local_pop.species.current_minimum_link_strength_dispersal:
                                 temp_dict[reachable_patch_num] = target_score
                 local_pop.actual_dispersal_targets = temp_dict
+        build_dispersal_target_matrices(patch_list=patch_list, species_list=changed_species)
 
 
-def build_interacting_populations_list(patch_list, species_list, is_nonlocal_foraging, is_local_foraging_ensured, time):
+def build_dispersal_target_matrices(patch_list, species_list):
+    # compile the .actual_dispersal_targets of each species into a sparse (patch from, patch to) matrix of movement
+    # scores for dispersal_kernel(), keeping each row's targets in their dictionary order (the order of movement)
+    for species in species_list:
+        indptr = [0]
+        indices = []
+        data = []
+        for patch in patch_list:
+            actual_dispersal_targets = patch.local_populations[species.name].actual_dispersal_targets
+            indices += list(actual_dispersal_targets.keys())
+            data += list(actual_dispersal_targets.values())
+            indptr.append(len(indices))
+        species.dispersal_target_matrix = csr_matrix(
+            (np.array(data, dtype=float), np.array(indices, dtype=int), np.array(indptr, dtype=int)),
+            shape=(len(patch_list), len(patch_list)))
+
+
+def foraging_score(patch, local_pop, patch_to_num):
+    # the foraging score (zero if below the species' minimum link strength) and path length from a local population
+    # to another patch
+    local_pop_score, path_to_length = find_best_actual_scores(
+        local_pop=local_pop, target=patch.species_movement_scores[local_pop.name][patch_to_num],
+        bounded_costs=patch.bounded_path_costs[local_pop.name][patch_to_num],
+        query_attr="is_foraging_path_restricted",
+        max_path_attr="current_max_foraging_path_length",
+        mobility_scaling_attr="current_foraging_mobility",
+        is_heaviside_manual=False,
+        heaviside_manual_value=None,
+        heaviside_threshold_attr="current_foraging_kappa",
+        home_patch_traversal_score=patch.this_habitat_species_traversal[local_pop.species.name],
+        is_scaled_target_size=False,
+    )
+    if local_pop_score < local_pop.species.current_minimum_link_strength_foraging:
+        local_pop_score = 0.0
+    return local_pop_score, path_to_length
+
+
+def foraging_scores_of_patch(patch):
+    # the non-local foraging scores of each local population of a patch to each of its adjacent patches, keyed by
+    # local population name and then patch to number
+    scores = {}
+    for local_pop in patch.local_populations.values():
+        scores[local_pop.name] = {}
+        if local_pop.species.is_nonlocal_foraging:
+            for patch_to_num in patch.adjacency_lists[local_pop.name]:
+                if patch_to_num != patch.number:
+                    scores[local_pop.name][patch_to_num] = foraging_score(patch=patch, local_pop=local_pop,
+                                                                          patch_to_num=patch_to_num)
+    return scores
+
+
+def init_foraging_scores_worker(patch_list):
+    # initializer of the worker processes forked by build_interacting_populations_list(), which inherit the patch list
+    # (and species values) with the fork rather than having them pickled
+    FORKED_STATE["patch_list"] = patch_list
+
+
+def foraging_scores_worker(patch_num):
+    # runs in a worker process forked by build_interacting_populations_list()
+    return foraging_scores_of_patch(patch=FORKED_STATE["patch_list"][patch_num])
+
+
+def lookup_foraging_score(patch, local_pop, patch_to_num):
+    # scores of patches that are not in the local population's own adjacency list (which is possible as the adjacency
+    # lists may not be symmetric), or that have been cleared by a change to the species, are calculated when needed
+    if patch_to_num not in local_pop.foraging_scores:
+        local_pop.foraging_scores[patch_to_num] = foraging_score(patch=patch, local_pop=local_pop,
+                                                                 patch_to_num=patch_to_num)
+    return local_pop.foraging_scores[patch_to_num]
+
+
+def add_interacting_population(local_pop, interaction_keys, interaction):
+    # append to the local population's list unless an identical entry is already present
+    key = tuple(interaction.values())
+    if key not in interaction_keys[local_pop]:
+        interaction_keys[local_pop].add(key)
+        local_pop.interacting_populations.append(interaction)
+
+
+def add_interaction_pair(patch, local_pop, patch_to, local_pop_to, interaction_keys, is_local_foraging_ensured):
+    # we need to include both, as there may be a local population who can reach but cannot be reached, and we need to
+    # note them as interacting with the other the adjacency lists may not be symmetric, so it is insufficient to just
+    # have one of these
+    this_patch_species_traversal = patch.this_habitat_species_traversal[local_pop.species.name]
+    this_patch_species_feeding = patch.this_habitat_species_feeding[local_pop.species.name]
+
+    # now account for species-specific limitations and foraging path length limits
+    local_pop_score = 0.0
+    local_pop_to_score = 0.0
+    patch_to_species_traversal = patch_to.this_habitat_species_traversal[local_pop_to.species.name]
+    patch_to_species_feeding = patch_to.this_habitat_species_feeding[local_pop_to.species.name]
+
+    path_to_length = 0
+    path_from_length = 0
+    if patch_to.number == patch.number:
+        # for WITHIN-PATCH FEEDING:
+        if is_local_foraging_ensured:
+            # with this global option set to true, within-patch feeding is always set to
+            # precisely 1.0 for any species, as in earlier versions of Artemis
+            local_pop_score = 1.0
+            local_pop_to_score = 1.0
+        else:
+            # normally, within-patch score is now master_mu * species_mu * this_habitat_traversal
+            if local_pop.species.current_foraging_mobility is None:
+                local_pop_score = None
+            else:
+                local_pop_score = local_pop.species.current_foraging_mobility * this_patch_species_traversal
+
+            if local_pop_to.species.current_foraging_mobility is None:
+                local_pop_to_score = None
+            else:
+                local_pop_to_score = local_pop_to.species.current_foraging_mobility * patch_to_species_traversal
+    else:
+        if local_pop.species.is_nonlocal_foraging:
+            # score for THIS species' local population to THAT patch
+            local_pop_score, path_to_length = lookup_foraging_score(
+                patch=patch, local_pop=local_pop, patch_to_num=patch_to.number)
+
+        if local_pop_to.species.is_nonlocal_foraging:
+            # score for THAT species' local population to THIS patch
+            local_pop_to_score, path_from_length = lookup_foraging_score(
+                patch=patch_to, local_pop=local_pop_to, patch_to_num=patch.number)
+
+    # Only actual interactions (at least one-way) get added to the list, and only if the in-patch
+    # feeding score of that species was non-zero
+    if (local_pop_score != 0.0 and this_patch_species_feeding > 0.0) or \
+            (local_pop_to_score != 0.0 and patch_to_species_feeding > 0.0):
+        add_interacting_population(
+            local_pop=local_pop, interaction_keys=interaction_keys,
+            interaction={"object": local_pop_to,
+                         "score_to": local_pop_score,
+                         "score_from": local_pop_to_score,
+                         "is_same_patch": patch_to.number == patch.number,
+                         "path_to_length": path_to_length,
+                         "path_from_length": path_from_length,
+                         })
+        add_interacting_population(
+            local_pop=local_pop_to, interaction_keys=interaction_keys,
+            interaction={"object": local_pop,
+                         "score_to": local_pop_to_score,
+                         "score_from": local_pop_score,
+                         "is_same_patch": patch_to.number == patch.number,
+                         "path_to_length": path_from_length,
+                         "path_from_length": path_to_length,
+                         })
+
+
+def interaction_rank(local_pop, local_pop_to, adjacency_positions, species_column, is_nonlocal_foraging):
+    # the position in the loops of build_interacting_populations_list() at which the interaction between local_pop and
+    # local_pop_to is first found (from either end), which is therefore its position in local_pop's list
+    ranks = []
+    if is_nonlocal_foraging or local_pop.patch_num == local_pop_to.patch_num:
+        for pop_from, pop_to, direction in [(local_pop, local_pop_to, 0), (local_pop_to, local_pop, 1)]:
+            if pop_to.patch_num in adjacency_positions[pop_from]:
+                ranks.append((pop_from.patch_num, species_column[pop_from.species.name],
+                              adjacency_positions[pop_from][pop_to.patch_num],
+                              species_column[pop_to.species.name], direction))
+    return min(ranks)
+
+
+def rebuild_interacting_populations_of_species(patch_list, species_list, changed_species, is_nonlocal_foraging,
+                                               is_local_foraging_ensured):
+    # rebuild only the interactions involving the changed species (whose foraging scores may have changed), keeping
+    # every list in the order in which build_interacting_populations_list() would have built it from scratch
+    changed_names = set(x.name for x in changed_species)
+
+    # keep the unaffected entries (and foraging scores), and gather the new ones in the (emptied) lists
+    kept_interactions = {}
+    interaction_keys = {}
+    for patch in patch_list:
+        for local_pop in patch.local_populations.values():
+            if local_pop.species.name in changed_names:
+                kept_interactions[local_pop] = []
+                local_pop.foraging_scores = {}
+            else:
+                kept_interactions[local_pop] = [x for x in local_pop.interacting_populations
+                                                if x["object"].species.name not in changed_names]
+            local_pop.interacting_populations = []
+            interaction_keys[local_pop] = set()
+    for patch in patch_list:
+        for local_pop in patch.local_populations.values():
+            is_changed = local_pop.species.name in changed_names
+            for patch_to_num in patch.adjacency_lists[local_pop.name]:
+                if is_nonlocal_foraging or patch_to_num == patch.number:
+                    patch_to = patch_list[patch_to_num]
+                    for local_pop_to in patch_to.local_populations.values():
+                        if is_changed or local_pop_to.species.name in changed_names:
+                            add_interaction_pair(
+                                patch=patch, local_pop=local_pop, patch_to=patch_to, local_pop_to=local_pop_to,
+                                interaction_keys=interaction_keys, is_local_foraging_ensured=is_local_foraging_ensured)
+
+    # both the kept and the new entries of each list are already in order, so they only need to be merged
+    adjacency_positions = {}
+    for patch in patch_list:
+        for local_pop in patch.local_populations.values():
+            positions = {}
+            for position, patch_to_num in enumerate(patch.adjacency_lists[local_pop.name]):
+                positions.setdefault(patch_to_num, position)
+            adjacency_positions[local_pop] = positions
+    species_column = {species.name: column for column, species in enumerate(species_list)}
+    for local_pop, kept in kept_interactions.items():
+        if len(kept) == 0:
+            continue
+        elif len(local_pop.interacting_populations) == 0:
+            local_pop.interacting_populations = kept
+        else:
+            local_pop.interacting_populations = list(heapq.merge(
+                kept, local_pop.interacting_populations,
+                key=lambda x: interaction_rank(local_pop=local_pop, local_pop_to=x["object"],
+                                               adjacency_positions=adjacency_positions, species_column=species_column,
+                                               is_nonlocal_foraging=is_nonlocal_foraging)))
+
+
+def build_interacting_populations_list(patch_list, species_list, is_nonlocal_foraging, is_local_foraging_ensured, time,
+                                       num_workers=1, changed_species=None):
     # this function should NOT be only looking at non-zero population sizes, as the list will not be rebuilt
     # if they are populated at a later time. It also involves the within-patch predator-prey interactions, so
     # do NOT skip this method if is_nonlocal_foraging is false
+    #
+    # The non-local foraging scores of each patch are independent, so they are calculated first (optionally across a
+    # pool of num_workers forked processes) and then looked up when building the lists.
+    #
+    # If changed_species is given, then only the interactions involving those species are rebuilt (the lists must
+    # otherwise be up-to-date).
 
     # initialise if running for the first time
     for species in species_list:
@@ -397,118 +903,74 @@ def build_interacting_populations_list(patch_list, species_list, is_nonlocal_for
                 species.predation_para["PREDATION_FOCUS"], time)
             species.current_predation_rate = temporal_function(species.predation_para["PREDATION_RATE"], time)
 
+    if changed_species is not None:
+        rebuild_interacting_populations_of_species(
+            patch_list=patch_list, species_list=species_list, changed_species=changed_species,
+            is_nonlocal_foraging=is_nonlocal_foraging, is_local_foraging_ensured=is_local_foraging_ensured)
+        build_interaction_arrays(patch_list=patch_list, species_list=species_list)
+        return
+
+    # calculate the non-local foraging scores of every patch, which are then kept by each local population
+    foraging_scores = [{} for _ in patch_list]
+    if is_nonlocal_foraging:
+        if num_workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            with multiprocessing.get_context("fork").Pool(
+                    processes=num_workers, initializer=init_foraging_scores_worker, initargs=(patch_list,)) as pool:
+                foraging_scores = pool.map(foraging_scores_worker, range(len(patch_list)),
+                                           chunksize=max(1, len(patch_list) // (4 * num_workers)))
+        else:
+            foraging_scores = [foraging_scores_of_patch(patch=patch) for patch in patch_list]
+
     # reset interacting population lists
     for patch in patch_list:
         for local_pop in patch.local_populations.values():
             local_pop.interacting_populations = []
-    # Build list of dictionaries of all the populations that each population can interact with (in either way)
+            local_pop.foraging_scores = foraging_scores[patch.number].get(local_pop.name, {})
+    # Build list of dictionaries of all the populations that each population can interact with (in either way).
+    # Each interaction is found from both ends when two populations CAN both reach each other, so the entries already
+    # in each list are tracked to prevent duplicates (which lead to inconsistencies in the predation calculations)
+    interaction_keys = {}
+    for patch in patch_list:
+        for local_pop in patch.local_populations.values():
+            interaction_keys[local_pop] = set()
     for patch in patch_list:
         for local_pop in patch.local_populations.values():
-            this_patch_species_traversal = patch.this_habitat_species_traversal[local_pop.species.name]
-            this_patch_species_feeding = patch.this_habitat_species_feeding[local_pop.species.name]
-
             for patch_to_num in patch.adjacency_lists[local_pop.name]:
                 patch_to = patch_list[patch_to_num]
 
                 # only permit including local_populations of other patches if stated
                 if is_nonlocal_foraging or patch_to_num == patch.number:
-
                     for local_pop_to in patch_to.local_populations.values():
-                        # we need to include both, as there may be a local population who can reach but cannot be
-                        # reached, and we need to note them as interacting with the other the adjacency lists may not
-                        # be symmetric, so it is insufficient to just have one of these
-
-                        # now account for species-specific limitations and foraging path length limits
-                        local_pop_score = 0.0
-                        local_pop_to_score = 0.0
-                        patch_to_species_traversal = patch_to.this_habitat_species_traversal[local_pop_to.species.name]
-                        patch_to_species_feeding = patch_to.this_habitat_species_feeding[local_pop_to.species.name]
-
-                        path_to_length = 0
-                        path_from_length = 0
-                        if patch_to_num == patch.number:
-                            # for WITHIN-PATCH FEEDING:
-                            if is_local_foraging_ensured:
-                                # with this global option set to true, within-patch feeding is always set to
-                                # precisely 1.0 for any species, as in earlier versions of Artemis
-                                local_pop_score = 1.0
-                                local_pop_to_score = 1.0
-                            else:
-                                # normally, within-patch score is now master_mu * species_mu * this_habitat_traversal
-                                if local_pop.species.current_foraging_mobility is None:
-                                    local_pop_score = None
-                                else:
-                                    local_pop_score = \
-                                        local_pop.species.current_foraging_mobility * this_patch_species_traversal
-
-                                if local_pop_to.species.current_foraging_mobility is None:
-                                    local_pop_to_score = None
-                                else:
-                                    local_pop_to_score = \
-                                        local_pop_to.species.current_foraging_mobility * patch_to_species_traversal
-                        else:
-                            if local_pop.species.is_nonlocal_foraging:
-                                # score dictionary for THIS species' local population to THAT patch
-                                z = patch.species_movement_scores[local_pop.name][patch_to_num]
-                                local_pop_score, path_to_length = find_best_actual_scores(
-                                    local_pop=local_pop, target=z,
-                                    query_attr="is_foraging_path_restricted",
-                                    max_path_attr="current_max_foraging_path_length",
-                                    mobility_scaling_attr="current_foraging_mobility",
-                                    is_heaviside_manual=False,
-                                    heaviside_manual_value=None,
-                                    heaviside_threshold_attr="current_foraging_kappa",
-                                    home_patch_traversal_score=this_patch_species_traversal,
-                                    is_scaled_target_size=False,
-                                )
-                                if local_pop_score < local_pop.species.current_minimum_link_strength_foraging:
-                                    local_pop_score = 0.0
-
-                            if local_pop_to.species.is_nonlocal_foraging:
-                                # score dictionary for THAT species' local population to THIS patch
-                                z = patch_to.species_movement_scores[local_pop_to.name][patch.number]
-                                local_pop_to_score, path_from_length = find_best_actual_scores(
-                                    local_pop=local_pop_to, target=z,
-                                    query_attr="is_foraging_path_restricted",
-                                    max_path_attr="current_max_foraging_path_length",
-                                    mobility_scaling_attr="current_foraging_mobility",
-                                    is_heaviside_manual=False,
-                                    heaviside_manual_value=None,
-                                    heaviside_threshold_attr="current_foraging_kappa",
-                                    home_patch_traversal_score=patch_to_species_traversal,
-                                    is_scaled_target_size=False,
-                                )
-                                if local_pop_to_score < local_pop_to.species.current_minimum_link_strength_foraging:
-                                    local_pop_to_score = 0.0
-
-                        # Only actual interactions (at least one-way) get added to the list, and only if the in-patch
-                        # feeding score of that species was non-zero
-                        if (local_pop_score != 0.0 and this_patch_species_feeding > 0.0) or \
-                                (local_pop_to_score != 0.0 and patch_to_species_feeding > 0.0):
-                            local_pop.interacting_populations.append({"object": local_pop_to,
-                                                                      "score_to": local_pop_score,
-                                                                      "score_from": local_pop_to_score,
-                                                                      "is_same_patch": patch_to_num == patch.number,
-                                                                      "path_to_length": path_to_length,
-                                                                      "path_from_length": path_from_length,
-                                                                      })
-                            local_pop_to.interacting_populations.append({"object": local_pop,
-                                                                         "score_to": local_pop_to_score,
-                                                                         "score_from": local_pop_score,
-                                                                         "is_same_patch": patch_to_num == patch.number,
-                                                                         "path_to_length": path_from_length,
-                                                                         "path_from_length": path_to_length,
-                                                                         })
-
-    # check that there are no duplicates - this will be caused by two populations who CAN both reach each other,
-    # and this leads to inconsistencies in the predation calculations
-    for patch in patch_list:
-        for local_pop in patch.local_populations.values():
-            temp_list = []
-            for x in local_pop.interacting_populations:
-                if x not in temp_list:
-                    temp_list.append(x)
-            local_pop.interacting_populations = temp_list
+                        add_interaction_pair(
+                            patch=patch, local_pop=local_pop, patch_to=patch_to, local_pop_to=local_pop_to,
+                            interaction_keys=interaction_keys, is_local_foraging_ensured=is_local_foraging_ensured)
+    build_interaction_arrays(patch_list=patch_list, species_list=species_list)
+
+
+def build_interaction_arrays(patch_list, species_list):
+    # compile the .interacting_populations of each species' local populations into flat arrays for foraging_kernel(),
+    # i.e. a list of (predator patch, prey patch, prey species) entries, kept in the order of each list
+    species_column = {species.name: column for column, species in enumerate(species_list)}
+    for species in species_list:
+        predator_patch = []
+        prey_patch = []
+        prey_column = []
+        score_to = []
+        path_to_length = []
+        for patch in patch_list:
+            for population in patch.local_populations[species.name].interacting_populations:
+                predator_patch.append(patch.number)
+                prey_patch.append(population["object"].patch_num)
+                prey_column.append(species_column[population["object"].species.name])
+                score_to.append(population["score_to"])
+                path_to_length.append(population["path_to_length"])
+        species.interaction_arrays = {
+            "predator_patch": np.array(predator_patch, dtype=int),
+            "prey_patch": np.array(prey_patch, dtype=int),
+            "prey_column": np.array(prey_column, dtype=int),
+            "score_to": np.array(score_to, dtype=float),
+            "path_to_length": np.array(path_to_length, dtype=int),
+        }
 
 
 def checker(output_attribute, input_temporal, is_change):
@@ -518,47 +980,116 @@ def checker(output_attribute, input_temporal, is_change):
     return input_temporal, is_change
 
 
-def change_checker(species_list, patch_list, time, step, is_dispersal, is_nonlocal_foraging, is_local_foraging_ensured):
+def compile_temporal_parameter(parameter):
+    # pre-evaluates a temporally-varying parameter over one cycle, along with the number of days from each point of the
+    # cycle until the value next changes, so that change_checker() can skip days on which nothing can have changed
+    if parameter["type"] is None or parameter["type"] == "constant":
+        cycle = [temporal_function(parameter, 0)]
+    elif parameter["type"] in ["vector_exp", "vector_imp"]:
+        cycle = [temporal_function(parameter, phase) for phase in range(int(np.floor(parameter["period"])))]
+    elif parameter["type"] == "sine":
+        # not periodic in whole days in general, so evaluated as needed
+        return {"parameter": parameter, "cycle": None, "days_to_change": None}
+    else:
+        raise Exception("Type not recognised.")
+    days_to_change = []
+    for phase in range(len(cycle)):
+        days = np.inf
+        for offset in range(1, len(cycle)):
+            if cycle[(phase + offset) % len(cycle)] != cycle[phase]:
+                days = offset
+                break
+        days_to_change.append(days)
+    return {"parameter": parameter, "cycle": cycle, "days_to_change": days_to_change}
+
+
+def temporal_schedule_value(compiled, time):
+    # returns the value of a compiled parameter at this time, and the earliest time at which it may differ
+    if compiled["cycle"] is not None:
+        phase = time % len(compiled["cycle"])
+        return compiled["cycle"][phase], time + compiled["days_to_change"][phase]
+    parameter = compiled["parameter"]
+    value = temporal_function(parameter, time)
+    if parameter.get("quantisation") is None:
+        return value, time + 1
+    # a quantised sine only changes when it crosses a level, so look ahead (at most one period, after which we
+    # simply check again) for the next day on which it does
+    horizon = int(np.ceil(parameter["period"])) + 1
+    for offset in range(1, horizon):
+        if temporal_function(parameter, time + offset) != value:
+            return value, time + offset
+    return value, time + horizon
+
+
+def compile_temporal_schedule(species):
+    # for each entry: [to update, base attribute, nested attribute, list that must be rebuilt when it changes]
+    #
+    # The other parameters are read afresh in every step, so their changes do not require any rebuilding.
+    update_and_check = [
+        ['current_r_value', 'growth_para', 'R', None],
+        ['current_prey_dict', 'predation_para', 'PREY_DICT', None],
+        ['current_predation_efficiency', 'predation_para', 'PREDATION_EFFICIENCY', None],
+        ['current_predation_focus', 'predation_para', 'PREDATION_FOCUS', None],
+        ['current_predation_rate', 'predation_para', 'PREDATION_RATE', None],
+        ['current_foraging_mobility', 'predation_para', 'FORAGING_MOBILITY', 'foraging'],
+        ['current_foraging_kappa', 'predation_para', 'FORAGING_KAPPA', 'foraging'],
+        ['current_minimum_link_strength_foraging', 'predation_para', 'MINIMUM_LINK_STRENGTH_FORAGING', 'foraging'],
+        ['current_max_foraging_path_length', 'predation_para', 'MAX_FORAGING_PATH_LENGTH', 'foraging'],
+    ]
+    # don't bother checking dispersal parameters if dispersal is not enabled (remember that is_dispersal is NOT
+    # allowed to vary with time!
+    if species.is_dispersal:
+        update_and_check = update_and_check + [
+            ['current_dispersal_mobility', 'dispersal_para', 'DISPERSAL_MOBILITY', 'dispersal'],
+            ['current_dispersal_direction', 'dispersal_para', 'DISPERSAL_DIRECTION', None],
+            ['current_dispersal_mechanism', 'dispersal_para', 'DISPERSAL_MECHANISM', None],
+            ['current_coefficients_lists', 'dispersal_para', 'COEFFICIENTS_LISTS', None],
+            ['current_minimum_link_strength_dispersal', 'dispersal_para', 'MINIMUM_LINK_STRENGTH_DISPERSAL',
+             'dispersal'],
+            ['current_max_dispersal_path_length', 'dispersal_para', 'MAX_DISPERSAL_PATH_LENGTH', 'dispersal']
+        ]
+    return {
+        "entries": [[_[0], _[3], compile_temporal_parameter(getattr(species, _[1])[_[2]])] for _ in update_and_check],
+        "evaluated_time": None,
+        "next_change_time": None,
+    }
+
+
+def change_checker(species_list, patch_list, time, step, is_dispersal, is_nonlocal_foraging, is_local_foraging_ensured,
+                   num_workers=1):
     # this function deals with the temporal variation of species parameters.
     #
-    # update temporary values of species properties and check if anything has changed
-    is_change = False
+    # update temporary values of species properties and check if anything has changed (returns True if the dispersal
+    # targets or interacting population lists were rebuilt). Only the lists of the species whose relevant parameters
+    # have changed are rebuilt.
+    changed_dispersal_species = []
+    changed_foraging_species = []
     for species in species_list:
+        # the temporal parameters are compiled once per species, and then we need only look them up again when the
+        # earliest of their next possible changes has been reached
+        if species.temporal_schedule is None:
+            species.temporal_schedule = compile_temporal_schedule(species)
+        schedule = species.temporal_schedule
+        if schedule["evaluated_time"] is not None and schedule["evaluated_time"] <= time < schedule["next_change_time"]:
+            continue
+
         # check if any species-dependent properties have changed due to temporal variation.
-        # if so, update the current values and mark a change so that the lists can be rebuilt
-        # for each entry: [to update, base attribute, nested attribute (if needed)]
-        update_and_check = [
-            ['current_r_value', 'growth_para', 'R'],
-            ['current_prey_dict', 'predation_para', 'PREY_DICT'],
-            ['current_predation_efficiency', 'predation_para', 'PREDATION_EFFICIENCY'],
-            ['current_predation_focus', 'predation_para', 'PREDATION_FOCUS'],
-            ['current_predation_rate', 'predation_para', 'PREDATION_RATE'],
-            ['current_foraging_mobility', 'predation_para', 'FORAGING_MOBILITY'],
-            ['current_foraging_kappa', 'predation_para', 'FORAGING_KAPPA'],
-            ['current_minimum_link_strength_foraging', 'predation_para', 'MINIMUM_LINK_STRENGTH_FORAGING'],
-            ['current_max_foraging_path_length', 'predation_para', 'MAX_FORAGING_PATH_LENGTH'],
-        ]
-        # don't bother checking dispersal parameters if dispersal is not enabled (remember that is_dispersal is NOT
-        # allowed to vary with time!
-        if species.is_dispersal:
-            update_and_check = update_and_check + [
-                ['current_dispersal_mobility', 'dispersal_para', 'DISPERSAL_MOBILITY'],
-                ['current_dispersal_direction', 'dispersal_para', 'DISPERSAL_DIRECTION'],
-                ['current_dispersal_mechanism', 'dispersal_para', 'DISPERSAL_MECHANISM'],
-                ['current_coefficients_lists', 'dispersal_para', 'COEFFICIENTS_LISTS'],
-                ['current_minimum_link_strength_dispersal', 'dispersal_para', 'MINIMUM_LINK_STRENGTH_DISPERSAL'],
-                ['current_max_dispersal_path_length', 'dispersal_para', 'MAX_DISPERSAL_PATH_LENGTH']
-            ]
-        for _ in update_and_check:
-            if _[2] is not None:
-                # i.e. if we need to access a dictionary-nested attribute
-                result, is_change = checker(getattr(species, _[0]),
-                                            temporal_function(getattr(species, _[1])[_[2]], time), is_change)
-            else:
-                # or if we can access the attribute for comparison directly
-                result, is_change = checker(getattr(species, _[0]),
-                                            temporal_function(getattr(species, _[1]), time), is_change)
-            setattr(species, _[0], result)
+        # if so, update the current values and mark which of this species' lists need to be rebuilt
+        next_change_time = np.inf
+        is_change = {'dispersal': False, 'foraging': False}
+        for attribute, rebuild_list, compiled in schedule["entries"]:
+            value, next_time = temporal_schedule_value(compiled, time)
+            result, is_attribute_change = checker(getattr(species, attribute), value, False)
+            setattr(species, attribute, result)
+            if rebuild_list is not None and is_attribute_change:
+                is_change[rebuild_list] = True
+            next_change_time = min(next_change_time, next_time)
+        if is_change['dispersal']:
+            changed_dispersal_species.append(species)
+        if is_change['foraging']:
+            changed_foraging_species.append(species)
+        schedule["evaluated_time"] = time
+        schedule["next_change_time"] = next_change_time
 
         # check predation efficiency and focus are suitable only when set (instead of for every predation loop)
         if species.current_predation_efficiency is not None and (
@@ -568,7 +1099,7 @@ def change_checker(species_list, patch_list, time, step, is_dispersal, is_nonloc
         if species.current_predation_focus is not None and species.current_predation_focus < 0.0:
             raise Exception("ERROR: species predation_focus should be non-negative or None")
 
-    if is_change or step == 0:
+    if len(changed_dispersal_species) > 0 or len(changed_foraging_species) > 0 or step == 0:
         # something changed (or we are at the start of the simulation) - need to rebuild the lists!
         # IMPORTANT: this is okay, only so long as we do not change any of:
         # - the fundamental ability of a given species to pass through a given habitat type,
@@ -582,17 +1113,30 @@ def change_checker(species_list, patch_list, time, step, is_dispersal, is_nonloc
         # are specified to change daily by sine function will only update every 10 steps if main_para:steps_to_days=10.
         # This gives us some modulo control over how often to expend computational time updating.
         print(f" ...Step {step}: species behaviour change identified.")
-        build_actual_dispersal_targets(
-            patch_list=patch_list, species_list=species_list,
-            is_dispersal=is_dispersal, time=time)
-        build_interacting_populations_list(
-            patch_list=patch_list, species_list=species_list,
-            is_nonlocal_foraging=is_nonlocal_foraging, is_local_foraging_ensured=is_local_foraging_ensured,
-            time=time)
+        if step == 0:
+            # rebuild everything
+            changed_dispersal_species = None
+            changed_foraging_species = None
+        elif len(changed_foraging_species) == len(species_list):
+            changed_foraging_species = None
+        if changed_dispersal_species is None or len(changed_dispersal_species) > 0:
+            build_actual_dispersal_targets(
+                patch_list=patch_list, species_list=species_list,
+                is_dispersal=is_dispersal, time=time, changed_species=changed_dispersal_species)
+        if changed_foraging_species is None or len(changed_foraging_species) > 0:
+            build_interacting_populations_list(
+                patch_list=patch_list, species_list=species_list,
+                is_nonlocal_foraging=is_nonlocal_foraging, is_local_foraging_ensured=is_local_foraging_ensured,
+                time=time, num_workers=num_workers, changed_species=changed_foraging_species)
+        return True
+    return False
 
 
 def foraging_calculator(patch_list, time, current_patch_list):
     # this function is responsible for how we decide what predator populations will eat using the g0-g3 system
+    #
+    # Note that foraging_caller() now uses the equivalent whole-system foraging_kernel() instead, and this
+    # object-by-object version is kept as its reference (which the tests check the kernel against).
 
     # calculate idealised feeding (g0 -> g1)
     for patch_num in current_patch_list:
@@ -625,38 +1169,385 @@ def foraging_calculator(patch_list, time, current_patch_list):
                     # g3 is the actual number of kills that will be implemented
 
 
-def growth_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list):
+def positive_part(values):
+    # max(0.0, x) for each element of an array (as the Python max(), returning 0.0 for NaN)
+    return np.where(values > 0.0, values, 0.0)
+
+
+def foraging_kernel(species_list, holding_population, habitat_feeding, current_patch_list, time):
+    # The g0-g3 predation system for all local populations of the current patches at once, using the flat arrays
+    # compiled by build_interaction_arrays(). Arrays are indexed (patch, species), and the interaction entries refer to
+    # local populations by their flat index (patch * number of species + species).
+    #
+    # These are the calculations of Local_population.calculate_predation(), .predator_allocation(),
+    # .predator_shortfall_distribution() and .foraging(), with every running total accumulated in the same order, so
+    # that the results are identical to those of the object-by-object reference foraging_calculator().
+    # Returns the prey_gain and predation_loss arrays, and a dictionary of the per-interaction and per-population
+    # values for set_foraging_records().
+    #
+    # (imported here as local_population imports this module)
+    from local_population import functional_response_array
+
+    num_patches, num_species = holding_population.shape
+    size = num_patches * num_species
+    holding = holding_population.ravel()
+    feeding = habitat_feeding.ravel()
+    column_of = np.tile(np.arange(num_species), num_patches)
+    is_current = np.zeros(num_patches, dtype=bool)
+    is_current[list(current_patch_list)] = True
+    is_current = np.repeat(is_current, num_species)
+    # the order in which the local populations are visited: by patch in the current patch list, then by species
+    position = np.full(num_patches, -1)
+    position[list(current_patch_list)] = np.arange(len(current_patch_list))
+    visit_key = np.repeat(position, num_species) * num_species + column_of
+
+    has_prey = np.array([x.current_prey_dict is not None and len(x.current_prey_dict) != 0 for x in species_list],
+                        dtype=bool)
+    has_predators = np.array([len(x.predator_list) != 0 for x in species_list], dtype=bool)
+    is_distance_reset = is_current & ~((holding > 0.0) & (feeding > 0.0))
+    is_predation = is_current & (holding > 0.0) & (feeding > 0.0) & has_prey[column_of]
+    is_allocation = is_current & (holding > 0.0) & has_predators[column_of]
+
+    # gather the interactions of each predating local population with its currently-available prey
+    predator = [np.zeros(0, dtype=int)]
+    prey = [np.zeros(0, dtype=int)]
+    score_to = [np.zeros(0)]
+    path_to_length = [np.zeros(0, dtype=int)]
+    effort_power = [np.zeros(0)]
+    for column, species in enumerate(species_list):
+        if has_prey[column]:
+            arrays = species.interaction_arrays
+            is_prey_column = np.array([x.name in species.current_prey_dict for x in species_list], dtype=bool)
+            column_preference = np.array([species.current_prey_dict.get(x.name, 0.0) for x in species_list],
+                                         dtype=float)
+            this_predator = arrays["predator_patch"] * num_species + column
+            this_prey = arrays["prey_patch"] * num_species + arrays["prey_column"]
+            is_entry = is_predation[this_predator] & is_prey_column[arrays["prey_column"]] & (
+                    holding[this_prey] > 0.0)
+            predator.append(this_predator[is_entry])
+            prey.append(this_prey[is_entry])
+            score_to.append(arrays["score_to"][is_entry])
+            path_to_length.append(arrays["path_to_length"][is_entry])
+            # the preference-weighted accessibility of every interaction, raised to the power of the predation focus,
+            # is only recalculated when the lists are rebuilt or the species' efficiency, focus or preferences change
+            effort_key = (species.current_predation_efficiency, species.current_predation_focus,
+                          tuple(column_preference.tolist()))
+            if arrays.get("effort_key") != effort_key:
+                predation_efficiency = species.current_predation_efficiency
+                arrays["effort_power"] = scalar_power(
+                    predation_efficiency * arrays["score_to"] + (1.0 - predation_efficiency) * column_preference[
+                        arrays["prey_column"]], species.current_predation_focus)
+                arrays["effort_key"] = effort_key
+            effort_power.append(arrays["effort_power"][is_entry])
+    predator = np.concatenate(predator)
+    prey = np.concatenate(prey)
+    score_to = np.concatenate(score_to)
+    path_to_length = np.concatenate(path_to_length)
+    effort_power = np.concatenate(effort_power)
+    # the entries in the order that the predators are visited (stable, so each predator's own entries stay in order),
+    # and in the order that the prey are visited
+    predator_order = np.argsort(visit_key[predator], kind="stable")
+    prey_order = np.argsort(visit_key[prey], kind="stable")
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # g0: the effort and idealised prey hunted by each predator
+        effort = holding[prey] * effort_power
+        hunted = effort * score_to * holding[prey]
+        total_effort = np.zeros(size)
+        np.add.at(total_effort, predator, effort)
+        total_hunted = np.zeros(size)
+        np.add.at(total_hunted, predator, hunted)
+        has_effort = is_predation & (total_effort > 0.0)
+        effort_rescale = 1.0 / total_effort
+        rescaled_total_prey_hunted = total_hunted * effort_rescale
+        g0 = np.where(has_effort, rescaled_total_prey_hunted, 0.0)
+
+        # g1: the functional response (for all local populations of each species at once) distributed amongst the
+        # hunted prey
+        g1 = np.zeros(size)
+        for column, species in enumerate(species_list):
+            species_index = np.flatnonzero(has_effort & (column_of == column))
+            if len(species_index) > 0:
+                g1[species_index] = functional_response_array(
+                    predation_func=species.predation_para["PREDATION_FUNCTION"],
+                    predation_para=species.predation_para,
+                    predator_population=holding[species_index],
+                    prey_population=rescaled_total_prey_hunted[species_index],
+                    attack_rate=species.current_predation_rate,
+                    time=time,
+                )
+        is_g1 = has_effort[predator]
+        is_eating = is_g1 & (rescaled_total_prey_hunted[predator] > 0.0)
+        final_effort = np.where(is_eating, effort_rescale[predator] * effort, 0.0)
+        final_prey_eaten = np.where(is_eating, effort_rescale[predator] * hunted * g1[predator] /
+                                    rescaled_total_prey_hunted[predator], 0.0)
+        prey_shortfall = np.zeros(size)
+        np.add.at(prey_shortfall, predator[is_g1], positive_part(hunted - final_prey_eaten)[is_g1])
+        weighted_foraging_distance = np.zeros(size)
+        np.add.at(weighted_foraging_distance, predator[is_g1], (final_effort * path_to_length)[is_g1])
+        maximum_foraging_distance = np.zeros(size, dtype=int)
+        np.maximum.at(maximum_foraging_distance, predator[is_eating], path_to_length[is_eating])
+
+        # g2: rescale the kills of each over-hunted prey
+        is_allocated = is_g1 & is_allocation[prey]
+        by_predator = predator_order[is_allocated[predator_order]]
+        by_prey = prey_order[is_allocated[prey_order]]
+        total_predated = np.zeros(size)
+        np.add.at(total_predated, prey[by_predator], final_prey_eaten[by_predator])
+        is_over = is_allocation & (total_predated > holding)
+        scaled_predation = np.where(is_over[prey], final_prey_eaten * holding[prey] / total_predated[prey],
+                                    final_prey_eaten)
+        g2 = np.zeros(size)
+        np.add.at(g2, predator[by_prey], scaled_predation[by_prey])
+        predator_shortfall = np.zeros(size)
+        np.add.at(predator_shortfall, prey[by_predator], positive_part(hunted - scaled_predation)[by_predator])
+        survivors = np.where(is_over, 0.0, holding - total_predated)
+
+        # g3: top up the predators who fell short using the prey that survived
+        is_topping_up = is_predation & (g0 > 0.0)
+        is_g3 = is_topping_up[predator]
+        disparity = positive_part(hunted - scaled_predation)
+        denominator_1 = prey_shortfall[predator]
+        denominator_2 = predator_shortfall[prey]
+        survivor_ratio = survivors[prey] / denominator_2
+        top_up = np.where((disparity > 0.0) & (denominator_1 * denominator_2 != 0.0), positive_part(
+            disparity * (g2[predator] - g1[predator]) / denominator_1 * np.where(survivor_ratio < 1.0, survivor_ratio,
+                                                                                  1.0)), 0.0)
+        g3_kills = np.where(disparity > 0.0, scaled_predation + top_up, scaled_predation)
+        g3_running_total = np.zeros(size)
+        np.add.at(g3_running_total, predator[is_g3], top_up[is_g3])
+        g3 = np.where(is_topping_up, g2 + g3_running_total, 0.0)
+
+        # finally, the prey gain and predation loss of every local population
+        total_eaten = np.zeros(size)
+        np.add.at(total_eaten, predator[is_g3], g3_kills[is_g3])
+        by_predator = predator_order[is_g3[predator_order]]
+        predation_loss = np.zeros(size)
+        np.add.at(predation_loss, prey[by_predator], g3_kills[by_predator])
+        ecological_efficiency = np.array([x.predation_para["ECOLOGICAL_EFFICIENCY"] for x in species_list],
+                                         dtype=float)
+        prey_gain = np.where(has_prey[column_of], feeding * ecological_efficiency[column_of] * total_eaten, 0.0)
+        predation_loss = np.where(has_predators[column_of], predation_loss, 0.0)
+
+    foraging_records = {
+        "predator": predator,
+        "prey": prey,
+        "predator_key": visit_key[predator],
+        "prey_key": visit_key[prey],
+        "hunted": hunted,
+        "effort": effort,
+        "final_prey_eaten": final_prey_eaten,
+        "final_effort": final_effort,
+        "scaled_predation": scaled_predation,
+        "g3_kills": g3_kills,
+        "is_g1": is_g1,
+        "is_allocated": is_allocated,
+        "is_g3": is_g3,
+        "is_distance_reset": is_distance_reset,
+        "is_predation": is_predation,
+        "is_allocation": is_allocation,
+        "is_topping_up": is_topping_up,
+        "is_over": is_over,
+        "g0": g0,
+        "g1": g1,
+        "g2": g2,
+        "g3": g3,
+        "prey_shortfall": prey_shortfall,
+        "predator_shortfall": predator_shortfall,
+        "survivors": survivors,
+        "maximum_foraging_distance": maximum_foraging_distance,
+        "weighted_foraging_distance": weighted_foraging_distance,
+    }
+    return prey_gain.reshape(holding_population.shape), predation_loss.reshape(holding_population.shape), \
+        foraging_records
+
+
+def set_foraging_records(patch_list, foraging_records, is_ode_recordings):
+    # Record the results of foraging_kernel() on the local population objects: the foraging distances always, and the
+    # g-values and the per-interaction kills/killed dictionaries (in the insertion orders of the object version) only
+    # when they are needed for the ODE recordings
+    local_pop_list = [x for patch in patch_list for x in patch.local_populations.values()]
+    records = {key: value.tolist() for key, value in foraging_records.items()}
+    for index in np.flatnonzero(foraging_records["is_distance_reset"]).tolist():
+        local_pop_list[index].weighted_foraging_distance = -1.0
+        local_pop_list[index].maximum_foraging_distance = -1.0
+    for index in np.flatnonzero(foraging_records["is_predation"]).tolist():
+        # the maximum distance is only an integer path length if some prey was eaten at a non-zero distance
+        if records["maximum_foraging_distance"][index] > 0:
+            local_pop_list[index].maximum_foraging_distance = records["maximum_foraging_distance"][index]
+        else:
+            local_pop_list[index].maximum_foraging_distance = 0.0
+        local_pop_list[index].weighted_foraging_distance = records["weighted_foraging_distance"][index]
+    if is_ode_recordings:
+        for index in np.flatnonzero(foraging_records["is_predation"]).tolist():
+            local_pop = local_pop_list[index]
+            local_pop.prey_shortfall = records["prey_shortfall"][index]
+            local_pop.g_values = {"g2": records["g2"][index], "g0": records["g0"][index], "g1": records["g1"][index]}
+            if records["is_topping_up"][index]:
+                local_pop.g_values["g3"] = records["g3"][index]
+        for index in np.flatnonzero(foraging_records["is_allocation"]).tolist():
+            local_pop_list[index].predator_shortfall = records["predator_shortfall"][index]
+            local_pop_list[index].survivors = records["survivors"][index]
+        predator = records["predator"]
+        prey = records["prey"]
+        # the dictionaries are filled in the order in which the predators, or the prey (then predators), are visited
+        by_predator = np.argsort(foraging_records["predator_key"], kind="stable").tolist()
+        by_prey = np.lexsort((foraging_records["predator_key"], foraging_records["prey_key"])).tolist()
+        for entry in by_predator:
+            predator_pop = local_pop_list[predator[entry]]
+            prey_pop = local_pop_list[prey[entry]]
+            predator_pop.kills["g0"][prey_pop] = (records["hunted"][entry], records["effort"][entry])
+            if records["is_g1"][entry]:
+                predator_pop.kills["g1"][prey_pop] = (records["final_prey_eaten"][entry], records["final_effort"][entry])
+                prey_pop.killed["g1"][predator_pop] = records["final_prey_eaten"][entry]
+        for entry in by_prey:
+            if records["is_allocated"][entry]:
+                predator_pop = local_pop_list[predator[entry]]
+                prey_pop = local_pop_list[prey[entry]]
+                if records["is_over"][prey[entry]]:
+                    prey_pop.killed["g2"][predator_pop] = records["scaled_predation"][entry]
+                predator_pop.kills["g2"][prey_pop] = (records["scaled_predation"][entry], records["final_effort"][entry])
+        for index in np.flatnonzero(foraging_records["is_allocation"] & ~foraging_records["is_over"]).tolist():
+            local_pop_list[index].killed["g2"] = local_pop_list[index].killed["g1"]
+        for entry in by_predator:
+            if records["is_g3"][entry]:
+                local_pop_list[predator[entry]].kills["g3"][local_pop_list[prey[entry]]] = records["g3_kills"][entry]
+                local_pop_list[prey[entry]].killed["g3"][local_pop_list[predator[entry]]] = records["g3_kills"][entry]
+
+
+def growth_kernel(holding_population, is_growing, resource_usage_conversion, r_value, r_mod, lifespan,
+                  carrying_capacity, is_logistic, alpha, model_time_type):
+    # Reproduction and mortality for a whole system at once. All arrays are indexed (patch, species), except lifespan
+    # and is_logistic which are per-species (and broadcast), and only the entries where is_growing is True (the
+    # populations with holding_population > 0.0 in current patches) are meaningful.
+    #
+    # These are exactly the calculations of Local_population.growth_logistic() and .growth_malthusian(), including
+    # the order of floating-point operations, so the results are identical to calling them for each local population.
+    # Returns the total resource competition in each patch, and the growth change, final r-value and competitors.
+    #
+    # sum up the total resource competition in each patch first (accumulated species by species, as the sequential
+    # sum is what the object model uses)
+    sum_competing_for_resources = np.zeros(holding_population.shape[0])
+    for species_index in range(holding_population.shape[1]):
+        sum_competing_for_resources = sum_competing_for_resources + np.where(
+            is_growing[:, species_index],
+            resource_usage_conversion[:, species_index] * holding_population[:, species_index], 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        r_ = r_value * r_mod
+        l_ = lifespan
+        k_ = carrying_capacity
+        # logistic: account for all local populations in patch who may need natural resources and/or nesting sites,
+        # except that if u_i = 0 then they should still compete with themselves
+        competitors = np.where(
+            is_logistic,
+            np.where(resource_usage_conversion == 0.0, holding_population,
+                     (alpha * sum_competing_for_resources[:, np.newaxis] + (1.0 - alpha) *
+                      resource_usage_conversion * holding_population) / resource_usage_conversion),
+            0.0)
+        growth = np.where(
+            is_logistic,
+            holding_population * (r_ - 1.0 / l_ - np.maximum(1.0, (r_ - 1.0 / l_)) * competitors / k_),
+            r_ * holding_population - (1 / l_) * holding_population)
+
+    if model_time_type == "discrete":
+        local_growth_change = growth - holding_population
+    elif model_time_type == "continuous":
+        local_growth_change = growth
+    else:
+        raise Exception("Model type not recognised in 'main_para[MODEL_TIME_TYPE]' - discrete or continuous?")
+    return sum_competing_for_resources, local_growth_change, r_, competitors
+
+
+def growth_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list, is_ode_recordings):
     # this implements local growth (i.e. reproduction and mortality) across the entire system, looking at
     # the .holding_population's and adding the resulting changes to the .current_temp_change's
-    for patch_num in current_patch_list:
-        patch_list[patch_num].sum_competing_for_resources = 0.0
-        for local_pop in patch_list[patch_num].local_populations.values():
-            if local_pop.holding_population > 0.0:
-                # sum up the total resource competition first
-                patch_list[patch_num].sum_competing_for_resources += local_pop.resource_usage_conversion \
-                                                                     * local_pop.holding_population
-        for local_pop in patch_list[patch_num].local_populations.values():
-            if local_pop.holding_population > 0.0:
-                local_pop.growth(parameters=parameters, time=time, alpha=alpha,
-                                 patch_competitors=patch_list[patch_num].sum_competing_for_resources)
+    #
+    # gather the local populations of the current patches into (patch, species) arrays for the growth kernel
+    local_pop_rows = [list(patch_list[patch_num].local_populations.values()) for patch_num in current_patch_list]
+    if len(local_pop_rows) == 0 or len(local_pop_rows[0]) == 0:
+        return
+    species_row = [x.species for x in local_pop_rows[0]]
+    holding_population = np.array([[x.holding_population for x in row] for row in local_pop_rows], dtype=float)
+    is_growing = holding_population > 0.0
+    r_value = np.zeros(holding_population.shape)
+    for species_index, species in enumerate(species_row):
+        if not np.any(is_growing[:, species_index]):
+            continue
+        if species.growth_function not in ["logistic", "malthusian"]:
+            raise Exception(f"Growth function {species.growth_function} not recognised.")
+        if species.growth_para["R"]["type"] in ["vector_exp", "vector_imp"] and species.is_growth_offset:
+            # the offset may be patch-specific, so is held by each local population
+            for row_index in np.flatnonzero(is_growing[:, species_index]):
+                r_value[row_index, species_index] = local_pop_rows[row_index][species_index].current_growth_r_value(
+                    time=time)
+        else:
+            r_value[:, species_index] = species.current_r_value
+
+    sum_competing_for_resources, local_growth_change, r_final, competitors = growth_kernel(
+        holding_population=holding_population,
+        is_growing=is_growing,
+        resource_usage_conversion=np.array([[x.resource_usage_conversion for x in row] for row in local_pop_rows],
+                                           dtype=float),
+        r_value=r_value,
+        r_mod=np.array([[x.r_mod for x in row] for row in local_pop_rows], dtype=float),
+        lifespan=np.array([x.lifespan for x in species_row], dtype=float),
+        carrying_capacity=np.array([[x.carrying_capacity for x in row] for row in local_pop_rows], dtype=float),
+        is_logistic=np.array([x.growth_function == "logistic" for x in species_row]),
+        alpha=alpha,
+        model_time_type=parameters["main_para"]["MODEL_TIME_TYPE"],
+    )
+
+    # and write the results back to the growing local populations
+    is_growing = is_growing.tolist()
+    local_growth_change = local_growth_change.tolist()
+    r_value = r_value.tolist()
+    r_final = r_final.tolist()
+    competitors = competitors.tolist()
+    for row_index, patch_num in enumerate(current_patch_list):
+        patch_list[patch_num].sum_competing_for_resources = float(sum_competing_for_resources[row_index])
+        for column_index, local_pop in enumerate(local_pop_rows[row_index]):
+            if is_growing[row_index][column_index]:
+                change = local_growth_change[row_index][column_index]
+                local_pop.local_growth = change
+                local_pop.current_temp_change += change
+                local_pop.r_value = r_value[row_index][column_index]
+                local_pop.r_final = r_final[row_index][column_index]
+                local_pop.l_final = local_pop.species.lifespan
+                local_pop.k_final = local_pop.carrying_capacity
+                local_pop.competitors_final = competitors[row_index][column_index]
             else:
                 local_pop.local_growth = 0.0
 
 
-def foraging_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list):
+def foraging_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list, is_ode_recordings):
     # this implements predation across the entire system, calling the functional responses twice and looking at
     # the .holding_population's for predator and prey population values to calculate from.
     #
     # first we calculate the desired feeding for all local populations
-    foraging_calculator(patch_list=patch_list, time=time, current_patch_list=current_patch_list)
-    # then enact the feeding result - adding the resulting changes to the .current_temp_change's
-    for patch in patch_list:
-        for local_population in patch.local_populations.values():
-            this_patch_species_feeding = patch.this_habitat_species_feeding[local_population.species.name]
-            local_population.foraging(this_patch_species_feeding=this_patch_species_feeding)
-
-
-def direct_impact_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list):
+    if len(patch_list) > 0:
+        local_pop_rows = [list(patch.local_populations.values()) for patch in patch_list]
+        prey_gain, predation_loss, foraging_records = foraging_kernel(
+            species_list=[x.species for x in local_pop_rows[0]],
+            holding_population=np.array([[x.holding_population for x in row] for row in local_pop_rows], dtype=float),
+            habitat_feeding=np.array([[patch.this_habitat_species_feeding[x.name] for x in row] for patch, row in
+                                      zip(patch_list, local_pop_rows)], dtype=float),
+            current_patch_list=current_patch_list,
+            time=time,
+        )
+        # then enact the feeding result - adding the resulting changes to the .current_temp_change's
+        prey_gain = prey_gain.tolist()
+        predation_loss = predation_loss.tolist()
+        for row_index, row in enumerate(local_pop_rows):
+            for column_index, local_pop in enumerate(row):
+                local_pop.prey_gain = prey_gain[row_index][column_index]
+                local_pop.predation_loss = predation_loss[row_index][column_index]
+                local_pop.current_temp_change += local_pop.prey_gain - local_pop.predation_loss
+        set_foraging_records(patch_list=patch_list, foraging_records=foraging_records,
+                             is_ode_recordings=is_ode_recordings)
+
+
+def direct_impact_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list, is_ode_recordings):
     # this implements direct impact across the entire system, looking at the .holding_population's and adding the
     # resulting changes to the .current_temp_change's
     for patch in patch_list:
@@ -664,28 +1555,54 @@ def direct_impact_caller(parameters, patch_list, time, alpha, is_dispersal, curr
             local_population.direct_impact(time=time)
 
 
-def dispersal_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list):
+def dispersal_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list, is_ode_recordings):
     # this implements dispersal across the entire system, looking at the .holding_population's and adding the resulting
     # changes to the .current_temp_change's
-    if is_dispersal:
+    if is_dispersal and len(patch_list) > 0:
+        local_pop_rows = [list(patch.local_populations.values()) for patch in patch_list]
+        species_list = [x.species for x in local_pop_rows[0]]
+        if any(x.current_dispersal_mechanism == "adaptive" for x in species_list):
+            non_dispersal_change = np.array([[x.local_growth + x.direct_impact_value + x.prey_gain - x.predation_loss
+                                              for x in row] for row in local_pop_rows], dtype=float)
+        else:
+            non_dispersal_change = None
         # build the temporary movement first
-        for patch_from_num in current_patch_list:
-            for local_pop in patch_list[patch_from_num].local_populations.values():
-                # this nested for loop is calculating the leaving values from this patch, which are all zero by default
-                # so if there is no population then it can be safely skipped for efficiency (happens within function)
-                pre_dispersal_of_local_population(patch_list=patch_list, parameters=parameters, local_pop=local_pop)
+        population_leave, population_enter, leaving_flows = dispersal_kernel(
+            species_list=species_list,
+            parameters=parameters,
+            holding_population=np.array([[x.holding_population for x in row] for row in local_pop_rows], dtype=float),
+            carrying_capacity=np.array([[x.carrying_capacity for x in row] for row in local_pop_rows], dtype=float),
+            non_dispersal_change=non_dispersal_change,
+            current_patch_list=current_patch_list,
+        )
+        # record current population as the potential dispersers (for source calculation)
+        for patch_num in current_patch_list:
+            for local_pop in local_pop_rows[patch_num]:
+                local_pop.potential_dispersal = local_pop.holding_population
         # finally enact all movement
-        for patch in patch_list:
-            for local_pop in patch.local_populations.values():
+        population_leave = population_leave.tolist()
+        population_enter = population_enter.tolist()
+        for row_index, row in enumerate(local_pop_rows):
+            for column_index, local_pop in enumerate(row):
+                local_pop.population_leave = population_leave[row_index][column_index]
+                local_pop.population_enter = population_enter[row_index][column_index]
                 local_pop.current_temp_change += local_pop.population_enter - local_pop.population_leave
+        set_leaving_flows(patch_list=patch_list, species_list=species_list, leaving_flows=leaving_flows)
 
 
-def update_populations(patch_list, species_list, time, step, parameters, current_patch_list, is_ode_recordings):
+def update_populations(patch_list, species_list, time, step, parameters, current_patch_list, is_ode_recordings,
+                       population_arrays=None):
     # this is the full function for a single standard iteration of the ecological model - including growth
     # (reproduction and mortality), predation and being predated upon, any special direct impacts or pure direct
     # impacts, and dispersal.
     # The order in which these sub-stages of a single step are enacted is specified according to their priority in
     # the main_para.
+    if population_arrays is not None:
+        # equivalent step using the (patch, species) arrays of population_arrays.Population_arrays
+        population_arrays.update_populations(species_list=species_list, time=time, step=step,
+                                             current_patch_list=current_patch_list,
+                                             is_ode_recordings=is_ode_recordings)
+        return
     alpha = parameters["pop_dyn_para"]["COMPETITION_ALPHA_SCALING"]
     is_nonlocal_foraging = parameters["pop_dyn_para"]["IS_NONLOCAL_FORAGING_PERMITTED"]
     is_local_foraging_ensured = parameters["pop_dyn_para"]["IS_LOCAL_FORAGING_ENSURED"]
@@ -700,12 +1617,13 @@ def update_populations(patch_list, species_list, time, step, parameters, current
     }
 
     # reset temporary and previous values
-    reset_temp_values(patch_list=patch_list)
+    reset_temp_values(patch_list=patch_list, is_ode_recordings=is_ode_recordings)
 
     # did any species parameters change?
     change_checker(species_list=species_list, patch_list=patch_list, time=time, step=step,
                    is_dispersal=is_dispersal, is_nonlocal_foraging=is_nonlocal_foraging,
-                   is_local_foraging_ensured=is_local_foraging_ensured)
+                   is_local_foraging_ensured=is_local_foraging_ensured,
+                   num_workers=parameters["main_para"]["INTERACTION_SCORING_WORKERS"])
 
     # iterate over the 4 possible priorities (if all four sub-stages have their own separate timing within a step)
     for priority in range(4):
@@ -718,6 +1636,7 @@ def update_populations(patch_list, species_list, time, step, parameters, current
                 function_name_to_actual[function](
                     parameters=parameters, patch_list=patch_list, time=time, alpha=alpha,
                     is_dispersal=is_dispersal, current_patch_list=current_patch_list,
+                    is_ode_recordings=is_ode_recordings,
                 )
             # now we will update all local populations with the total result of all functions that were applied at this
             # priority (i.e. this explicit sub-step within the step)
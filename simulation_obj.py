@@ -5,7 +5,11 @@ from data_manager_functions import plot_network_properties, create_adjacency_pat
 from sample_spatial_data import run_sample_spatial_data
 import os
 from patch import Patch
-from local_population import Local_population
+from local_population import Local_population, build_recent_time_averages_of_populations, \
+    build_hurst_exponents_of_populations
+from population_arrays import Population_arrays
+from history_store import History_store
+from ode_recording_store import Ode_recording_store
 from species import Species
 from datetime import datetime
 from population_dynamics import *
@@ -241,26 +245,36 @@ class Simulation_obj:
     def species_pathing(self):
         # generate shortest path cost for each species using Dijkstra's algorithm, and list of reachable patches
         is_generate_fresh = True
+        # the saved adjacency variables are keyed by a hash of the network, habitats, traversal scores and path
+        # settings, so a stale cache is never loaded - it simply misses and the variables are rebuilt
+        cache_key = self.system_state.calculate_pathing_cache_key(parameters=self.parameters)
         if self.parameters["main_para"]["IS_LOAD_ADJ_VARIABLES"]:
             print("Attempting to load pre-existing adjacency variables.")
             try:
                 load_adj_variables(patch_list=self.system_state.patch_list,
-                                   spatial_set_number=self.parameters["graph_para"]["SPATIAL_TEST_SET"])
+                                   spatial_set_number=self.parameters["graph_para"]["SPATIAL_TEST_SET"],
+                                   cache_key=cache_key)
                 is_generate_fresh = False
-                print("Successfully loaded pre-existing adjacency variables.")
-            except (FileNotFoundError, json.decoder.JSONDecodeError):
+                # the shortest-path trees and per-path-length cost tables are not saved, so rebuild them from the
+                # loaded network
+                self.system_state.build_path_support_variables(parameters=self.parameters)
+                print(f"Successfully loaded pre-existing adjacency variables (cache {cache_key[:12]}).")
+            except (FileNotFoundError, json.decoder.JSONDecodeError, ValueError):
                 is_generate_fresh = True
-                print("Need to generate new adjacency variables as none to load or load unsuccessful.")
+                print(f"Need to generate new adjacency variables as no matching cache ({cache_key[:12]}) to load or"
+                      f" load unsuccessful.")
 
         if is_generate_fresh:
             # build fresh
             print("Generating new adjacency variables.")
             self.system_state.build_all_patches_species_paths_and_adjacency(parameters=self.parameters)
             print("Adjacency variables successfully generated.\n")
-        if self.is_allow_file_creation and self.parameters["main_para"]["IS_SAVE_ADJ_VARIABLES"]:
-            save_adj_variables(patch_list=self.system_state.patch_list,
-                               spatial_set_number=self.parameters["graph_para"]["SPATIAL_TEST_SET"])
-            print("Adjacency variables saved.\n")
+            # only need to save if they were not loaded from an identical cache
+            if self.is_allow_file_creation and self.parameters["main_para"]["IS_SAVE_ADJ_VARIABLES"]:
+                save_adj_variables(patch_list=self.system_state.patch_list,
+                                   spatial_set_number=self.parameters["graph_para"]["SPATIAL_TEST_SET"],
+                                   cache_key=cache_key)
+                print("Adjacency variables saved.\n")
 
     ######################################################################################################
 
@@ -294,7 +308,7 @@ class Simulation_obj:
             try:
                 reserve_clusters = load_reserve_list(spatial_set_number=test_set)
                 is_generate_fresh = False
-            except (FileNotFoundError, json.decoder.JSONDecodeError):
+            except (FileNotFoundError, json.decoder.JSONDecodeError, ValueError):
                 print("Need to generate new reserve list as none to load or load unsuccessful.")
                 is_generate_fresh = True
         if is_generate_fresh:
@@ -316,6 +330,34 @@ class Simulation_obj:
             save_reserve_list(reserve_list=self.system_state.reserve_list, spatial_set_number=test_set)
 
         # initial populations
+        transient_policy = self.parameters["main_para"]["HISTORY_TRANSIENT_POLICY"]
+        if all(x == "full" for x in transient_policy.values()):
+            decimated_steps = 0
+        elif self.parameters["main_para"]["IS_HISTORY_STORE"]:
+            # build_recent_time_averages() looks back over up to twice the record window (plus 10 steps) for periodicity
+            decimated_steps = max(0, self.parameters["main_para"]["NUM_TRANSIENT_STEPS"]
+                                  - self.parameters["main_para"]["NUM_RECORD_STEPS"] - 10)
+        else:
+            raise Exception("A main_para[HISTORY_TRANSIENT_POLICY] other than 'full' requires the history store.")
+        if self.parameters["main_para"]["IS_HISTORY_STORE"]:
+            self.system_state.history_store = History_store(
+                num_steps=self.total_steps + 1,  # as the initial populations are also recorded
+                num_patches=len(self.system_state.patch_list),
+                species_list=self.system_state.species_set["list"],
+                dtype=self.parameters["main_para"]["HISTORY_STORE_DTYPE"],
+                decimated_steps=decimated_steps,
+                decimation_policy=transient_policy,
+            )
+        if self.parameters["plot_save_para"]["IS_ODE_RECORDINGS"]:
+            self.system_state.ode_recording_store = Ode_recording_store(
+                num_steps=self.total_steps,
+                num_patches=len(self.system_state.patch_list),
+                species_list=self.system_state.species_set["list"],
+                patch_nums=self.parameters["plot_save_para"]["ODE_RECORDING_PATCHES"],
+                species_names=self.parameters["plot_save_para"]["ODE_RECORDING_SPECIES"],
+                step_windows=self.parameters["plot_save_para"]["ODE_RECORDING_STEP_WINDOWS"],
+                dtype=self.parameters["plot_save_para"]["ODE_RECORDING_DTYPE"],
+            )
         for patch in self.system_state.patch_list:
             patch.local_populations = {}
             for species in self.system_state.species_set["list"]:
@@ -326,6 +368,8 @@ class Simulation_obj:
                                        patch=patch,
                                        parameters=self.parameters,
                                        current_patch_list=self.system_state.current_patch_list,
+                                       history_store=self.system_state.history_store,
+                                       ode_recording_store=self.system_state.ode_recording_store,
                                        )
         is_nonlocal_foraging = self.parameters["pop_dyn_para"]["IS_NONLOCAL_FORAGING_PERMITTED"]
         is_local_foraging_ensured = self.parameters["pop_dyn_para"]["IS_LOCAL_FORAGING_ENSURED"]
@@ -335,6 +379,7 @@ class Simulation_obj:
             is_nonlocal_foraging=is_nonlocal_foraging,
             is_local_foraging_ensured=is_local_foraging_ensured,
             time=0,
+            num_workers=self.parameters["main_para"]["INTERACTION_SCORING_WORKERS"],
         )
         is_dispersal = self.parameters["pop_dyn_para"]["IS_DISPERSAL_PERMITTED"]
         build_actual_dispersal_targets(
@@ -343,6 +388,12 @@ class Simulation_obj:
             is_dispersal=is_dispersal,
             time=0,
         )
+        if self.parameters["main_para"]["IS_POPULATION_ARRAY_ENGINE"]:
+            self.system_state.population_arrays = Population_arrays(
+                patch_list=self.system_state.patch_list,
+                species_list=self.system_state.species_set["list"],
+                parameters=self.parameters,
+            )
 
         # remove any known not to exist
         pass
@@ -396,7 +447,9 @@ class Simulation_obj:
                                time=time,
                                step=step,
                                current_patch_list=self.system_state.current_patch_list,
-                               is_ode_recordings=self.parameters["plot_save_para"]["IS_ODE_RECORDINGS"],
+                               is_ode_recordings=self.parameters["plot_save_para"]["IS_ODE_RECORDINGS"] and
+                               self.system_state.ode_recording_store.is_step_recorded(step),
+                               population_arrays=self.system_state.population_arrays,
                                )
 
             # ---- Check for species-induced perturbations ---- #
@@ -430,33 +483,21 @@ class Simulation_obj:
         # -----------------------------------------------------------------------------------------------------------#
         # FINAL CALCULATIONS FOR THE LOCAL_POPULATION OBJECTS
         #
-        # normalise average populations
-        for patch in self.system_state.patch_list:
-            for local_population in patch.local_populations.values():
-
-                # build averages from recent histories - note that if there are M = M1 + M2 total steps, then the
-                # population history indexes are from 0 to M-1, thus the "final step" (in terms of
-                # history list indices) should be M-1:
-                local_population.build_recent_time_averages(current_step=self.total_steps - 1,
-                                                            back_steps=self.parameters["main_para"]["NUM_RECORD_STEPS"])
-
-                if self.parameters["main_para"]["IS_CALCULATE_HURST"]:
-                    import hurst
-                    import warnings
-                    warnings.filterwarnings(action='error',
-                                            category=RuntimeWarning)
-                    # this is used because of Hurst Exp throwing warnings, even for parts of the code not being
-                    # executed because of the failure (constant time-series not suitable for Hurst).
-                    # warnings.resetwarnings()  - you will need to run this if Warnings break the program!
-                    # Calculate Hurst Exponent of each local population history time-series:
-                    try:
-                        local_population.population_history_hurst_exponent = hurst.compute_Hc(
-                            series=local_population.population_history,
-                            kind="random_walk", simplified=True)
-                    except (RuntimeWarning, ValueError):
-                        local_population.population_history_hurst_exponent = None
-
-                # ??? Correlation dimension here ???
+        # build averages from recent histories (for all local populations at once) - note that if there are
+        # M = M1 + M2 total steps, then the population history indexes are from 0 to M-1, thus the "final step" (in
+        # terms of history list indices) should be M-1:
+        build_recent_time_averages_of_populations(
+            local_pop_list=[x for patch in self.system_state.patch_list for x in patch.local_populations.values()],
+            current_step=self.total_steps - 1, back_steps=self.parameters["main_para"]["NUM_RECORD_STEPS"])
+
+        # Calculate Hurst Exponent of each local population history time-series (None where the time-series is not
+        # suitable, e.g. it is constant):
+        if self.parameters["main_para"]["IS_CALCULATE_HURST"]:
+            build_hurst_exponents_of_populations(
+                local_pop_list=[x for patch in self.system_state.patch_list for x in patch.local_populations.values()],
+                num_workers=self.parameters["main_para"]["HURST_WORKERS"])
+
+        # ??? Correlation dimension here ???
 
         # ??? Calculate Hurst Exponent of the global and average local diversity time-series:
 
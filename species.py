@@ -90,4 +90,7 @@ class Species:
         self.current_coefficients_lists = None
         self.current_max_dispersal_path_length = None
         self.current_minimum_link_strength_dispersal = None
+        self.dispersal_target_matrix = None  # sparse matrix of the actual dispersal targets of each patch
+        self.temporal_schedule = None  # compiled temporal parameters, see change_checker()
+        self.interaction_arrays = None  # flat arrays of the interacting populations of each local population
 
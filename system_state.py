@@ -1,11 +1,19 @@
+import gc
+import hashlib
 import numpy as np
 from copy import deepcopy
 from collections import Counter
 from degree_distribution import power_law_curve_fit
 from scipy.stats import spearmanr, pearsonr
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
 from data_manager_functions import update_local_population_nets
 from system_state_functions import tuple_builder, linear_model_report, generate_cluster, \
     determine_complexity, rank_abundance
+from pathing_functions import build_species_graph, single_source_dijkstra, build_patch_costs, bounded_hop_costs, \
+    all_pairs_costs, shortest_path_trees, settled_order_from_costs, build_target_costs, changed_edges, \
+    repair_path_trees, changed_route_targets, stepping_stone_patches
+from datetime import datetime
 
 
 class System_state:
@@ -24,6 +32,8 @@ class System_state:
         self.initial_patch_list = None
         self.species_set = species_set
         self.current_patch_list = current_patch_list
+        # kept alongside current_patch_list for membership tests - only remove patches with remove_current_patch()
+        self.current_patch_set = set(current_patch_list) if current_patch_list is not None else set()
         self.dimensions = dimensions
         self.reserve_list = []
         self.perturbation_history = {}
@@ -35,7 +45,15 @@ class System_state:
         self.habitat_species_feeding = habitat_species_feeding
         self.habitat_species_traversal = habitat_species_traversal
         self.patch_adjacency_matrix = patch_adjacency_matrix
+        self.patch_neighbour_sets = None  # sparse view of patch_adjacency_matrix, see build_patch_neighbour_sets()
+        self.build_patch_neighbour_sets()
+        self.degree_update_patch_set = None  # patches whose degree and LCC need recalculating (None means all)
+        self.habitat_link_sums = None  # [norm_sum, auto_cor_sum] of the habitat auto-correlation (None to recount)
         self.initial_patch_adjacency_matrix = None
+        self.species_path_trees = None  # all-sources shortest-path trees per species, for incremental path repair
+        self.population_arrays = None  # optional Population_arrays engine used by update_populations()
+        self.history_store = None  # optional History_store of all the local population histories
+        self.ode_recording_store = None  # Ode_recording_store of the ODE recordings (if IS_ODE_RECORDINGS)
         # Update all patches
         self.update_all_patches_habitat_based_properties()
 
@@ -158,16 +176,13 @@ class System_state:
             # more than one habitat type
             for habitat_type_num in self.habitat_type_dictionary:
                 temp_habitat_counts[habitat_type_num] = 0
-            for starting_index, patch_num_1 in enumerate(self.current_patch_list):
+            for patch_num in self.current_patch_list:
                 # only consider patches that are currently present
-                temp_habitat_counts[self.patch_list[patch_num_1].habitat_type_num] += 1
-                # consider neighbours
-                for patch_num_2 in self.current_patch_list[starting_index + 1:]:
-                    if self.patch_adjacency_matrix[patch_num_1, patch_num_2] == 1.0:
-                        norm_sum += 1.0
-                        if self.patch_list[patch_num_1].habitat_type_num == \
-                                self.patch_list[patch_num_2].habitat_type_num:
-                            auto_cor_sum += 1.0
+                temp_habitat_counts[self.patch_list[patch_num].habitat_type_num] += 1
+            # the link counts are maintained incrementally after the first full count
+            if self.habitat_link_sums is None:
+                self.habitat_link_sums = self.count_habitat_links()
+            norm_sum, auto_cor_sum = self.habitat_link_sums
 
             if norm_sum == 0.0:
                 # if norm_sum is zero (i.e.the graph is fully disconnected)
@@ -197,6 +212,54 @@ class System_state:
         for habitat_type_num in self.habitat_type_dictionary:
             self.habitat_amounts_history[habitat_type_num][self.step] = temp_habitat_counts[habitat_type_num]
 
+    def count_habitat_links(self):
+        # Count the links between pairs of different current patches (norm_sum) and those that join patches of the
+        # same habitat type (auto_cor_sum) from the sparse edge list. Each pair is counted once, by the adjacency entry
+        # from the earlier to the later patch (the current patch list is always in ascending order).
+        is_current = np.zeros(len(self.patch_list), dtype=bool)
+        is_current[self.current_patch_list] = True
+        habitat_type_nums = np.asarray([x.habitat_type_num for x in self.patch_list])
+        rows, cols = self.patch_neighbour_matrix().nonzero()
+        is_link = (rows < cols) & is_current[rows] & is_current[cols]
+        rows = rows[is_link]
+        cols = cols[is_link]
+        is_link = self.patch_adjacency_matrix[rows, cols] == 1.0
+        norm_sum = float(np.count_nonzero(is_link))
+        auto_cor_sum = float(np.count_nonzero(habitat_type_nums[rows[is_link]] == habitat_type_nums[cols[is_link]]))
+        return [norm_sum, auto_cor_sum]
+
+    def habitat_link_contribution(self, patch_num_1, patch_num_2):
+        # the [norm_sum, auto_cor_sum] contribution of a single pair of patches, as counted in count_habitat_links()
+        lower_patch_num = min(patch_num_1, patch_num_2)
+        upper_patch_num = max(patch_num_1, patch_num_2)
+        if lower_patch_num != upper_patch_num and self.patch_adjacency_matrix[lower_patch_num, upper_patch_num] == 1.0 \
+                and lower_patch_num in self.current_patch_set and upper_patch_num in self.current_patch_set:
+            if self.patch_list[lower_patch_num].habitat_type_num == self.patch_list[upper_patch_num].habitat_type_num:
+                return [1.0, 1.0]
+            return [1.0, 0.0]
+        return [0.0, 0.0]
+
+    def update_habitat_link_sums(self, old_contribution, new_contribution):
+        # incremental mode of the habitat auto-correlation link counts: adjust by the change in a pair's contribution
+        if self.habitat_link_sums is not None:
+            self.habitat_link_sums[0] += new_contribution[0] - old_contribution[0]
+            self.habitat_link_sums[1] += new_contribution[1] - old_contribution[1]
+
+    def change_patch_habitat(self, patch, habitat_type_num, habitat_type):
+        # change the habitat of the patch, resetting its species-specific scores and updating the incrementally
+        # maintained network measures (habitat link counts, and flagging the LCC's of the patch and its neighbours)
+        neighbour_list = list(self.patch_neighbours(patch_num=patch.number))
+        old_contributions = [self.habitat_link_contribution(patch_num_1=patch.number, patch_num_2=x)
+                             for x in neighbour_list]
+        patch.habitat_type_num = habitat_type_num
+        patch.habitat_type = habitat_type
+        self.update_patch_habitat_based_properties(patch=patch)
+        for neighbour_index, neighbour_num in enumerate(neighbour_list):
+            self.update_habitat_link_sums(old_contribution=old_contributions[neighbour_index],
+                                          new_contribution=self.habitat_link_contribution(patch_num_1=patch.number,
+                                                                                          patch_num_2=neighbour_num))
+        self.mark_patch_neighbourhood_changed(patch_num=patch.number)
+
     def update_all_patches_habitat_based_properties(self):
         for patch in self.patch_list:
             self.update_patch_habitat_based_properties(patch=patch)
@@ -206,48 +269,46 @@ class System_state:
 
     def calculate_all_patches_degree(self):
         # calculate the degree of each patch and update the set of adjacent patches, and THEN SUBSEQUENTLY we use that
-        # to determine the local clustering coefficient
-        degree_list = []
-        for patch in self.patch_list:
-            degree = self.calculate_patch_degree(patch=patch)
-            if patch.number in self.current_patch_list:
-                degree_list.append(degree)
+        # to determine the local clustering coefficient.
+        # After the first call, only those patches whose neighbourhood has been marked as changed (by an adjacency,
+        # habitat or patch removal perturbation) are recalculated - all others keep their existing values.
+        current_patch_set = set(self.current_patch_list)
+        if self.degree_update_patch_set is None:
+            patches_to_update = self.patch_list
+        else:
+            patches_to_update = [self.patch_list[x] for x in sorted(self.degree_update_patch_set)]
+        self.degree_update_patch_set = set()
+        for patch in patches_to_update:
+            self.calculate_patch_degree(patch=patch, current_patch_set=current_patch_set)
         # This must be AFTER updating all calculate_patch_degree() because of reliance of patch.set_of_adjacent_patches
+        degree_list = [patch.degree for patch in self.patch_list if patch.number in current_patch_set]
         lcc_list = []
         if len(self.current_patch_list) > 0:
-            for patch in self.patch_list:
-                lcc = self.calculate_lcc(patch=patch)
-                if patch.number in self.current_patch_list:
-                    lcc_list.append(lcc)  # this is a (patch-length) list of the [all, same, different] LCC's
+            for patch in patches_to_update:
+                self.calculate_lcc(patch=patch, current_patch_set=current_patch_set)
+            # this is a (patch-length) list of the [all, same, different] LCC's
+            lcc_list = [patch.local_clustering for patch in self.patch_list if patch.number in current_patch_set]
         return degree_list, lcc_list
 
     def calculate_all_patches_centrality(self, parameters):
-        # calculate the harmonic centrality of the patch
+        # calculate the harmonic centrality of the patch, counting the other patches up to MAX_CENTRALITY_MEASURE steps
         # use the full patch list to avoid errors
         num_patches = int(len(self.patch_list))
         maximal_iterations = min(int(parameters["main_para"]["MAX_CENTRALITY_MEASURE"]), num_patches)
-        minimum_distance_matrix = np.identity(num_patches)
         patch_centrality_vector = np.zeros([num_patches])
         if maximal_iterations > 1:
-            path_matrix = deepcopy(self.patch_adjacency_matrix)
-            for path_length in range(maximal_iterations):
-                for patch_x in range(num_patches):
-                    for patch_y in range(num_patches):
-                        # matmul causes number of walks to grow so normalise - only need to know when non-zero
-                        if path_matrix[patch_x, patch_y] != 0.0:
-                            path_matrix[patch_x, patch_y] = 1.0
-                            # all this relies on patch_adjacency_matrix always being undirected so [x,y] suffices.
-                            if minimum_distance_matrix[patch_x, patch_y] == 0.0:
-                                # have found a new connection between previously unreached paths
-                                minimum_distance_matrix[patch_x, patch_y] = path_length + 1
-
-                path_matrix = np.matmul(path_matrix, path_matrix)
-
-            # sum reciprocal of non-zero elements (excluding self)
-            for patch_x in range(num_patches):
-                for patch_y in range(num_patches):
-                    if patch_x != patch_y and minimum_distance_matrix[patch_x, patch_y] != 0.0:
-                        patch_centrality_vector[patch_x] += 1.0 / minimum_distance_matrix[patch_x, patch_y]
+            # Breadth-first search from each patch over the sparse neighbour sets (this relies on the adjacency always
+            # being undirected), truncated at the maximal path length. Sources are processed in blocks to limit memory.
+            neighbour_matrix = self.patch_neighbour_matrix()
+            block_size = 256
+            for block_start in range(0, num_patches, block_size):
+                source_list = np.arange(block_start, min(block_start + block_size, num_patches))
+                minimum_distance_matrix = dijkstra(csgraph=neighbour_matrix, directed=False, unweighted=True,
+                                                   indices=source_list, limit=maximal_iterations)
+                # sum reciprocal of the finite non-zero distances (i.e. excluding self and the unreached patches)
+                with np.errstate(divide='ignore'):
+                    reciprocal_distance = np.where(minimum_distance_matrix > 0.0, 1.0 / minimum_distance_matrix, 0.0)
+                patch_centrality_vector[source_list] = np.sum(reciprocal_distance, axis=1)
             patch_centrality_vector *= (1.0 / (len(self.current_patch_list) - 1.0))
 
         centrality_list = []  # to be used for mean, s.d. for the system level history
@@ -260,23 +321,245 @@ class System_state:
         return centrality_list
 
     def build_all_patches_species_paths_and_adjacency(self, parameters, specified_patch_list=None):
+        species_graphs = self.build_all_species_graphs()
+        species_path_trees = self.build_all_species_path_trees(parameters=parameters, species_graphs=species_graphs)
+        # The route dictionaries are acyclic but very numerous (O(N^2) per species), and the cyclic garbage collector
+        # otherwise repeatedly re-scans them during the build, so it is paused until they are all stored.
+        is_gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            if parameters["main_para"]["IS_ALL_PAIRS_PATHING"]:
+                # solve every (specified) source patch at once for each species
+                self.build_all_pairs_species_paths_and_adjacency(parameters=parameters, species_graphs=species_graphs,
+                                                                 species_path_trees=species_path_trees,
+                                                                 specified_patch_list=specified_patch_list)
+            else:
+                for patch in self.patch_list:
+                    if specified_patch_list is None or patch.number in specified_patch_list:
+                        # By default, rebuild scores and paths for ALL patches
+                        self.build_species_paths_and_adjacency(patch=patch, parameters=parameters,
+                                                               species_graphs=species_graphs)
+        finally:
+            if is_gc_enabled:
+                gc.enable()
+        self.species_path_trees = species_path_trees
+        self.build_all_species_bounded_path_costs(parameters=parameters, species_graphs=species_graphs)
+
+    def build_path_support_variables(self, parameters):
+        # Rebuild the network-derived arrays that are not part of the saved adjacency variables (i.e. after loading
+        # the species paths from the cache): the shortest-path trees and the bounded path costs.
+        species_graphs = self.build_all_species_graphs()
+        self.species_path_trees = self.build_all_species_path_trees(parameters=parameters,
+                                                                    species_graphs=species_graphs)
+        self.build_all_species_bounded_path_costs(parameters=parameters, species_graphs=species_graphs)
+
+    def calculate_pathing_cache_key(self, parameters):
+        # Hash of everything that the species paths and adjacency variables depend on, so that a saved cache is only
+        # reused if it was built from an identical spatial network, habitats, traversal scores and path settings.
+        key_hash = hashlib.sha256()
+        key_hash.update(np.ascontiguousarray(self.patch_adjacency_matrix, dtype=float).tobytes())
+        key_hash.update(np.asarray([x.size for x in self.patch_list], dtype=float).tobytes())
+        key_hash.update(np.asarray([x.habitat_type_num for x in self.patch_list], dtype=np.int64).tobytes())
+        for species in self.species_set["list"]:
+            key_hash.update(species.name.encode())
+            key_hash.update(np.asarray([x.this_habitat_species_traversal[species.name] for x in self.patch_list],
+                                       dtype=float).tobytes())
+        key_hash.update(str(int(parameters["main_para"]["ASSUMED_MAX_PATH_LENGTH"])).encode())
+        return key_hash.hexdigest()
+
+    def build_all_species_graphs(self):
+        # The spatial network topology is shared by all species, which differ only in their habitat traversal scores,
+        # so build the weighted sparse graph for each species once and reuse it for every source patch.
+        species_graphs = {}
+        patch_sizes = np.asarray([x.size for x in self.patch_list], dtype=float)
+        for species in self.species_set["list"]:
+            patch_traversal = np.asarray([x.this_habitat_species_traversal[species.name] for x in self.patch_list],
+                                         dtype=float)
+            species_graphs[species.name] = {
+                "graph": build_species_graph(patch_adjacency_matrix=self.patch_adjacency_matrix,
+                                             patch_sizes=patch_sizes, patch_traversal=patch_traversal),
+                "patch_sizes": patch_sizes,
+                "patch_traversal": patch_traversal,
+            }
+        return species_graphs
+
+    def build_all_species_path_trees(self, parameters, species_graphs):
+        # For each species, the shortest-path tree from every source patch as (source, target) arrays of cost, number
+        # of steps and predecessor, from the compiled Dijkstra run from every source over the CSR matrix. These are kept
+        # in self.species_path_trees so that the paths can be repaired incrementally after a perturbation.
+        species_path_trees = {}
+        for species in self.species_set["list"]:
+            species_graph = species_graphs[species.name]["graph"]
+            cost_matrix = all_pairs_costs(graph=species_graph)
+            unused_settled_orders, path_cost, path_length, predecessor = shortest_path_trees(
+                graph=species_graph, cost_matrix=cost_matrix, source_list=np.arange(len(self.patch_list)))
+            species_path_trees[species.name] = {
+                "graph": species_graph,
+                "patch_sizes": species_graphs[species.name]["patch_sizes"],
+                "patch_traversal": species_graphs[species.name]["patch_traversal"],
+                "cost": path_cost,
+                "hops": path_length,
+                "predecessor": predecessor,
+            }
+        return species_path_trees
+
+    def build_all_pairs_species_paths_and_adjacency(self, parameters, species_graphs, species_path_trees,
+                                                    specified_patch_list=None):
+        # All-pairs version of build_species_paths_and_adjacency(), converting the shortest-path trees of every
+        # (specified) source at once. The resulting .species_movement_scores, .adjacency_lists and
+        # .stepping_stone_list are the same as the per-patch version.
+        start_time = datetime.now()
+        if specified_patch_list is None:
+            source_list = [x.number for x in self.patch_list]
+        else:
+            source_list = [x.number for x in self.patch_list if x.number in specified_patch_list]
+
+        stepping_stone_sets = {}
+        for source in source_list:
+            self.patch_list[source].species_movement_scores = {}
+            self.patch_list[source].adjacency_lists = {}
+            stepping_stone_sets[source] = set()
+        for species in self.species_set["list"]:
+            species_name = species.name
+            species_graph = species_graphs[species_name]["graph"]
+            path_trees = species_path_trees[species_name]
+            for source in source_list:
+                patch_costs = build_patch_costs(graph=species_graph, source=source,
+                                                settled_order=settled_order_from_costs(path_trees["cost"][source, :]),
+                                                cost=path_trees["cost"][source, :],
+                                                hops=path_trees["hops"][source, :],
+                                                predecessor=path_trees["predecessor"][source, :],
+                                                patch_sizes=species_graphs[species_name]["patch_sizes"],
+                                                patch_traversal=species_graphs[species_name]["patch_traversal"])
+                self.store_species_paths_and_adjacency(patch=self.patch_list[source], species_name=species_name,
+                                                       patch_costs=patch_costs,
+                                                       stepping_stone_set=stepping_stone_sets[source],
+                                                       parameters=parameters)
+        for source in source_list:
+            self.patch_list[source].stepping_stone_list = list(stepping_stone_sets[source])
+        build_time = (datetime.now() - start_time).total_seconds()
+        print(f"Paths built for {len(source_list)}/{len(self.patch_list)} patches by all-pairs pathing"
+              f" in {build_time:.2f} seconds")
+        return build_time
+
+    def repair_species_paths_and_adjacency(self, parameters, altered_patch_numbers):
+        # Incremental alternative to rebuilding the paths of every patch after a perturbation. The graph of each
+        # species is compared with the one the stored shortest-path trees were built from, only the source trees that
+        # the changed edges can affect are recomputed, and then only the (source, target) route dictionaries that
+        # actually differ are rebuilt. The altered patches themselves (e.g. a removed patch) are always fully rebuilt.
+        if self.species_path_trees is None:
+            # nothing to repair from
+            self.build_all_patches_species_paths_and_adjacency(parameters=parameters)
+            return
+        start_time = datetime.now()
+        num_patches = len(self.patch_list)
+        max_path_length = int(parameters["main_para"]["ASSUMED_MAX_PATH_LENGTH"])
+        species_graphs = self.build_all_species_graphs()
+        new_path_trees = {}
+        is_source_changed = np.zeros(num_patches, dtype=bool)
+        is_source_changed[list(altered_patch_numbers)] = True
+        num_repaired_routes = 0
+        is_gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for species in self.species_set["list"]:
+                species_name = species.name
+                old_trees = self.species_path_trees[species_name]
+                species_graph = species_graphs[species_name]["graph"]
+                edge_changes = changed_edges(old_graph=old_trees["graph"], new_graph=species_graph)
+                repaired_trees, recomputed_sources = repair_path_trees(old_trees=old_trees, new_graph=species_graph,
+                                                                       edge_changes=edge_changes,
+                                                                       forced_sources=altered_patch_numbers)
+                new_trees = {
+                    "graph": species_graph,
+                    "patch_sizes": species_graphs[species_name]["patch_sizes"],
+                    "patch_traversal": species_graphs[species_name]["patch_traversal"],
+                    "cost": repaired_trees["cost"],
+                    "hops": repaired_trees["hops"],
+                    "predecessor": repaired_trees["predecessor"],
+                }
+                is_route_changed = changed_route_targets(old_trees=old_trees, new_trees=new_trees,
+                                                         edge_changes=edge_changes,
+                                                         recomputed_sources=recomputed_sources)
+                is_route_changed[list(altered_patch_numbers), :] = True
+
+                for patch in self.patch_list:
+                    target_list = np.nonzero(is_route_changed[patch.number, :])[0]
+                    if len(target_list) == 0:
+                        continue
+                    is_source_changed[patch.number] = True
+                    num_repaired_routes += len(target_list)
+                    tree_arguments = {
+                        "graph": species_graph,
+                        "source": patch.number,
+                        "settled_order": settled_order_from_costs(new_trees["cost"][patch.number, :]),
+                        "cost": new_trees["cost"][patch.number, :],
+                        "hops": new_trees["hops"][patch.number, :],
+                        "predecessor": new_trees["predecessor"][patch.number, :],
+                        "patch_sizes": new_trees["patch_sizes"],
+                        "patch_traversal": new_trees["patch_traversal"],
+                    }
+                    if len(target_list) == num_patches:
+                        patch.species_movement_scores[species_name] = build_patch_costs(**tree_arguments)
+                    else:
+                        if not isinstance(patch.species_movement_scores[species_name], dict):
+                            # entries loaded from the cache are decoded lazily, so convert before altering them
+                            patch.species_movement_scores[species_name] = dict(
+                                patch.species_movement_scores[species_name])
+                        patch.species_movement_scores[species_name].update(
+                            build_target_costs(target_list=target_list, **tree_arguments))
+                    patch.adjacency_lists[species_name] = np.nonzero(
+                        np.isfinite(new_trees["cost"][patch.number, :]))[0].tolist()
+                new_path_trees[species_name] = new_trees
+        finally:
+            if is_gc_enabled:
+                gc.enable()
+
+        # the stepping stones are gathered over all species
         for patch in self.patch_list:
-            if specified_patch_list is None or patch.number in specified_patch_list:
-                # By default, rebuild scores and paths for ALL patches
-                self.build_species_paths_and_adjacency(patch=patch, parameters=parameters)
+            if is_source_changed[patch.number]:
+                stepping_stone_set = set()
+                for species_name, path_trees in new_path_trees.items():
+                    stepping_stone_set.update(stepping_stone_patches(
+                        graph=path_trees["graph"], source=patch.number, cost=path_trees["cost"][patch.number, :],
+                        hops=path_trees["hops"][patch.number, :], max_path_length=max_path_length))
+                patch.stepping_stone_list = list(stepping_stone_set)
+        self.species_path_trees = new_path_trees
+        self.build_all_species_bounded_path_costs(parameters=parameters, species_graphs=species_graphs)
+        repair_time = (datetime.now() - start_time).total_seconds()
+        print(f"Paths repaired for {np.count_nonzero(is_source_changed)}/{num_patches} patches"
+              f" ({num_repaired_routes} routes) in {repair_time:.2f} seconds")
+        return repair_time
+
+    def build_all_species_bounded_path_costs(self, parameters, species_graphs=None):
+        # For each species, determine the exact cheapest cost between every pair of patches for each path length up to
+        # ASSUMED_MAX_PATH_LENGTH, and store the row of the tensor belonging to each patch in patch.bounded_path_costs.
+        # These are used for the path-length restricted foraging and dispersal lookups in find_best_actual_scores().
+        # As they are cheap to compute they are always rebuilt for ALL patches (including after loading).
+        if species_graphs is None:
+            species_graphs = self.build_all_species_graphs()
+        max_path_length = int(parameters["main_para"]["ASSUMED_MAX_PATH_LENGTH"])
+        for patch in self.patch_list:
+            patch.bounded_path_costs = {}
+        for species in self.species_set["list"]:
+            cost_tensor = bounded_hop_costs(graph=species_graphs[species.name]["graph"], max_hops=max_path_length)
+            for patch in self.patch_list:
+                patch.bounded_path_costs[species.name] = cost_tensor[patch.number, :, :]
 
-    def calculate_lcc(self, patch):
+    def calculate_lcc(self, patch, current_patch_set=None):
         # determine the lcc of the given patch. This should only be called after all patches have had
         # their .set_of_adjacent_patches updated by calling calculate_patch_degree() for EACH OF THEM
+        if current_patch_set is None:
+            current_patch_set = set(self.current_patch_list)
         list_of_neighbours = list(patch.set_of_adjacent_patches)
         num_triangles = [0, 0, 0]  # all, same, different
         num_closed_triangles = [0, 0, 0]  # all, same, different
         lcc = {"all": 0.0, "same": 0.0, "different": 0.0}
         if len(list_of_neighbours) > 1:
             for n_1_index, neighbour_1 in enumerate(list_of_neighbours):
-                if neighbour_1 in self.current_patch_list and neighbour_1 != patch.number:
+                if neighbour_1 in current_patch_set and neighbour_1 != patch.number:
                     for neighbour_2 in list_of_neighbours[n_1_index + 1:]:  # necessarily n_1 not same as n_2
-                        if neighbour_2 in self.current_patch_list and neighbour_2 != patch.number:
+                        if neighbour_2 in current_patch_set and neighbour_2 != patch.number:
                             # count this triangle in 'all'
                             num_triangles[0] += 1
                             # now check 'same' or different' habitats
@@ -301,22 +584,87 @@ class System_state:
         patch.local_clustering_history[self.step] = lcc
         return lcc
 
-    def calculate_patch_degree(self, patch):
+    def calculate_patch_degree(self, patch, current_patch_set=None):
         # calculate the degree centrality of the patch
+        if current_patch_set is None:
+            current_patch_set = set(self.current_patch_list)
         degree = 0
         set_of_adjacent_patches = set({})
-        for patch_number in range(np.size(self.patch_adjacency_matrix, 0)):
-            if self.patch_adjacency_matrix[patch.number, patch_number] != 0.0 \
-                    or self.patch_adjacency_matrix[patch_number, patch.number] != 0.0:
-                if patch_number in self.current_patch_list:
-                    degree += 1
-                    set_of_adjacent_patches.add(patch_number)
+        for patch_number in sorted(self.patch_neighbours(patch_num=patch.number)):
+            if patch_number in current_patch_set:
+                degree += 1
+                set_of_adjacent_patches.add(patch_number)
         patch.degree = degree
         patch.degree_history[self.step] = degree
         patch.set_of_adjacent_patches = set_of_adjacent_patches
         patch.set_of_adjacent_patches_history[self.step] = list(set_of_adjacent_patches)
         return degree
 
+    def build_patch_neighbour_sets(self):
+        # Sparse (adjacency-list) view of the patch_adjacency_matrix: for each patch, the set of patches that it is
+        # adjacent to in either direction (including itself while its diagonal entry is non-zero). This lets the
+        # network measures iterate over the actual neighbours rather than all N patches. It is kept in sync by
+        # set_patch_adjacency(), through which all changes to the adjacency matrix should be made.
+        num_patches = np.size(self.patch_adjacency_matrix, 0)
+        rows, cols = np.nonzero((self.patch_adjacency_matrix != 0.0) | (self.patch_adjacency_matrix.T != 0.0))
+        row_starts = np.searchsorted(rows, np.arange(num_patches + 1))
+        self.patch_neighbour_sets = [set(cols[row_starts[x]: row_starts[x + 1]].tolist()) for x in range(num_patches)]
+
+    def patch_neighbour_matrix(self):
+        # the neighbour sets as a binary scipy CSR matrix (without the self-adjacency), for the compiled graph routines
+        num_patches = len(self.patch_neighbour_sets)
+        rows = [x for x in range(num_patches) for y in self.patch_neighbour_sets[x] if y != x]
+        cols = [y for x in range(num_patches) for y in self.patch_neighbour_sets[x] if y != x]
+        return csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(num_patches, num_patches))
+
+    def patch_neighbours(self, patch_num):
+        # the set of patches adjacent (in either direction) to the given patch - do not modify this directly
+        return self.patch_neighbour_sets[patch_num]
+
+    def remove_current_patch(self, patch_num):
+        # remove a patch from both the current patch list and the set of current patches
+        self.current_patch_list.remove(patch_num)
+        self.current_patch_set.discard(patch_num)
+
+    def is_patch_adjacent(self, patch_num_1, patch_num_2):
+        # equivalent to checking for a non-zero entry in either [1, 2] or [2, 1] of the patch_adjacency_matrix
+        return patch_num_2 in self.patch_neighbour_sets[patch_num_1]
+
+    def set_patch_adjacency(self, patch_num_1, patch_num_2, adjacency_value, is_symmetric=True):
+        # change the entry (or both entries if symmetric) of the patch_adjacency_matrix and update the neighbour sets
+        old_link_contribution = self.habitat_link_contribution(patch_num_1=patch_num_1, patch_num_2=patch_num_2)
+        self.patch_adjacency_matrix[patch_num_1, patch_num_2] = adjacency_value
+        if is_symmetric:
+            self.patch_adjacency_matrix[patch_num_2, patch_num_1] = adjacency_value
+        self.update_habitat_link_sums(old_contribution=old_link_contribution,
+                                      new_contribution=self.habitat_link_contribution(patch_num_1=patch_num_1,
+                                                                                      patch_num_2=patch_num_2))
+        was_adjacent = self.is_patch_adjacent(patch_num_1=patch_num_1, patch_num_2=patch_num_2)
+        if self.patch_adjacency_matrix[patch_num_1, patch_num_2] != 0.0 \
+                or self.patch_adjacency_matrix[patch_num_2, patch_num_1] != 0.0:
+            self.patch_neighbour_sets[patch_num_1].add(patch_num_2)
+            self.patch_neighbour_sets[patch_num_2].add(patch_num_1)
+        else:
+            self.patch_neighbour_sets[patch_num_1].discard(patch_num_2)
+            self.patch_neighbour_sets[patch_num_2].discard(patch_num_1)
+        if was_adjacent != self.is_patch_adjacent(patch_num_1=patch_num_1, patch_num_2=patch_num_2):
+            # the degree and LCC of both patches change, as does the LCC of their common neighbours (for which this
+            # link closes or opens a triangle)
+            self.mark_degree_update_patches(patch_num_list=[patch_num_1, patch_num_2])
+            self.mark_degree_update_patches(patch_num_list=self.patch_neighbour_sets[patch_num_1] &
+                                                           self.patch_neighbour_sets[patch_num_2])
+
+    def mark_degree_update_patches(self, patch_num_list):
+        # flag patches to have their degree and LCC recalculated by the next calculate_all_patches_degree()
+        if self.degree_update_patch_set is not None:
+            self.degree_update_patch_set.update(patch_num_list)
+
+    def mark_patch_neighbourhood_changed(self, patch_num):
+        # for a change to the patch itself (i.e. habitat type, or removal from the current patch list) which affects
+        # the triangles that it belongs to: flag the patch and all of its neighbours
+        self.mark_degree_update_patches(patch_num_list=[patch_num])
+        self.mark_degree_update_patches(patch_num_list=self.patch_neighbour_sets[patch_num])
+
     def record_xy_adjacency(self):
         for patch_1_num, patch_1 in enumerate(self.patch_list):
             for patch_2 in self.patch_list[patch_1_num + 1:]:
@@ -344,7 +692,7 @@ class System_state:
                 patch.this_habitat_species_traversal[species.name] = \
                     self.habitat_species_traversal[patch.habitat_type_num, species_number]
 
-    def build_species_paths_and_adjacency(self, patch, parameters):
+    def build_species_paths_and_adjacency(self, patch, parameters, species_graphs=None):
         # Sets a list of dictionaries containing the shortest path COST (not SCORE) for each species to travel from the
         # current patch to each other patch.
         # The value of this is stored in patch.species_movement_scores dictionary, where species name is the key.
@@ -363,105 +711,55 @@ class System_state:
         patch.stepping_stone_list = []
         stepping_stone_set = set()
         #
+        if species_graphs is None:
+            species_graphs = self.build_all_species_graphs()
         for species in self.species_set["list"]:
             species_name = species.name
 
-            # use Dijkstra's algorithm for weighted undirected graphs
-            # create dictionary of final patch costs for different path step-lengths [from this current patch]
-            routes_template = {"routes": {"best": (float('inf'), float('inf'), 0.0, [])}}
-            patch_costs = {x: deepcopy(routes_template) for x in range(len(self.patch_list))}
-
-            # zero cost to travel to self (i.e. this patch) for any species
-            patch_costs[patch.number]["routes"]["best"] = (0, 0.0, [])  # 0 steps, 0.0 cost, no intermediate steps
-            patch_costs[patch.number]["routes"][0] = (0.0, [])
-
-            # list of patches whose shortest path has been found
-            visited = []
-            not_visited = [x for x in range(len(self.patch_list))]
-
-            while len(not_visited) > 0:
-
-                # identify the shortest tentative cost/distance to reach a currently-unvisited (in this cycle) node
-                best_tentative_cost = float('inf')
-                best_tentative_length = float('inf')
-                best_tentative_path = []
-                next_vertex_num = 0
-                for possible_next_patch_num in not_visited:
-                    tentative_length = patch_costs[possible_next_patch_num]["routes"]["best"][0]
-                    tentative_cost = patch_costs[possible_next_patch_num]["routes"]["best"][1]
-                    tentative_path = patch_costs[possible_next_patch_num]["routes"]["best"][2]
-                    if tentative_cost < best_tentative_cost:
-                        next_vertex_num = possible_next_patch_num
-                        best_tentative_length = tentative_length
-                        best_tentative_cost = tentative_cost
-                        best_tentative_path = tentative_path
-
-                # if this cost is still infinity, then quit algorithm as the graph is disconnected
-                if best_tentative_cost == float('inf'):
-                    break
-                else:
-                    visited.append(next_vertex_num)
-                    not_visited.remove(next_vertex_num)
-                    next_patch = self.patch_list[next_vertex_num]
-                    # now see if a better score to other patches can be achieved through this one
-                    for other_patch_num, other_patch in enumerate(self.patch_list):
-                        if next_vertex_num != other_patch_num:
-                            # not self!
-                            if self.patch_adjacency_matrix[next_vertex_num, other_patch_num] == 0.0 \
-                                    or other_patch.this_habitat_species_traversal[species_name] <= 0.0:
-                                new_path_cost = float('inf')
-                                new_path_length = float('inf')
-                                new_path = []
-                            else:
-                                new_path_length = best_tentative_length + 1
-                                new_path = best_tentative_path + [next_vertex_num]
-                                # single-path-cost = patch-size / ( habitat-species-traversal * adjacency-border)
-                                new_path_cost = best_tentative_cost + next_patch.size / (
-                                        next_patch.this_habitat_species_traversal[
-                                            species_name] * self.patch_adjacency_matrix[
-                                            next_vertex_num, other_patch_num])
-                                # Note: patch_adjacency_matrix is currently binary, so if this branch is reached
-                                # then part of this function will be 1/1;
-                                # However it is included because in the future we may wish to alter this matrix
-                                # such that there are non-uniform size of borders between patch pairs (separately
-                                # from the role of patch size).
-
-                            # is best overall?
-                            if new_path_cost < patch_costs[other_patch_num]["routes"]["best"][1]:
-                                patch_costs[other_patch_num]["routes"]["best"] = (
-                                    new_path_length, new_path_cost, new_path)
-                            # is best for this length?
-                            if new_path_length not in patch_costs[other_patch_num]["routes"] or \
-                                    new_path_cost < patch_costs[other_patch_num]["routes"][new_path_length][0]:
-                                patch_costs[other_patch_num]["routes"][new_path_length] = (new_path_cost, new_path)
-                            # store the target patch size and traversal score for this species
-                            patch_costs[other_patch_num]["target_patch_size"] = other_patch.size
-                            patch_costs[other_patch_num][
-                                "target_patch_traversal"] = other_patch.this_habitat_species_traversal[species_name]
-
-            # save
-            patch.species_movement_scores[species_name] = patch_costs
-            # now select those that are theoretically reachable for foraging/direct dispersal from this patch
-            # for each species - i.e. if they had infinite dispersal mobility in the CURRENT spatial network
-            # with the given paths and habitats (and that the species' inherent properties of being able to
-            # traverse certain habitats remains unchanged.
-            reachable_patch_nums = []
-            for patch_num in patch.species_movement_scores[species_name]:
-                if patch.species_movement_scores[species_name][patch_num]["routes"]["best"][1] < float('inf'):
-                    reachable_patch_nums.append(patch_num)
-            patch.adjacency_lists[species_name] = reachable_patch_nums
-            # gather a set of the patches used as stepping stones AND the reachable patches (inc. endpoints) using them
-            for target, target_costs in patch_costs.items():
-                possible_routes = target_costs["routes"]
-                if len(possible_routes["best"][-1]) > 0:
-                    for route in possible_routes.values():
-                        path_list = route[-1]
-                        # but do not count arbitrarily long paths
-                        if 0 < len(path_list) <= parameters["main_para"]["ASSUMED_MAX_PATH_LENGTH"] + 1:
-                            stepping_stone_set = stepping_stone_set.union(set(path_list + [int(target)]))
+            # use Dijkstra's algorithm for weighted undirected graphs, with a binary heap over the sparse neighbour
+            # structure of the adjacency matrix (rather than scanning every patch to find the next vertex and then
+            # scanning every patch again to relax). Costs, step-lengths and predecessors are held in arrays and then
+            # converted to the dictionary of final patch costs for different path step-lengths [from this patch].
+            #
+            # single-path-cost = patch-size / ( habitat-species-traversal * adjacency-border)
+            # Note: patch_adjacency_matrix is currently binary, so part of this function will be 1/1;
+            # However it is included because in the future we may wish to alter this matrix
+            # such that there are non-uniform size of borders between patch pairs (separately
+            # from the role of patch size).
+            species_graph = species_graphs[species_name]["graph"]
+            settled_order, path_cost, path_length, predecessor = single_source_dijkstra(graph=species_graph,
+                                                                                        source=patch.number)
+            patch_costs = build_patch_costs(graph=species_graph, source=patch.number, settled_order=settled_order,
+                                            cost=path_cost, hops=path_length, predecessor=predecessor,
+                                            patch_sizes=species_graphs[species_name]["patch_sizes"],
+                                            patch_traversal=species_graphs[species_name]["patch_traversal"])
+            self.store_species_paths_and_adjacency(patch=patch, species_name=species_name, patch_costs=patch_costs,
+                                                   stepping_stone_set=stepping_stone_set, parameters=parameters)
         patch.stepping_stone_list = list(stepping_stone_set)
         print(f"Paths built for patch {patch.number}/{len(self.patch_list) - 1}")
 
+    def store_species_paths_and_adjacency(self, patch, species_name, patch_costs, stepping_stone_set, parameters):
+        # save
+        patch.species_movement_scores[species_name] = patch_costs
+        # now select those that are theoretically reachable for foraging/direct dispersal from this patch
+        # for each species - i.e. if they had infinite dispersal mobility in the CURRENT spatial network
+        # with the given paths and habitats (and that the species' inherent properties of being able to
+        # traverse certain habitats remains unchanged.
+        reachable_patch_nums = []
+        for patch_num in patch.species_movement_scores[species_name]:
+            if patch.species_movement_scores[species_name][patch_num]["routes"]["best"][1] < float('inf'):
+                reachable_patch_nums.append(patch_num)
+        patch.adjacency_lists[species_name] = reachable_patch_nums
+        # gather a set of the patches used as stepping stones AND the reachable patches (inc. endpoints) using them
+        for target, target_costs in patch_costs.items():
+            possible_routes = target_costs["routes"]
+            if len(possible_routes["best"][-1]) > 0:
+                for route in possible_routes.values():
+                    path_list = route[-1]
+                    # but do not count arbitrarily long paths
+                    if 0 < len(path_list) <= parameters["main_para"]["ASSUMED_MAX_PATH_LENGTH"] + 1:
+                        stepping_stone_set.update(path_list + [int(target)])
+
     # --------------------------- SPECIES / COMMUNITY DISTRIBUTION ANALYSIS ----------------------------------------- #
     def update_distance_metrics(self, parameters):
         # Call this to conduct extensive population distribution and community state spatial distribution analysis.
@@ -543,21 +841,24 @@ class System_state:
             # from the current system state, then the position in this list MIGHT NOT MATCH the patch number.
             patch_neighbours.append(self.patch_list[patch_num].set_of_adjacent_patches)
 
-        # gather the data
+        # gather the data (rows are indexed by patch number)
+        local_pop_rows = [[self.patch_list[patch_num].local_populations[species_name] for species_name in species_list]
+                          for patch_num in self.current_patch_list]
         community_state_presence_array = np.zeros([num_patches, num_species])
         community_state_population_array = np.zeros([num_patches, num_species])
         time_averaged_population_array = np.zeros([num_patches, num_species])  # prediction analysis for ave populations
-        for species_index, species_name in enumerate(species_list):
-            for patch_num in self.current_patch_list:
-                # presence/absence
-                community_state_presence_array[patch_num, species_index] = \
-                    self.patch_list[patch_num].local_populations[species_name].occupancy
-                # final population
-                community_state_population_array[patch_num, species_index] = self.patch_list[
-                    patch_num].local_populations[species_name].population
-                # average population
-                time_averaged_population_array[patch_num, species_index] = self.patch_list[
-                    patch_num].local_populations[species_name].average_population
+        if num_patches > 0:
+            patch_rows = np.array(self.current_patch_list)
+            # presence/absence
+            community_state_presence_array[patch_rows, :] = [[x.occupancy for x in row] for row in local_pop_rows]
+            # final population
+            community_state_population_array[patch_rows, :] = [[x.population for x in row] for row in local_pop_rows]
+            # average population
+            time_averaged_population_array[patch_rows, :] = [[x.average_population for x in row]
+                                                             for row in local_pop_rows]
+
+        # the links between the current patches, shared by every network analysis
+        network_links = self.network_analysis_links(patch_habitat=patch_habitat, patch_neighbours=patch_neighbours)
 
         # per species distance metrics - and species presence probabilities (overall and per habitat type)
         network_analysis_species = {}
@@ -570,30 +871,25 @@ class System_state:
                 network_analysis_species[species_name] = {
                     "species_presence": self.network_analysis(
                         patch_value_array=community_state_presence_array[:, species_index],
-                        patch_habitat=patch_habitat, patch_neighbours=patch_neighbours,
+                        patch_habitat=patch_habitat, patch_neighbours=patch_neighbours, network_links=network_links,
                         is_presence=True, is_distribution=False),
 
                     "species_population": self.network_analysis(
                         patch_value_array=norm_species_pop_vector,
-                        patch_habitat=patch_habitat, patch_neighbours=patch_neighbours,
+                        patch_habitat=patch_habitat, patch_neighbours=patch_neighbours, network_links=network_links,
                         is_presence=True, is_distribution=False),
                 }
 
         # community distance metrics
         network_analysis_community_distance = self.network_analysis(
             patch_value_array=community_state_presence_array,
-            patch_habitat=patch_habitat, patch_neighbours=patch_neighbours,
+            patch_habitat=patch_habitat, patch_neighbours=patch_neighbours, network_links=network_links,
             is_presence=False, is_distribution=True)
 
         # each community state probabilities (overall and per habitat type)
         #
         # for each state determine a unique binary identifier
-        community_state_binary = np.zeros(num_patches)
-        for row_index, row in enumerate(community_state_presence_array):
-            binary_identifier = 0
-            for column_index, column_value in enumerate(row):
-                binary_identifier += column_value * 2.0 ** column_index
-            community_state_binary[row_index] = binary_identifier
+        community_state_binary = np.sum(community_state_presence_array * 2.0 ** np.arange(num_species), axis=1)
         # how many UNIQUE states were identified?
         extant_state_set = set({})
         for state in community_state_binary:
@@ -603,13 +899,10 @@ class System_state:
         ordered_state_list.sort()
         network_analysis_state_probability = {}
         for state in [0, 1, 2, 3]:  # ordered_state_list
-            state_array = np.zeros(num_patches)
-            for patch_index, patch_state in enumerate(community_state_binary):
-                if patch_state == state:
-                    state_array[patch_index] = 1.0
+            state_array = np.where(community_state_binary == state, 1.0, 0.0)
             network_analysis_state_probability[state] = self.network_analysis(
                 patch_value_array=state_array, patch_habitat=patch_habitat,
-                patch_neighbours=patch_neighbours, is_presence=True, is_distribution=False)
+                patch_neighbours=patch_neighbours, network_links=network_links, is_presence=True, is_distribution=False)
             state_species_list = []
             for species_index in range(len(species_list)):
                 if np.mod(state, int(2.0 ** (species_index + 1))) >= int(2.0 ** species_index):
@@ -689,7 +982,35 @@ class System_state:
                 shannon_entropy, inter_species_predictions_final, inter_species_predictions_average,
                 complexity_final, complexity_average, rank_abundance_final, rank_abundance_average]
 
-    def network_analysis(self, patch_value_array, patch_habitat, patch_neighbours, is_presence, is_distribution):
+    def network_analysis_links(self, patch_habitat, patch_neighbours):
+        # Arrays of every link between the patches (counted once, in the order in which network_analysis() has always
+        # visited them) as the index of each end, and the habitat-pair code of the link for network_analysis(), which
+        # therefore does not need to walk the neighbour sets again for every analysis.
+        num_patches = len(patch_neighbours)
+        link_from = []
+        link_to = []
+        for patch_num in range(num_patches):
+            # avoid double counting
+            for patch_neighbour in patch_neighbours[patch_num]:
+                if patch_neighbour > patch_num:
+                    link_from.append(patch_num)
+                    link_to.append(patch_neighbour)
+        link_from = np.array(link_from, dtype=int)
+        link_to = np.array(link_to, dtype=int)
+        from_habitat = np.array(patch_habitat, dtype=int)[link_from] if num_patches > 0 else np.zeros(0, dtype=int)
+        to_habitat = np.array([self.patch_list[x].habitat_type_num for x in link_to.tolist()], dtype=int)
+        # order the habitat pairs
+        small_habitat = np.minimum(from_habitat, to_habitat)
+        large_habitat = np.maximum(from_habitat, to_habitat)
+        return {
+            "from": link_from,
+            "to": link_to,
+            "is_same": from_habitat == to_habitat,
+            "habitat_pairs": list(zip(small_habitat.tolist(), large_habitat.tolist())),
+        }
+
+    def network_analysis(self, patch_value_array, patch_habitat, patch_neighbours, is_presence, is_distribution,
+                         network_links=None):
         # need value, habitat type, and neighbours of each patch for presence, auto_correlation, clustering analysis
         num_patches = len(self.current_patch_list)
         if np.ndim(patch_value_array) == 1:
@@ -701,6 +1022,8 @@ class System_state:
         if len(patch_value_array) != num_patches:
             # how many ROWS in the array? Should match length of current_patch_list
             raise Exception("Incorrect dimensions of value array.")
+        if network_links is None:
+            network_links = self.network_analysis_links(patch_habitat=patch_habitat, patch_neighbours=patch_neighbours)
 
         # set up the required nested dictionaries to hold results
         template_auto_corr = {"all": np.array([0.0, 0.0]),  # (matching pairs, eligible pairs)
@@ -733,60 +1056,52 @@ class System_state:
             # i.e. skip this for full community states
             template_presence["all"] = np.array([np.mean(patch_value_array), np.std(patch_value_array)])
             for habitat_type_num_1 in habitat_type_nums:
-                habitat_subnet = [patch_value_array[x] for x in range(
-                    num_patches) if patch_habitat[x] == habitat_type_num_1]
+                habitat_subnet = np.asarray(patch_value_array)[np.array(patch_habitat) == habitat_type_num_1]
                 if len(habitat_subnet) > 0:
                     template_presence[habitat_type_num_1] = np.array([np.mean(habitat_subnet), np.std(habitat_subnet)])
 
         # auto-correlation
-        for patch_num in range(num_patches):
-            this_patch_habitat = patch_habitat[patch_num]
-            # note that we do *NOT* also calculate this separately for each community state (0-2^N) or
-            # species state (0-1, i.e. we do not restrict to counting only over patches where the species was present,
-            # but we should be able to easily obtain this average instead if desired since we also store the probability
-            # of species presence, and of each community state).
-            for patch_neighbour in patch_neighbours[patch_num]:
-
-                # avoid double counting
-                if patch_neighbour > patch_num:
-
-                    neighbouring_patch_habitat = self.patch_list[patch_neighbour].habitat_type_num
-                    # taxicab / manhattan norm:
-                    difference_vector = patch_value_array[patch_num] - patch_value_array[patch_neighbour]
-                    if np.ndim(difference_vector) == 0:
-                        difference_vector = [difference_vector]
-                    l1_difference = np.linalg.norm(difference_vector, ord=1)
-                    integer_difference = int(l1_difference)  # only for degree distributions
-                    normalised_difference = float(l1_difference) / max_difference
-                    similarity = 1.0 - normalised_difference
-
-                    # community difference distributions
-                    if is_distribution:
-                        # the taxi cab norm (for presence/absence state values) has the advantage of being a
-                        # finite set of possible values
-                        difference_modifier = 1
-                    else:
-                        difference_modifier = 0
-
-                    # all
-                    template_auto_corr['all'] += [similarity, 1.0]
-                    # same
-                    if this_patch_habitat == neighbouring_patch_habitat:
-                        template_auto_corr['same'] += [similarity, 1.0]
-                        if is_distribution:
-                            difference_distribution['same'][integer_difference] += difference_modifier
-                    else:
-                        template_auto_corr['different'] += [similarity, 1.0]
-                        if is_distribution:
-                            difference_distribution['different'][integer_difference] += difference_modifier
-                    # specific habitat combinations
-                    small_habitat = min(this_patch_habitat, neighbouring_patch_habitat)  # order them
-                    large_habitat = max(this_patch_habitat, neighbouring_patch_habitat)
-                    template_auto_corr[(small_habitat, large_habitat)] += [similarity, 1.0]
-                    if is_distribution:
-                        difference_distribution['all'][integer_difference] += difference_modifier
-                        difference_distribution[(small_habitat, large_habitat)][
-                            integer_difference] += difference_modifier
+        #
+        # note that we do *NOT* also calculate this separately for each community state (0-2^N) or
+        # species state (0-1, i.e. we do not restrict to counting only over patches where the species was present,
+        # but we should be able to easily obtain this average instead if desired since we also store the probability
+        # of species presence, and of each community state).
+        #
+        # taxicab / manhattan norm of the difference across each link:
+        difference_array = np.asarray(patch_value_array)[network_links["from"]] - np.asarray(
+            patch_value_array)[network_links["to"]]
+        if np.ndim(difference_array) == 1:
+            l1_difference = np.abs(difference_array)
+        else:
+            l1_difference = np.sum(np.abs(difference_array), axis=1)
+        integer_difference = l1_difference.astype(int)  # only for degree distributions
+        similarity = 1.0 - l1_difference / max_difference
+
+        # each link counts towards "all", either "same" or "different", and its specific habitat combination, which are
+        # summed by key (in link order, as the separate running totals would be)
+        key_list = list(template_auto_corr.keys())
+        key_index = {key: index for index, key in enumerate(key_list)}
+        num_links = len(similarity)
+        link_keys = np.concatenate([
+            np.full(num_links, key_index["all"], dtype=int),
+            np.where(network_links["is_same"], key_index["same"], key_index["different"]),
+            np.array([key_index[x] for x in network_links["habitat_pairs"]], dtype=int),
+        ])
+        similarity_sums = np.bincount(link_keys, weights=np.tile(similarity, 3), minlength=len(key_list))
+        link_counts = np.bincount(link_keys, minlength=len(key_list)).astype(float)
+        for index, key in enumerate(key_list):
+            template_auto_corr[key] += [similarity_sums[index], link_counts[index]]
+
+        # community difference distributions
+        if is_distribution:
+            # the taxi cab norm (for presence/absence state values) has the advantage of being a
+            # finite set of possible values
+            distribution_keys = list(difference_distribution.keys())
+            distribution_array = np.array(list(difference_distribution.values()))
+            distribution_index = np.array([distribution_keys.index(key) for key in key_list], dtype=int)
+            np.add.at(distribution_array, (distribution_index[link_keys], np.tile(integer_difference, 3)), 1.0)
+            for index, key in enumerate(distribution_keys):
+                difference_distribution[key] = distribution_array[index]
 
         output_dict = {
             "auto_correlation": template_auto_corr,
@@ -1182,61 +1497,35 @@ class System_state:
         sub_networks = {}
         sub_network_list = [x for x in habitat_type_nums]
         sub_network_list.append('all')
+        patch_habitat_array = np.array(patch_habitat)
         for network_key in sub_network_list:
-            # need adjacency matrix and population array
-            temp_num_patches = len(self.current_patch_list)
-            temp_adjacency = deepcopy(self.patch_adjacency_matrix)
-            temp_population = deepcopy(population_array)
-            temp_patch_habitat = deepcopy(patch_habitat)
-
-            # if restricting to a single-habitat sub-network, iterate to eliminate unwanted rows and columns
-            if network_key != 'all':
-                is_pass = False
-                while temp_num_patches > 0 and not is_pass:
-                    is_pass = True
-                    for temp_patch_index in range(temp_num_patches):
-                        if temp_patch_habitat[temp_patch_index] != network_key:
-                            # remove
-                            temp_patch_habitat.pop(temp_patch_index)
-                            temp_population = np.delete(temp_population, temp_patch_index, axis=0)
-                            temp_adjacency = np.delete(temp_adjacency, temp_patch_index, axis=0)
-                            temp_adjacency = np.delete(temp_adjacency, temp_patch_index, axis=1)
-                            # failed to cycle uninterrupted
-                            is_pass = False
-                            temp_num_patches -= 1
-                            break
+            # need adjacency matrix and population array - if restricting to a single-habitat sub-network, keep only
+            # the rows and columns of patches of that habitat
+            if network_key == 'all':
+                temp_num_patches = len(self.current_patch_list)
+                temp_adjacency = np.array(self.patch_adjacency_matrix)
+                temp_population = np.array(population_array)
+            else:
+                is_in_network = patch_habitat_array == network_key
+                temp_num_patches = int(np.sum(is_in_network))
+                temp_adjacency = np.asarray(self.patch_adjacency_matrix)[np.ix_(is_in_network, is_in_network)]
+                temp_population = np.asarray(population_array)[is_in_network, :]
 
             # check for non-zero size of sub-network:
             if temp_num_patches > 0:
-                # now generate the radius-averaged population vectors for each species in this habitat sub-network
-                radius_one_population_array = np.zeros(np.shape(temp_population))
-                radius_two_population_array = np.zeros(np.shape(temp_population))
-                for temp_patch_index in range(temp_num_patches):
-                    for ball_radius in range(1, 3):
-                        if ball_radius == 1:
-                            # ball (radius 1)
-                            ball_patch_indices = list(np.where(temp_adjacency[temp_patch_index, :] != 0)[0])
-                            ball_size = len(ball_patch_indices)
-                        elif ball_radius == 2:
-                            # ball (radius 2)
-                            composite_adjacency = np.matmul(temp_adjacency, temp_adjacency)
-                            ball_patch_indices = list(np.where(composite_adjacency[temp_patch_index, :] != 0)[0])
-                            ball_size = len(ball_patch_indices)
-                        else:
-                            raise Exception("Invalid ball radius.")
-                        # now iterate over each species and take the average population over the elements of the ball
-                        for species_index in range(np.shape(temp_population)[1]):
-                            ball_population = 0.0
-                            for ball_index in ball_patch_indices:
-                                ball_population += temp_population[ball_index, species_index]
-                            if ball_radius == 1:
-                                radius_one_population_array[
-                                    temp_patch_index, species_index] = ball_population / ball_size
-                            elif ball_radius == 2:
-                                radius_two_population_array[
-                                    temp_patch_index, species_index] = ball_population / ball_size
-                            else:
-                                raise Exception("Invalid ball radius.")
+                # now generate the radius-averaged population vectors for each species in this habitat sub-network,
+                # as the average population over the elements of the ball (radius 1) and of the ball (radius 2) of the
+                # composite adjacency - as sparse matrix products of the ball memberships with the population array,
+                # which sum over each ball in increasing patch order
+                sparse_adjacency = csr_matrix(temp_adjacency)
+                composite_adjacency = sparse_adjacency @ sparse_adjacency
+                radius_population_arrays = []
+                for ball_adjacency in [sparse_adjacency, composite_adjacency]:
+                    ball_membership = csr_matrix(ball_adjacency != 0, dtype=float)
+                    ball_membership.sort_indices()
+                    ball_size = np.diff(ball_membership.indptr)
+                    radius_population_arrays.append((ball_membership @ temp_population) / ball_size[:, np.newaxis])
+                radius_one_population_array, radius_two_population_array = radius_population_arrays
 
                 # For each radius, identify max local population for each species and create normalised pop. matrix:
                 population_array_dict = {
@@ -1246,21 +1535,19 @@ class System_state:
                 }
                 normalised_pop_array_dict = {}
                 for ball_radius in range(3):
-                    normalised_pop_array = np.zeros(np.shape(population_array_dict[ball_radius]))
-                    for species_index in range(np.shape(population_array_dict[ball_radius])[1]):
-                        species_max_population = np.max(population_array_dict[ball_radius][:, species_index])
-                        if species_max_population > 0.0:
-                            normalised_pop_array[:, species_index] = population_array_dict[ball_radius][
-                                                                     :, species_index] / species_max_population
-                    normalised_pop_array_dict[ball_radius] = deepcopy(normalised_pop_array)
+                    species_max_population = np.max(population_array_dict[ball_radius], axis=0)
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        normalised_pop_array_dict[ball_radius] = np.where(
+                            species_max_population > 0.0, population_array_dict[ball_radius] / species_max_population,
+                            0.0)
 
                 # now store the single-habitat subnetwork
-                sub_networks[network_key] = deepcopy({
+                sub_networks[network_key] = {
                     "num_patches": temp_num_patches,
                     "population_arrays": population_array_dict,
                     "normalised_population_arrays": normalised_pop_array_dict,
                     "adjacency_array": temp_adjacency,
-                })
+                }
             else:
                 sub_networks[network_key] = {"num_patches": 0}
         return sub_networks
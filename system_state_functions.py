@@ -66,25 +66,24 @@ def generate_cluster(sub_network, size):
             # initial
             draw_num = np.random.choice(eligible_patch_indices)
             cluster.append(draw_num)
-            eligible_patch_indices.remove(draw_num)
 
             # attempt to draw an element connected to existing elements
             if size > 1:
+                # the patches linked (in either direction) to any current cluster member, updated as each is added
+                is_eligible = np.ones(sub_network["num_patches"], dtype=bool)
+                is_eligible[draw_num] = False
+                is_neighbour = (adjacency_matrix[draw_num, :] == 1) | (adjacency_matrix[:, draw_num] == 1)
                 for num_element in range(size - 1):
 
-                    possible_draw = set()
-                    # find the neighbours of the current cluster members
-                    for potential_element in eligible_patch_indices:
-                        for existing_member in cluster:
-                            if adjacency_matrix[existing_member, potential_element] == 1 or \
-                                    adjacency_matrix[potential_element, existing_member] == 1:
-                                possible_draw.add(potential_element)
-                                break
+                    # find the neighbours of the current cluster members (collected in a set, in increasing order, to
+                    # draw from them in the same order as always)
+                    possible_draw = set(np.flatnonzero(is_neighbour & is_eligible).tolist())
                     draw_list = list(possible_draw)
                     if len(draw_list) > 0:
                         draw_num = np.random.choice(draw_list)
                         cluster.append(draw_num)
-                        eligible_patch_indices.remove(draw_num)
+                        is_eligible[draw_num] = False
+                        is_neighbour |= (adjacency_matrix[draw_num, :] == 1) | (adjacency_matrix[:, draw_num] == 1)
                     else:
                         is_success = False
                         cluster = []
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from local_population import functional_response, functional_response_array, functional_response_lotka_volterra, \
+    functional_response_holling_II, functional_response_beddington_deangelis, functional_response_ratio_dependent
+
+PREDATION_FUNCTIONS = {
+    "lotka_volterra": functional_response_lotka_volterra,
+    "holling_II": functional_response_holling_II,
+    "beddington_deangelis": functional_response_beddington_deangelis,
+    "ratio_dependent": functional_response_ratio_dependent,
+}
+PREDATION_PARA = {"B": 0.7, "C": 1.3}
+
+
+def baseline_functional_response(predation_func, predator_population, prey_population, attack_rate):
+    # the original scalar form, min(prey, predator * f(...)), evaluated with numpy scalars so that the zero-division
+    # cases give inf or NaN rather than raising
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        return min(prey_population,
+                   predator_population * PREDATION_FUNCTIONS[predation_func](attack_rate=attack_rate,
+                                                                             predation_para=PREDATION_PARA,
+                                                                             predator_population=predator_population,
+                                                                             prey_population=prey_population))
+
+
+def build_populations(seed):
+    # random populations, plus the zero, tie and non-finite cases
+    rng = np.random.default_rng(seed)
+    predator_population = rng.choice([0.0, 0.5, 1.0, 3.0, 20.0], size=60) * rng.random(60) * 2.0
+    prey_population = rng.choice([0.0, 0.25, 1.0, 10.0], size=60) * rng.random(60) * 2.0
+    predator_population = np.concatenate([predator_population, [0.0, 0.0, 2.0, 1.0, 4.0, 1.0, np.nan, 1.0, np.inf]])
+    prey_population = np.concatenate([prey_population, [0.0, 3.0, 0.0, 2.0, 2.0, np.nan, 1.0, np.inf, 1.0]])
+    return predator_population, prey_population
+
+
+def assert_same(result, expected):
+    # equal to the last bit, with NaN in the same places, and with the same sign of any zero
+    expected = np.array(expected, dtype=float)
+    assert np.array_equal(result, expected, equal_nan=True)
+    assert np.array_equal(np.signbit(result), np.signbit(expected))
+
+
+@pytest.mark.parametrize("predation_func", list(PREDATION_FUNCTIONS))
+@pytest.mark.parametrize("is_array_attack_rate", [False, True])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_functional_response_matches_baseline(predation_func, is_array_attack_rate, seed):
+    predator_population, prey_population = build_populations(seed=seed)
+    if is_array_attack_rate:
+        attack_rate = np.random.default_rng(seed + 100).random(len(predator_population)) * 3.0
+        attack_rate[:3] = [0.0, np.inf, 0.5]
+    else:
+        attack_rate = 1.7
+    attack_rate_list = np.broadcast_to(attack_rate, predator_population.shape)
+
+    expected = [baseline_functional_response(predation_func=predation_func, predator_population=pred,
+                                             prey_population=prey, attack_rate=rate)
+                for pred, prey, rate in zip(predator_population, prey_population, attack_rate_list)]
+
+    # array form for all local populations at once
+    result = functional_response_array(predation_func=predation_func, predation_para=PREDATION_PARA,
+                                       predator_population=predator_population, prey_population=prey_population,
+                                       attack_rate=attack_rate, time=0)
+    assert_same(result, expected)
+
+    # scalar wrapper for each local population
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        scalar_result = [functional_response(predation_func=predation_func, predation_para=PREDATION_PARA,
+                                             predator_population=pred, prey_population=prey, attack_rate=rate, time=0)
+                         for pred, prey, rate in zip(predator_population, prey_population, attack_rate_list)]
+    assert_same(np.array(scalar_result), expected)
+
+
+def test_functional_response_ties_and_nan_return_prey():
+    # min(prey, x) keeps the prey population when x equals it (including a negative zero) or is NaN, as in the
+    # ratio-dependent response with neither predators nor prey
+    result = functional_response_array(predation_func="ratio_dependent", predation_para=PREDATION_PARA,
+                                       predator_population=np.array([0.0]), prey_population=np.array([0.0]),
+                                       attack_rate=1.0, time=0)
+    assert_same(result, [0.0])
+    result = functional_response_array(predation_func="lotka_volterra", predation_para=PREDATION_PARA,
+                                       predator_population=np.array([1.0, 2.0, -0.0]),
+                                       prey_population=np.array([2.0, 0.5, 0.0]),
+                                       attack_rate=1.0, time=0)
+    assert_same(result, [2.0, 0.5, 0.0])
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from history_store import History_store, HISTORY_CHANNELS
+from data_manager_functions import write_population_history_data
+
+NUM_STEPS = 40
+NUM_PATCHES = 4
+DECIMATED_STEPS = 17
+SPECIES_LIST = [SimpleNamespace(name="prey"), SimpleNamespace(name="predator")]
+# the policy of each channel, covering all four of them
+POLICY = {"population": 3, "internal_change": "summary", "population_leave": "none", "population_enter": "full",
+          "potential_dispersal": "summary"}
+
+
+def fill_stores(stores, seed):
+    # give every store the same steps, mostly for all local populations at once, but sometimes only for some of them
+    # (so that they reach different lengths) or for a single local population
+    rng = np.random.default_rng(seed)
+    shape = (NUM_PATCHES, len(SPECIES_LIST), len(HISTORY_CHANNELS))
+    for step in range(NUM_STEPS):
+        values = rng.normal(size=shape)
+        if step % 5 == 4:
+            patch_index, column_index = np.nonzero(rng.random(shape[:2]) < 0.7)
+            for store in stores:
+                store.record_all(values=values[patch_index, column_index], patch_index=patch_index,
+                                 column_index=column_index)
+        elif step % 7 == 6:
+            for store in stores:
+                store.record(patch_num=1, species_name="predator", values=values[1, 1])
+        else:
+            for store in stores:
+                store.record_all(values=values)
+
+
+def test_decimation_policies_match_full_store():
+    full_store = History_store(num_steps=NUM_STEPS, num_patches=NUM_PATCHES, species_list=SPECIES_LIST)
+    store = History_store(num_steps=NUM_STEPS, num_patches=NUM_PATCHES, species_list=SPECIES_LIST,
+                          decimated_steps=DECIMATED_STEPS, decimation_policy=POLICY)
+    fill_stores(stores=[full_store, store], seed=0)
+    assert np.array_equal(store.length, full_store.length)
+    assert store.array.shape[0] < full_store.array.shape[0]
+
+    for patch_num in range(NUM_PATCHES):
+        for species in SPECIES_LIST:
+            full_views = full_store.views(patch_num=patch_num, species_name=species.name)
+            views = store.views(patch_num=patch_num, species_name=species.name)
+            summaries = store.transient_summary(patch_num=patch_num, species_name=species.name)
+            for channel_name, full_view, view in zip(HISTORY_CHANNELS, full_views, views):
+                policy = POLICY[channel_name]
+                expected = np.array(full_view)
+                steps = np.arange(len(expected))
+                is_transient = steps < DECIMATED_STEPS
+                if policy == "full":
+                    is_kept = np.ones(len(expected), dtype=bool)
+                elif policy in ["summary", "none"]:
+                    is_kept = ~is_transient
+                else:
+                    is_kept = ~is_transient | (steps % policy == 0)
+                expected[~is_kept] = np.nan
+                assert np.array_equal(np.array(view), expected, equal_nan=True)
+                assert [view[x] for x in range(len(view))] == pytest.approx(list(expected), nan_ok=True)
+                assert np.array_equal(view[3:-2], expected[3:-2], equal_nan=True)
+
+                # the summaries are of the transient steps of the full-resolution history
+                if policy == "summary":
+                    transient = np.array(full_view)[is_transient]
+                    assert summaries[channel_name][0] == np.min(transient)
+                    assert summaries[channel_name][1] == pytest.approx(np.mean(transient), rel=1e-12)
+                    assert summaries[channel_name][2] == np.max(transient)
+                else:
+                    assert channel_name not in summaries
+
+
+def test_full_policy_matches_no_policy():
+    full_store = History_store(num_steps=NUM_STEPS, num_patches=NUM_PATCHES, species_list=SPECIES_LIST)
+    store = History_store(num_steps=NUM_STEPS, num_patches=NUM_PATCHES, species_list=SPECIES_LIST,
+                          decimated_steps=DECIMATED_STEPS, decimation_policy={x: "full" for x in HISTORY_CHANNELS})
+    fill_stores(stores=[full_store, store], seed=1)
+    for patch_num in range(NUM_PATCHES):
+        for species in SPECIES_LIST:
+            for full_view, view in zip(full_store.views(patch_num=patch_num, species_name=species.name),
+                                       store.views(patch_num=patch_num, species_name=species.name)):
+                assert np.array_equal(np.array(view), np.array(full_view))
+            assert store.transient_summary(patch_num=patch_num, species_name=species.name) == {}
+
+
+def test_unrecognised_policy_raises():
+    for policy in [0, -2, 1.5, True, "mean"]:
+        with pytest.raises(Exception, match="not recognised"):
+            History_store(num_steps=NUM_STEPS, num_patches=NUM_PATCHES, species_list=SPECIES_LIST,
+                          decimated_steps=DECIMATED_STEPS, decimation_policy={"population": policy})
+
+
+def test_transient_summary_is_saved(tmp_path):
+    store = History_store(num_steps=NUM_STEPS, num_patches=NUM_PATCHES, species_list=SPECIES_LIST,
+                          decimated_steps=DECIMATED_STEPS, decimation_policy=POLICY)
+    fill_stores(stores=[store], seed=2)
+    patch_list = []
+    for patch_num in range(NUM_PATCHES):
+        local_populations = {}
+        for species in SPECIES_LIST:
+            views = store.views(patch_num=patch_num, species_name=species.name)
+            local_populations[species.name] = SimpleNamespace(
+                name=species.name, history_store=store, population_history=views[0], internal_change_history=views[1],
+                population_leave_history=views[2], population_enter_history=views[3])
+        patch_list.append(SimpleNamespace(number=patch_num, local_populations=local_populations))
+    write_population_history_data(patch_list=patch_list, sim_path=tmp_path, step=5)
+
+    for patch_num in range(NUM_PATCHES):
+        for species in SPECIES_LIST:
+            file_name = tmp_path / "5" / "data" / "local_pop_csv" / f"patch_{patch_num}_{species.name}_transient.csv"
+            lines = [x.split(", ") for x in file_name.read_text().splitlines()]
+            summaries = store.transient_summary(patch_num=patch_num, species_name=species.name)
+            assert [x[0] for x in lines] == ["internal_change", "potential_dispersal"]
+            for line in lines:
+                assert [float(x) for x in line[1:]] == pytest.approx(list(summaries[line[0]]), rel=1e-15)
@@ -0,0 +1,90 @@
+import math
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from local_population import build_hurst_exponents_of_populations, hurst_exponents
+
+
+def reference_hurst_exponent(series, min_window=10):
+    # straightforward R/S estimate of a single series, window by window
+    series = list(series)
+    if len(series) < 100 or any(np.isnan(x) for x in series):
+        return None
+    window_sizes = [int(10 ** x) for x in np.arange(math.log10(min_window), math.log10(len(series) - 1), 0.25)]
+    window_sizes.append(len(series))
+    mean_rs = []
+    for window_size in window_sizes:
+        rs_values = []
+        for start in range(0, len(series) - window_size + 1, window_size):
+            window = series[start: start + window_size]
+            value_range = max(window) - min(window)
+            with np.errstate(invalid="ignore"):
+                st_dev = np.std(np.diff(window), ddof=1)
+            if value_range != 0.0 and st_dev != 0.0:
+                rs_values.append(value_range / st_dev)
+        if len(rs_values) == 0:
+            return None
+        mean_rs.append(sum(rs_values) / len(rs_values))
+    with np.errstate(all="ignore"):
+        log_rs = np.log10(mean_rs)
+    if not np.all(np.isfinite(log_rs)):
+        return None
+    exponent, log_constant = np.polyfit(np.log10(window_sizes), log_rs, 1)
+    return exponent, 10 ** log_constant, [window_sizes, mean_rs]
+
+
+def assert_same_result(result, expected):
+    if expected is None:
+        assert result is None
+        return
+    assert result[0] == pytest.approx(expected[0], rel=1e-9, abs=1e-12)
+    assert result[1] == pytest.approx(expected[1], rel=1e-9)
+    assert result[2][0] == expected[2][0]
+    assert result[2][1] == pytest.approx(expected[2][1], rel=1e-12)
+
+
+def test_unsuitable_histories_have_no_exponent():
+    rng = np.random.default_rng(0)
+    walk = np.cumsum(rng.normal(size=300))
+    with_nan = walk.copy()
+    with_nan[150] = np.nan
+    with_inf = walk.copy()
+    with_inf[40] = np.inf
+    series_array = np.array([
+        walk,
+        with_nan,  # NaN in the history (e.g. an unrecorded transient step)
+        np.full(300, 2.5),  # constant, so no window has a defined R/S (R is zero)
+        np.arange(300.0) + 3.0,  # a ramp, so no window has a defined R/S (S is zero)
+        with_inf,  # a non-finite log(R/S)
+    ])
+    results = hurst_exponents(series_array=series_array)
+    assert results[0] is not None
+    assert results[1:] == [None] * 4
+    # too short
+    assert hurst_exponents(series_array=series_array[:, :99]) == [None] * 5
+    assert hurst_exponents(series_array=series_array[:1, :100])[0] is not None
+    for series, result in zip(series_array, results):
+        assert_same_result(result=result, expected=reference_hurst_exponent(series))
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_hurst_exponents_match_reference(num_workers):
+    # seeded random walks of several lengths (so several length groups), some with occasional plateaus so that
+    # windows with zero R are skipped, plus some unsuitable histories
+    rng = np.random.default_rng(1)
+    local_pop_list = []
+    for length in [99, 100, 150, 400, 400, 400, 1000, 150]:
+        steps = rng.normal(size=length) * (rng.random(length) < rng.choice([1.0, 0.7]))
+        local_pop_list.append(SimpleNamespace(population_history=list(np.cumsum(steps) + 50.0)))
+    local_pop_list[4].population_history[7] = np.nan
+    local_pop_list.append(SimpleNamespace(population_history=[1.0] * 400))
+    build_hurst_exponents_of_populations(local_pop_list=local_pop_list, num_workers=num_workers)
+    for local_pop in local_pop_list:
+        assert_same_result(result=local_pop.population_history_hurst_exponent,
+                           expected=reference_hurst_exponent(local_pop.population_history))
+    assert [x.population_history_hurst_exponent is None for x in local_pop_list] == [
+        True, False, False, False, True, False, False, False, True]
+    # random walks should give exponents of roughly one half
+    for local_pop in local_pop_list:
+        if local_pop.population_history_hurst_exponent is not None:
+            assert 0.2 < local_pop.population_history_hurst_exponent[0] < 0.9
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from local_population import Local_population
+from ode_recording_store import Ode_recording_store, Ode_recording_view
+
+NUM_STEPS = 12
+NUM_PATCHES = 3
+SPECIES_LIST = [SimpleNamespace(name="prey"), SimpleNamespace(name="predator"), SimpleNamespace(name="omnivore")]
+ATTRIBUTES = ["population", "r_value", "r_mod", "r_final", "l_final", "k_final", "competitors_final", "local_growth",
+              "direct_impact_value", "prey_gain", "predation_loss"]
+
+
+def build_local_pops(ode_recording_store):
+    # the attributes read by Local_population.ode_recordings(), with the recordings held either in a dictionary or in
+    # the given store
+    local_pops = []
+    for patch_num in range(NUM_PATCHES):
+        for species in SPECIES_LIST:
+            local_pop = SimpleNamespace(patch_num=patch_num, name=species.name,
+                                        ode_recording_store=ode_recording_store, ode_recording={})
+            if ode_recording_store is not None:
+                local_pop.ode_recording = Ode_recording_view(store=ode_recording_store, patch_num=patch_num,
+                                                             species_name=species.name)
+            local_pops.append(local_pop)
+    return local_pops
+
+
+def update_local_pops(local_pops, rng):
+    # new ODE details, with only some of the g-values reached and a ragged number of kills and killed values: the
+    # (value, effort) tuples of kills["g0"], ["g1"] and ["g2"], and the plain values of kills["g3"] and of killed
+    for local_pop in local_pops:
+        for attribute in ATTRIBUTES:
+            setattr(local_pop, attribute, float(rng.normal()))
+        local_pop.g_values = {x: float(rng.random()) for x in ["g0", "g1", "g2", "g3"][:rng.integers(5)]}
+        local_pop.kills = {x: {} for x in ["g0", "g1", "g2", "g3"]}
+        local_pop.killed = {x: {} for x in ["g0", "g1", "g2", "g3"]}
+        for stage in ["g0", "g1", "g2", "g3"]:
+            for other in rng.choice(local_pops, size=rng.integers(4), replace=False):
+                if stage == "g3":
+                    local_pop.kills[stage][id(other)] = float(rng.random())
+                else:
+                    local_pop.kills[stage][id(other)] = (float(rng.random()), float(rng.random()))
+            for other in rng.choice(local_pops, size=rng.integers(3), replace=False):
+                local_pop.killed[stage][id(other)] = float(rng.random())
+
+
+def run_recordings(store, seed, num_steps=NUM_STEPS):
+    # the same ODE details recorded in dictionaries and in the store, returning the local populations of each
+    rng = np.random.default_rng(seed)
+    dict_local_pops = build_local_pops(ode_recording_store=None)
+    store_local_pops = build_local_pops(ode_recording_store=store)
+    for step in range(num_steps):
+        update_local_pops(local_pops=dict_local_pops, rng=rng)
+        for dict_local_pop, store_local_pop in zip(dict_local_pops, store_local_pops):
+            for attribute in ATTRIBUTES + ["g_values", "kills", "killed"]:
+                setattr(store_local_pop, attribute, getattr(dict_local_pop, attribute))
+            time = 0.5 * step if step % 2 else step
+            Local_population.ode_recordings(dict_local_pop, time=time, step=step)
+            Local_population.ode_recordings(store_local_pop, time=time, step=step)
+    return dict_local_pops, store_local_pops
+
+
+def assert_same_recording(recording, expected):
+    assert list(recording) == list(expected)
+    for key, value in expected.items():
+        if key in ["kills", "killed"]:
+            for stage, stage_values in value.items():
+                assert recording[key][stage] == stage_values
+                assert [type(x) for x in recording[key][stage]] == [type(x) for x in stage_values]
+        else:
+            assert recording[key] == value
+
+
+@pytest.mark.parametrize("is_undersized", [False, True])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_view_matches_dict_recordings(seed, is_undersized):
+    # an undersized store has to grow both its table and its buffer of the kills as it is recorded
+    store = Ode_recording_store(num_steps=2 if is_undersized else NUM_STEPS, num_patches=NUM_PATCHES,
+                                species_list=SPECIES_LIST)
+    dict_local_pops, store_local_pops = run_recordings(store=store, seed=seed)
+    assert store.num_rows == NUM_STEPS * NUM_PATCHES * len(SPECIES_LIST)
+    for dict_local_pop, store_local_pop in zip(dict_local_pops, store_local_pops):
+        view = store_local_pop.ode_recording
+        assert len(view) == len(dict_local_pop.ode_recording) == NUM_STEPS
+        assert list(view) == list(dict_local_pop.ode_recording)
+        for step, expected in dict_local_pop.ode_recording.items():
+            assert_same_recording(recording=view[step], expected=expected)
+        recordings = store.recordings(patch_num=store_local_pop.patch_num, species_name=store_local_pop.name)
+        assert dict(view) == recordings == dict_local_pop.ode_recording
+
+
+def test_recording_is_restricted_to_selection():
+    step_windows = [(2, 4), (9, 9)]
+    store = Ode_recording_store(num_steps=NUM_STEPS, num_patches=NUM_PATCHES, species_list=SPECIES_LIST,
+                                patch_nums=[0, 2], species_names=["predator"], step_windows=step_windows)
+    assert [step for step in range(NUM_STEPS) if store.is_step_recorded(step)] == [2, 3, 4, 9]
+    assert store.table.shape[0] == 2 * 1 * 4
+    dict_local_pops, store_local_pops = run_recordings(store=store, seed=3)
+    assert store.num_rows == store.table.shape[0]
+    for dict_local_pop, store_local_pop in zip(dict_local_pops, store_local_pops):
+        view = store_local_pop.ode_recording
+        if store_local_pop.patch_num in [0, 2] and store_local_pop.name == "predator":
+            assert list(view) == [2, 3, 4, 9]
+            for step in view:
+                assert_same_recording(recording=view[step], expected=dict_local_pop.ode_recording[step])
+        else:
+            assert len(view) == 0
+            with pytest.raises(KeyError):
+                view[3]
+
+
+def test_invalid_step_window_raises():
+    for step_windows in [[(5, 4)], [(1, 2), (3,)], [(0, 1, 2)]]:
+        with pytest.raises(Exception, match="should be"):
+            Ode_recording_store(num_steps=NUM_STEPS, num_patches=NUM_PATCHES, species_list=SPECIES_LIST,
+                                step_windows=step_windows)
@@ -0,0 +1,113 @@
+import contextlib
+import io
+import numpy as np
+import pytest
+from habitat_patch import Patch
+from system_state import System_state
+
+
+class Named_species:
+    def __init__(self, name):
+        self.name = name
+
+
+def build_state(num_side, seed):
+    # lattice with randomly missing links, and patch sizes and traversal scores that are not dyadic fractions (so that
+    # costs summed in different orders can differ in the last bit)
+    rng = np.random.default_rng(seed)
+    num_patches = num_side * num_side
+    adjacency = np.identity(num_patches)
+    for patch_num in range(num_patches):
+        x, y = divmod(patch_num, num_side)
+        for dx, dy in [(1, 0), (0, 1)]:
+            if x + dx < num_side and y + dy < num_side and rng.random() < 0.85:
+                neighbour = (x + dx) * num_side + y + dy
+                adjacency[patch_num, neighbour] = adjacency[neighbour, patch_num] = 1.0
+    state = System_state.__new__(System_state)
+    state.patch_list = [Patch(position=np.array(divmod(x, num_side)), patch_number=x,
+                              patch_size=float(rng.choice([0.1, 0.3, 0.7, 0.2])),
+                              habitat_type_num=int(rng.integers(0, 2))) for x in range(num_patches)]
+    state.current_patch_list = list(range(num_patches))
+    state.patch_adjacency_matrix = adjacency
+    state.species_set = {"list": [Named_species("a"), Named_species("b")]}
+    state.habitat_species_traversal = np.array([[0.3, 0.7], [0.7, 0.3]])
+    state.habitat_species_feeding = state.habitat_species_traversal
+    state.step = 0
+    state.update_all_patches_habitat_based_properties()
+    return state
+
+
+def build_paths(num_side, seed, is_all_pairs):
+    state = build_state(num_side=num_side, seed=seed)
+    parameters = {"main_para": {"ASSUMED_MAX_PATH_LENGTH": 3, "IS_ALL_PAIRS_PATHING": is_all_pairs}}
+    with contextlib.redirect_stdout(io.StringIO()):
+        state.build_all_patches_species_paths_and_adjacency(parameters=parameters)
+    return state
+
+
+@pytest.mark.parametrize("num_side, seed", [(7, 4), (10, 4), (10, 5), (10, 6), (10, 7), (11, 0)])
+def test_all_pairs_pathing_matches_per_patch(num_side, seed):
+    per_patch = build_paths(num_side=num_side, seed=seed, is_all_pairs=False)
+    all_pairs = build_paths(num_side=num_side, seed=seed, is_all_pairs=True)
+    for patch, all_pairs_patch in zip(per_patch.patch_list, all_pairs.patch_list):
+        for species_name in ["a", "b"]:
+            assert dict(patch.species_movement_scores[species_name]) == dict(
+                all_pairs_patch.species_movement_scores[species_name])
+            assert patch.adjacency_lists[species_name] == all_pairs_patch.adjacency_lists[species_name]
+        assert patch.stepping_stone_list == all_pairs_patch.stepping_stone_list
+
+
+def perturb_state(state, rng, altered_patch_numbers, num_edge_changes=4, num_habitat_changes=2):
+    # add or remove random links (between lattice neighbours and any other patches) and flip the habitat of random
+    # patches, recording every patch that was altered
+    num_side = int(round(np.sqrt(len(state.patch_list))))
+    for _ in range(num_edge_changes):
+        patch_num = int(rng.integers(len(state.patch_list)))
+        if rng.random() < 0.7:
+            x, y = divmod(patch_num, num_side)
+            other_num = ((x + 1) % num_side) * num_side + y if rng.random() < 0.5 else x * num_side + (y + 1) % num_side
+        else:
+            other_num = int(rng.integers(len(state.patch_list)))
+        if other_num != patch_num:
+            adjacency_value = 1.0 - state.patch_adjacency_matrix[patch_num, other_num]
+            state.patch_adjacency_matrix[patch_num, other_num] = adjacency_value
+            state.patch_adjacency_matrix[other_num, patch_num] = adjacency_value
+            altered_patch_numbers.update([patch_num, other_num])
+    for _ in range(num_habitat_changes):
+        patch = state.patch_list[int(rng.integers(len(state.patch_list)))]
+        patch.habitat_type_num = 1 - patch.habitat_type_num
+        state.update_patch_habitat_based_properties(patch=patch)
+        altered_patch_numbers.add(patch.number)
+
+
+@pytest.mark.parametrize("is_all_pairs", [False, True])
+@pytest.mark.parametrize("seed", [0, 1, 2, 3, 4, 5])
+def test_repair_matches_full_rebuild(seed, is_all_pairs):
+    parameters = {"main_para": {"ASSUMED_MAX_PATH_LENGTH": 3, "IS_ALL_PAIRS_PATHING": is_all_pairs}}
+    repaired = build_paths(num_side=8, seed=seed, is_all_pairs=is_all_pairs)
+    rng = np.random.default_rng(seed + 100)
+    for _ in range(2):
+        # repair twice, so that the second repair starts from repaired path trees
+        altered_patch_numbers = set()
+        perturb_state(state=repaired, rng=rng, altered_patch_numbers=altered_patch_numbers)
+        with contextlib.redirect_stdout(io.StringIO()):
+            repaired.repair_species_paths_and_adjacency(parameters=parameters,
+                                                        altered_patch_numbers=sorted(altered_patch_numbers))
+
+        # the same network and habitats, built from scratch
+        rebuilt = build_state(num_side=8, seed=seed)
+        rebuilt.patch_adjacency_matrix = repaired.patch_adjacency_matrix.copy()
+        for patch, rebuilt_patch in zip(repaired.patch_list, rebuilt.patch_list):
+            rebuilt_patch.habitat_type_num = patch.habitat_type_num
+        rebuilt.update_all_patches_habitat_based_properties()
+        with contextlib.redirect_stdout(io.StringIO()):
+            rebuilt.build_all_patches_species_paths_and_adjacency(parameters=parameters)
+
+        for patch, rebuilt_patch in zip(repaired.patch_list, rebuilt.patch_list):
+            for species_name in ["a", "b"]:
+                assert dict(patch.species_movement_scores[species_name]) == dict(
+                    rebuilt_patch.species_movement_scores[species_name])
+                assert patch.adjacency_lists[species_name] == rebuilt_patch.adjacency_lists[species_name]
+                assert np.array_equal(patch.bounded_path_costs[species_name],
+                                      rebuilt_patch.bounded_path_costs[species_name])
+            assert sorted(patch.stepping_stone_list) == sorted(rebuilt_patch.stepping_stone_list)
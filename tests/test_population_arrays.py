@@ -0,0 +1,274 @@
+import contextlib
+import io
+import random
+import numpy as np
+import pytest
+import population_dynamics
+from habitat_patch import Patch
+from local_population import Local_population
+from population_arrays import Population_arrays
+from system_state import System_state
+
+HISTORIES = ["population_history", "internal_change_history", "population_leave_history",
+             "population_enter_history", "potential_dispersal_history"]
+ODE_RECORDING_VALUES = ["time", "new_population", "r_value", "r_mod", "r_final", "l_value", "k_value", "competitors",
+                        "local_growth", "direct_impact", "prey_gain", "predation_loss"]
+
+
+SPECIES_NAMES = ["s0", "s1", "s2"]
+PREY_DICTS = [{"s1": 0.7, "s2": 0.4}, {"s2": 1.0, "s0": 0.2}, {}]
+
+
+class Dynamics_species:
+    # the species attributes read by the population dynamics
+    def __init__(self, number, config, rng):
+        name = SPECIES_NAMES[number]
+        self.name = name
+        self.lifespan = [5, 10.0, 3][number]
+        self.minimum_population_size = [0.01, 0.05, 0.0][number]
+        self.resource_usage_conversion = [1.0, 0.0, 0.5][number]
+        self.is_dispersal = True
+        self.dispersal_para = {
+            "DISPERSAL_MECHANISM": {"type": "constant", "constant_value": config["mechanism"][number]},
+            "DISPERSAL_MOBILITY": {"type": "constant", "constant_value": 0.3},
+            "MAX_DISPERSAL_PATH_LENGTH": config.get("max_dispersal_path_length", {}).get(
+                number, {"type": "constant", "constant_value": 2}),
+            "MINIMUM_LINK_STRENGTH_DISPERSAL": {"type": "constant", "constant_value": 0.0},
+            "DISPERSAL_DIRECTION": {"type": "constant", "constant_value": 0.4},
+            "COEFFICIENTS_LISTS": {"type": "constant", "constant_value": {
+                "DENSITY_THRESHOLD": 0.5, "UNDER": [0.0, 0.1, 0.2], "OVER": [0.05, 0.3, -0.01]}},
+            "BINOMIAL_EXTRA_INDIVIDUAL": 0.1,
+        }
+        self.is_dispersal_path_restricted = True
+        self.always_move_with_minimum = number == 1
+        self.dispersal_efficiency = 0.9
+        self.initial_population_mechanism = "random_binomial"
+        self.initial_population_para = {"BINOMIAL_MAXIMUM_MULTIPLIER": 5.0, "BINOMIAL_PROBABILITY": 0.7,
+                                        "IS_ENSURE_MINIMUM_POPULATION": False}
+        self.seasonal_period = 7
+        self.growth_function = ["logistic", "malthusian"][number % 2]
+        self.growth_para = {"R": {"type": "sine", "amplitude": 0.2, "period": 13, "phase_shift": 0.1,
+                                  "vertical_shift": 1.0 + 0.1 * number}, "CARRYING_CAPACITY": 10.0}
+        self.is_growth_offset = False
+        self.growth_annual_duration = 10
+        self.growth_vector_offset_species = [0, 3, 5]
+        self.is_growth_offset_local = False
+        self.growth_vector_offset_local = None
+        self.predation_para = {
+            "PREY_DICT": {"type": "constant", "constant_value": PREY_DICTS[number]},
+            "FORAGING_MOBILITY": config.get("foraging_mobility", {}).get(
+                number, {"type": "constant", "constant_value": 4.0}),
+            "FORAGING_KAPPA": {"type": "constant", "constant_value": 0.0},
+            "MAX_FORAGING_PATH_LENGTH": {"type": "constant", "constant_value": 2},
+            "MINIMUM_LINK_STRENGTH_FORAGING": {"type": "constant", "constant_value": 0.0},
+            "PREDATION_EFFICIENCY": {"type": "constant", "constant_value": 0.6},
+            "PREDATION_FOCUS": {"type": "constant", "constant_value": config["focus"]},
+            "PREDATION_RATE": {"type": "constant", "constant_value": 3.0},
+            "ECOLOGICAL_EFFICIENCY": 0.3,
+            "PREDATION_FUNCTION": config["predation_function"],
+            "B": 1.0,
+            "C": 0.5,
+        }
+        self.is_predation_only_prevents_death = number == 1
+        self.is_nonlocal_foraging = True
+        self.is_foraging_path_restricted = True
+        self.is_pure_direct_impact = number != 1
+        self.pure_direct_impact_para = {"TYPE": "binomial" if number != 2 else "vector", "IMPACT": -0.3,
+                                        "PROBABILITY": 0.2 + 0.1 * number,
+                                        "DIRECT_VECTOR": list(np.linspace(-0.1, 0.1, 9))}
+        self.is_direct_offset = number == 2
+        self.direct_annual_duration = 9
+        self.direct_vector_offset_species = [1, 2]
+        self.is_direct_offset_local = True
+        self.direct_vector_offset_local = [list(rng.integers(0, 3, 100)) for _ in range(2)]
+        self.direct_impact_on_me = {SPECIES_NAMES[(number + 1) % 3]: -0.01, name: 0.005}
+        self.predator_list = [SPECIES_NAMES[x] for x in range(3) if name in PREY_DICTS[x]]
+        self.temporal_schedule = None
+        self.interaction_arrays = None
+        for attribute in ["current_r_value", "current_prey_dict", "current_predation_efficiency",
+                          "current_predation_focus", "current_predation_rate", "current_foraging_mobility",
+                          "current_foraging_kappa", "current_minimum_link_strength_foraging",
+                          "current_max_foraging_path_length", "current_dispersal_mobility",
+                          "current_dispersal_direction", "current_dispersal_mechanism", "current_coefficients_lists",
+                          "current_minimum_link_strength_dispersal", "current_max_dispersal_path_length"]:
+            setattr(self, attribute, None)
+
+
+def build_system(seed, config):
+    # small seeded lattice with three species in a predation loop, and every local population built from scratch
+    rng = np.random.default_rng(seed)
+    num_side = 6
+    num_patches = num_side * num_side
+    adjacency = np.identity(num_patches)
+    for patch_num in range(num_patches):
+        x, y = divmod(patch_num, num_side)
+        for dx, dy in [(1, 0), (0, 1)]:
+            if x + dx < num_side and y + dy < num_side and rng.random() < 0.85:
+                neighbour = (x + dx) * num_side + y + dy
+                adjacency[patch_num, neighbour] = adjacency[neighbour, patch_num] = 1.0
+    species_list = [Dynamics_species(number=number, config=config, rng=rng) for number in range(3)]
+    state = System_state.__new__(System_state)
+    state.patch_list = [Patch(position=np.array(divmod(x, num_side)), patch_number=x,
+                              patch_size=float(rng.choice([0.5, 1.0, 2.0])), habitat_type_num=int(rng.integers(0, 3)))
+                        for x in range(num_patches)]
+    for patch in state.patch_list:
+        patch.quality = float(rng.choice([0.5, 1.0]))
+    # some patches have been removed, so are disconnected and later emptied (as by the patch-removal perturbation)
+    state.current_patch_list = [x for x in range(num_patches) if x % 7 != 3]
+    for patch_num in set(range(num_patches)) - set(state.current_patch_list):
+        adjacency[patch_num, :] = 0.0
+        adjacency[:, patch_num] = 0.0
+    state.patch_adjacency_matrix = adjacency
+    state.species_set = {"list": species_list}
+    state.habitat_species_traversal = rng.choice([0.25, 0.5, 1.0], size=(3, len(species_list)))
+    state.habitat_species_feeding = state.habitat_species_traversal
+    state.step = 0
+    state.update_all_patches_habitat_based_properties()
+    parameters = {
+        "main_para": {"ASSUMED_MAX_PATH_LENGTH": 3, "INTERACTION_SCORING_WORKERS": 1, "IS_ALL_PAIRS_PATHING": True,
+                      "MODEL_TIME_TYPE": config["time_type"], "EULER_STEP": 0.1, "ECO_PRIORITIES": config["priorities"]},
+        "pop_dyn_para": {"COMPETITION_ALPHA_SCALING": 0.7, "IS_NONLOCAL_FORAGING_PERMITTED": True,
+                         "IS_LOCAL_FORAGING_ENSURED": False, "IS_DISPERSAL_PERMITTED": True, "IS_DIRECT_IMPACT": True,
+                         "IS_DIRECT_IMPACT_NONLOCAL": True, "IS_PURE_DIRECT_IMPACT": True, "MU_OVERALL": 4.0},
+        "plot_save_para": {"IS_ODE_RECORDINGS": True},
+        "species_para": {x.name: {"DISPERSAL_PARA": {"BINOMIAL_EXTRA_INDIVIDUAL": 0.2}} for x in species_list},
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        state.build_all_patches_species_paths_and_adjacency(parameters=parameters)
+    np.random.seed(seed)
+    random.seed(seed)
+    for patch in state.patch_list:
+        patch.local_populations = {}
+        for species in species_list:
+            patch.local_populations[species.name] = Local_population(species=species, patch=patch,
+                                                                     parameters=parameters,
+                                                                     current_patch_list=state.current_patch_list)
+            if patch.number not in state.current_patch_list:
+                patch.local_populations[species.name].population = 0.0
+    with contextlib.redirect_stdout(io.StringIO()):
+        population_dynamics.build_interacting_populations_list(patch_list=state.patch_list,
+                                                               species_list=species_list, is_nonlocal_foraging=True,
+                                                               is_local_foraging_ensured=False, time=0)
+        population_dynamics.build_actual_dispersal_targets(patch_list=state.patch_list, species_list=species_list,
+                                                           is_dispersal=True, time=0)
+    return state, species_list, parameters
+
+
+def run_system(seed, config, is_population_arrays, num_steps):
+    state, species_list, parameters = build_system(seed=seed, config=config)
+    population_arrays = Population_arrays(state.patch_list, species_list, parameters) if is_population_arrays else None
+    np.random.seed(seed + 1)
+    random.seed(seed + 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for step in range(num_steps):
+            population_dynamics.update_populations(patch_list=state.patch_list, species_list=species_list, time=step,
+                                                   step=step, parameters=parameters,
+                                                   current_patch_list=state.current_patch_list,
+                                                   is_ode_recordings=True, population_arrays=population_arrays)
+    return state
+
+
+CONFIGS = [
+    {"mechanism": ["diffusion", "stochastic_binomial", "step_poly"], "focus": 2, "predation_function": "holling_II",
+     "time_type": "discrete", "priorities": {0: {"foraging", "direct_impact", "growth", "dispersal"}, 1: {}, 2: {},
+                                             3: {}}},
+    {"mechanism": ["adaptive", "stochastic_quantity", "diffusion"], "focus": 1.5,
+     "predation_function": "beddington_deangelis", "time_type": "continuous",
+     "priorities": {0: {"growth"}, 1: {"direct_impact", "foraging"}, 2: {"dispersal"}, 3: {}}},
+]
+
+
+def reference_foraging_caller(parameters, patch_list, time, alpha, is_dispersal, current_patch_list, is_ode_recordings):
+    # the original object-by-object foraging sub-step, using foraging_calculator() rather than foraging_kernel()
+    population_dynamics.foraging_calculator(patch_list=patch_list, time=time, current_patch_list=current_patch_list)
+    for patch in patch_list:
+        for local_pop in patch.local_populations.values():
+            local_pop.foraging(this_patch_species_feeding=patch.this_habitat_species_feeding[local_pop.species.name])
+
+
+def assert_same_runs(state, other_state):
+    for patch, other_patch in zip(state.patch_list, other_state.patch_list):
+        for name, local_pop in patch.local_populations.items():
+            other_local_pop = other_patch.local_populations[name]
+            for history in HISTORIES:
+                assert np.array_equal(np.array(getattr(local_pop, history), dtype=float),
+                                      np.array(getattr(other_local_pop, history), dtype=float))
+            for distance in ["maximum_foraging_distance", "weighted_foraging_distance"]:
+                assert str(getattr(local_pop, distance)) == str(getattr(other_local_pop, distance))
+            assert list(local_pop.ode_recording) == list(other_local_pop.ode_recording)
+            for step, recording in local_pop.ode_recording.items():
+                other_recording = other_local_pop.ode_recording[step]
+                for key in ODE_RECORDING_VALUES:
+                    assert float(recording[key]) == float(other_recording[key])
+                for key in ["g_values", "kills", "killed"]:
+                    assert recording[key] == other_recording[key]
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_population_arrays_match_object_model(config, seed):
+    objects = run_system(seed=seed, config=config, is_population_arrays=False, num_steps=12)
+    arrays = run_system(seed=seed, config=config, is_population_arrays=True, num_steps=12)
+    assert_same_runs(state=objects, other_state=arrays)
+
+
+@pytest.mark.parametrize("config", CONFIGS)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_foraging_kernel_matches_foraging_calculator(config, seed, monkeypatch):
+    # the whole-system foraging_kernel() against the object-by-object foraging_calculator(), with non-local foraging
+    kernel = run_system(seed=seed, config=config, is_population_arrays=False, num_steps=10)
+    monkeypatch.setattr(population_dynamics, "foraging_caller", reference_foraging_caller)
+    calculator = run_system(seed=seed, config=config, is_population_arrays=False, num_steps=10)
+    assert any(len(recording["kills"]["g3"]) > 0 for patch in kernel.patch_list
+               for local_pop in patch.local_populations.values() for recording in local_pop.ode_recording.values())
+    assert_same_runs(state=kernel, other_state=calculator)
+
+
+def interaction_lists(state):
+    return [[dict(x) for x in local_pop.interacting_populations] for patch in state.patch_list
+            for local_pop in patch.local_populations.values()]
+
+
+def dispersal_targets(state):
+    return [list(local_pop.actual_dispersal_targets.items()) for patch in state.patch_list
+            for local_pop in patch.local_populations.values()]
+
+
+def test_selective_rebuild_matches_full_rebuild(monkeypatch):
+    # the foraging mobility of one species and the maximum dispersal path length of another vary over time, so that
+    # change_checker() rebuilds only their interactions and targets - which should equal a rebuild of everything
+    config = dict(CONFIGS[0],
+                  foraging_mobility={1: {"type": "vector_exp", "period": 5, "vector_exp": [4.0, 4.0, 0.5, 1.5, 1.5]}},
+                  max_dispersal_path_length={0: {"type": "vector_imp", "period": 6, "vector_imp": {0: 2, 3: 1}}})
+    state, species_list, parameters = build_system(seed=0, config=config)
+    rebuilt_species = []
+
+    def counted_rebuild(changed_species, **kwargs):
+        rebuilt_species.append([x.name for x in changed_species])
+        rebuild_interacting_populations_of_species(changed_species=changed_species, **kwargs)
+
+    rebuild_interacting_populations_of_species = population_dynamics.rebuild_interacting_populations_of_species
+    monkeypatch.setattr(population_dynamics, "rebuild_interacting_populations_of_species", counted_rebuild)
+    np.random.seed(1)
+    random.seed(1)
+    for step in range(12):
+        num_rebuilds = len(rebuilt_species)
+        with contextlib.redirect_stdout(io.StringIO()):
+            population_dynamics.update_populations(patch_list=state.patch_list, species_list=species_list, time=step,
+                                                   step=step, parameters=parameters,
+                                                   current_patch_list=state.current_patch_list,
+                                                   is_ode_recordings=False)
+        if step in [2, 3, 5, 7, 8, 10]:
+            assert rebuilt_species[num_rebuilds:] == [["s1"]]
+        else:
+            assert len(rebuilt_species) == num_rebuilds
+        selective_interactions = interaction_lists(state=state)
+        selective_targets = dispersal_targets(state=state)
+        with contextlib.redirect_stdout(io.StringIO()):
+            population_dynamics.build_interacting_populations_list(
+                patch_list=state.patch_list, species_list=species_list, is_nonlocal_foraging=True,
+                is_local_foraging_ensured=False, time=step)
+            population_dynamics.build_actual_dispersal_targets(patch_list=state.patch_list, species_list=species_list,
+                                                               is_dispersal=True, time=step)
+        assert selective_interactions == interaction_lists(state=state)
+        assert selective_targets == dispersal_targets(state=state)
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+import population_dynamics
+from population_dynamics import change_checker, compile_temporal_parameter, temporal_function, \
+    temporal_schedule_value
+
+PARAMETERS = [
+    {"type": None},
+    {"type": "constant", "constant_value": 0.4},
+    {"type": "vector_exp", "period": 7, "vector_exp": [1.0, 1.0, 2.0, 2.0, 2.0, 0.5, 1.0]},
+    {"type": "vector_exp", "period": 4, "vector_exp": [3, 3, 3, 3]},
+    {"type": "vector_imp", "period": 10, "vector_imp": {0: 2, 4: 3, 5: 2, 8: 1}},
+    {"type": "sine", "amplitude": 0.8, "period": 9, "phase_shift": 0.3, "vertical_shift": 1.0},
+    {"type": "sine", "amplitude": 0.8, "period": 9, "phase_shift": 0.3, "vertical_shift": 1.0, "quantisation": 0.5},
+    {"type": "sine", "amplitude": 0.1, "period": 6.5, "phase_shift": 0.0, "vertical_shift": 1.0, "quantisation": 1.0},
+]
+
+
+@pytest.mark.parametrize("parameter", PARAMETERS)
+def test_schedule_value_matches_temporal_function(parameter):
+    compiled = compile_temporal_parameter(parameter)
+    num_days = 30
+    for time in range(num_days):
+        value, next_change_time = temporal_schedule_value(compiled, time)
+        assert value == temporal_function(parameter, time)
+        assert next_change_time > time
+        # the value cannot change before the next change time...
+        for later_time in range(time + 1, int(min(next_change_time, time + 2 * num_days))):
+            assert temporal_function(parameter, later_time) == value
+        # ...which is exactly when it next changes, except that a quantised sine may only look ahead so far
+        if np.isfinite(next_change_time):
+            horizon = int(np.ceil(parameter["period"])) + 1 if parameter["type"] == "sine" else None
+            assert temporal_function(parameter, next_change_time) != value or next_change_time - time == horizon
+
+
+class Scheduled_species:
+    # the temporal parameters read by change_checker(), all constant unless given
+    def __init__(self, name, predation_para=None, dispersal_para=None):
+        constant = {"type": "constant", "constant_value": 1.0}
+        self.name = name
+        self.is_dispersal = True
+        self.temporal_schedule = None
+        self.growth_para = {"R": {"type": "sine", "amplitude": 0.2, "period": 5, "phase_shift": 0.0,
+                                  "vertical_shift": 1.0}}
+        self.predation_para = {x: constant for x in [
+            "PREY_DICT", "PREDATION_EFFICIENCY", "PREDATION_FOCUS", "PREDATION_RATE", "FORAGING_MOBILITY",
+            "FORAGING_KAPPA", "MINIMUM_LINK_STRENGTH_FORAGING", "MAX_FORAGING_PATH_LENGTH"]}
+        self.predation_para.update(predation_para or {})
+        self.dispersal_para = {x: constant for x in [
+            "DISPERSAL_MOBILITY", "DISPERSAL_DIRECTION", "DISPERSAL_MECHANISM", "COEFFICIENTS_LISTS",
+            "MINIMUM_LINK_STRENGTH_DISPERSAL", "MAX_DISPERSAL_PATH_LENGTH"]}
+        self.dispersal_para.update(dispersal_para or {})
+        for attribute in ["current_r_value", "current_prey_dict", "current_predation_efficiency",
+                          "current_predation_focus", "current_predation_rate", "current_foraging_mobility",
+                          "current_foraging_kappa", "current_minimum_link_strength_foraging",
+                          "current_max_foraging_path_length", "current_dispersal_mobility",
+                          "current_dispersal_direction", "current_dispersal_mechanism", "current_coefficients_lists",
+                          "current_minimum_link_strength_dispersal", "current_max_dispersal_path_length"]:
+            setattr(self, attribute, None)
+
+
+def test_change_checker_rebuilds_only_on_relevant_changes(monkeypatch):
+    # the growth rate, predation rate and dispersal direction change without needing any list to be rebuilt, while
+    # the foraging mobility of "a" and the maximum dispersal path length of "b" each require their own rebuild
+    species_list = [
+        Scheduled_species(name="a", predation_para={
+            "PREDATION_RATE": {"type": "vector_exp", "period": 3, "vector_exp": [0.1, 0.2, 0.3]},
+            "FORAGING_MOBILITY": {"type": "vector_imp", "period": 8, "vector_imp": {0: 1.0, 3: 2.0}}}),
+        Scheduled_species(name="b", dispersal_para={
+            "DISPERSAL_DIRECTION": {"type": "sine", "amplitude": 0.5, "period": 4, "phase_shift": 0.0,
+                                    "vertical_shift": 0.0},
+            "MAX_DISPERSAL_PATH_LENGTH": {"type": "sine", "amplitude": 1.2, "period": 10, "phase_shift": 0.0,
+                                          "vertical_shift": 2.0, "quantisation": 1.0}}),
+    ]
+    rebuilds = []
+
+    def record_rebuild(list_name):
+        def rebuild(changed_species=None, **kwargs):
+            rebuilds.append((list_name, None if changed_species is None else [x.name for x in changed_species]))
+        return rebuild
+
+    monkeypatch.setattr(population_dynamics, "build_actual_dispersal_targets", record_rebuild("dispersal"))
+    monkeypatch.setattr(population_dynamics, "build_interacting_populations_list", record_rebuild("foraging"))
+    mobility = species_list[0].predation_para["FORAGING_MOBILITY"]
+    path_length = species_list[1].dispersal_para["MAX_DISPERSAL_PATH_LENGTH"]
+    for step in range(24):
+        rebuilds.clear()
+        is_rebuilt = change_checker(species_list=species_list, patch_list=[], time=step, step=step,
+                                    is_dispersal=True, is_nonlocal_foraging=True, is_local_foraging_ensured=False)
+        if step == 0:
+            assert is_rebuilt and rebuilds == [("dispersal", None), ("foraging", None)]
+            continue
+        expected = []
+        if temporal_function(path_length, step) != temporal_function(path_length, step - 1):
+            expected.append(("dispersal", ["b"]))
+        if temporal_function(mobility, step) != temporal_function(mobility, step - 1):
+            expected.append(("foraging", ["a"]))
+        assert is_rebuilt == (len(expected) > 0)
+        assert rebuilds == expected
+        # every current value is up to date, whether or not it was rebuilt
+        assert species_list[0].current_predation_rate == temporal_function(
+            species_list[0].predation_para["PREDATION_RATE"], step)
+        assert species_list[1].current_dispersal_direction == temporal_function(
+            species_list[1].dispersal_para["DISPERSAL_DIRECTION"], step)
+        assert species_list[1].current_r_value == temporal_function(species_list[1].growth_para["R"], step)